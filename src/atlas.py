@@ -0,0 +1,187 @@
+# atlas.py
+import pygame
+
+ATLAS_PAGE_SIZE = 1024
+
+
+class _Page:
+    """One atlas surface split into equal slots of slot_w x slot_h."""
+
+    def __init__(self, slot_w, slot_h, page_size):
+        self.slot_w = slot_w
+        self.slot_h = slot_h
+        self.cols = max(1, page_size // slot_w)
+        self.rows = max(1, page_size // slot_h)
+        self.surface = pygame.Surface((self.cols * slot_w, self.rows * slot_h), pygame.SRCALPHA)
+        self.free = list(range(self.cols * self.rows - 1, -1, -1))  # pop() → lowest slot
+        self.used = 0
+
+    @property
+    def capacity(self):
+        return self.cols * self.rows
+
+    def slot_rect(self, slot):
+        return pygame.Rect(
+            (slot % self.cols) * self.slot_w,
+            (slot // self.cols) * self.slot_h,
+            self.slot_w, self.slot_h
+        )
+
+
+def _copy_into(dest, rect, src, area=None):
+    # exact pixel copy (a plain alpha blit onto a transparent slot would
+    # darken semi-transparent pixels)
+    dest.fill((0, 0, 0, 0), rect)
+    dest.blit(src, rect.topleft, area, special_flags=pygame.BLEND_RGBA_MAX)
+
+
+class TileAtlas:
+    """
+    Packs tile images from every resident map into a few large surfaces.
+
+    Tiles are identified by a hashable key (tileset image, source rect,
+    flip flags) so maps sharing a tileset share atlas slots. Slots are
+    reference counted; release() frees them and compact() repacks live
+    tiles into fewer pages. Holders of (surface, rect) refs must re-lookup
+    their keys whenever `generation` changes.
+    """
+
+    def __init__(self, page_size=ATLAS_PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = {}          # (w, h) → [_Page]
+        self.entries = {}        # key → [page, slot, rect, refcount, make_surface]
+        self.generation = 0
+
+    # --------------------------------------------------------
+    # Acquire / release
+    # --------------------------------------------------------
+    def acquire(self, key, make_surface):
+        """
+        Add a reference to key, uploading make_surface() on first use.
+        Returns (atlas_surface, area_rect).
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[3] += 1
+            return entry[0].surface, entry[2]
+
+        src = make_surface()
+        page, slot = self._alloc(src.get_width(), src.get_height())
+        rect = page.slot_rect(slot)
+        _copy_into(page.surface, rect, src)
+
+        self.entries[key] = [page, slot, rect, 1, make_surface]
+        return page.surface, rect
+
+    def refresh(self, predicate):
+        """
+        Re-upload every live tile whose key matches predicate, in place
+        (e.g. after its tileset image changed on disk). Returns the count.
+        """
+        count = 0
+        for key, entry in self.entries.items():
+            if predicate(key):
+                _copy_into(entry[0].surface, entry[2], entry[4]())
+                count += 1
+        return count
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry[0].surface, entry[2]
+
+    def release(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry[3] -= 1
+        if entry[3] > 0:
+            return
+        page, slot = entry[0], entry[1]
+        page.free.append(slot)
+        page.used -= 1
+        del self.entries[key]
+
+    def _alloc(self, w, h):
+        pages = self.pages.setdefault((w, h), [])
+        for page in pages:
+            if page.free:
+                page.used += 1
+                return page, page.free.pop()
+
+        page = _Page(w, h, self.page_size)
+        pages.append(page)
+        page.used += 1
+        return page, page.free.pop()
+
+    # --------------------------------------------------------
+    # Compaction
+    # --------------------------------------------------------
+    def wasted_fraction(self):
+        total = sum(p.capacity for group in self.pages.values() for p in group)
+        if not total:
+            return 0.0
+        used = sum(p.used for group in self.pages.values() for p in group)
+        return 1.0 - used / total
+
+    def compact(self, min_waste=0.5):
+        """
+        Repack live tiles into as few pages as possible. Does nothing if
+        no slot-size group would lose a page or waste is below min_waste.
+        Returns True if tiles moved.
+        """
+        if self.wasted_fraction() < min_waste:
+            return False
+
+        moved = False
+        for size, group in list(self.pages.items()):
+            live = [(k, e) for k, e in self.entries.items() if e[0] in group]
+            if not live:
+                del self.pages[size]
+                moved = True
+                continue
+
+            per_page = group[0].capacity
+            needed = (len(live) + per_page - 1) // per_page
+            if needed >= len(group):
+                continue
+
+            new_group = [_Page(size[0], size[1], self.page_size) for _ in range(needed)]
+            for i, (key, entry) in enumerate(live):
+                page = new_group[i // per_page]
+                slot = page.free.pop()
+                page.used += 1
+                rect = page.slot_rect(slot)
+                _copy_into(page.surface, rect, entry[0].surface, entry[2])
+                entry[0], entry[1], entry[2] = page, slot, rect
+
+            self.pages[size] = new_group
+            moved = True
+
+        if moved:
+            self.generation += 1
+        return moved
+
+    # --------------------------------------------------------
+    # Stats
+    # --------------------------------------------------------
+    def page_count(self):
+        return sum(len(group) for group in self.pages.values())
+
+    def nbytes(self):
+        return sum(
+            p.surface.get_width() * p.surface.get_height() * p.surface.get_bytesize()
+            for group in self.pages.values() for p in group
+        )
+
+
+_default_atlas = None
+
+
+def get_atlas():
+    """Process-wide atlas shared by all TileMaps."""
+    global _default_atlas
+    if _default_atlas is None:
+        _default_atlas = TileAtlas()
+    return _default_atlas
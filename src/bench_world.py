@@ -0,0 +1,214 @@
+# bench_world.py
+"""
+Load time, memory and frame time against world size, on stress worlds.
+
+    python src/bench_world.py --sizes 64,256,1024 --maps 1,4,16
+    python src/bench_world.py --sizes 2048 --maps 4 --walls 0.3 --lights 500 --backend baked
+
+Every point of the sweep (each size × map count) is generated with
+stress_maps.py into STRESS_MAPS_FOLDER/<size>_<maps>/ and then measured
+in a fresh interpreter, so peak RSS and the tileset cache belong to that
+point alone:
+
+  gen_s           stress_maps.generate (not part of the game's costs)
+  load_s          MapManager() + build_world of the whole grid, non-streaming
+  map_bytes       memory_report() total: tile data, objects, render caches
+  rss_bytes       peak RSS of the measuring process
+  first_frame_ms  first frame, which builds the renderer caches
+  frame_ms        mean / p99 of the next --frames frames: floor, grass, walls
+  frame_p99_ms    and above drawn through draw_by_layers, plus the walk over
+                  get_all_lights() the night overlay does, with the camera
+                  panning diagonally across the whole world
+
+Results go to a CSV and, when matplotlib is installed, to a PNG with one
+panel per metric against world tiles, one line per map count.
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from settings import GAME_WIDTH, GAME_HEIGHT, RENDER_BACKEND, STRESS_MAPS_FOLDER
+from camera import Camera
+from utils import resource_path
+import stress_maps
+
+LAYERS = ["floor", "grass", "walls", "above"]
+FIELDS = ["size", "maps", "tiles", "gen_s", "file_bytes", "load_s", "map_bytes", "rss_bytes",
+          "first_frame_ms", "frame_ms", "frame_p99_ms"]
+PLOTS = [("load_s", "load (s)"), ("map_bytes", "map memory (MB)"),
+         ("rss_bytes", "peak RSS (MB)"), ("frame_ms", "frame (ms)")]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def parse_list(text, kind=int):
+    return [kind(v) for v in text.split(",") if v.strip()]
+
+
+# --------------------------------------------------------
+# One point (runs in the child process)
+# --------------------------------------------------------
+def measure(maps_folder, frames, backend):
+    from world_manager import MapManager
+
+    pygame.init()
+    screen = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
+    surf = pygame.Surface((GAME_WIDTH, GAME_HEIGHT)).convert()
+
+    t0 = time.perf_counter()
+    mm = MapManager(maps_folder=maps_folder)
+    mm.set_render_backend(backend)
+    mm.build_world(stress_maps.map_name(0), load_connected=True, streaming=False)
+    load_s = time.perf_counter() - t0
+
+    left, top, width, height = mm.get_world_bounds()
+    camera = Camera(GAME_WIDTH, GAME_HEIGHT)
+    target = pygame.Rect(0, 0, 1, 1)
+
+    def frame(i):
+        # diagonal pan from the top-left to the bottom-right corner
+        t = i / max(1, frames - 1)
+        target.center = (left + int(t * width), top + int(t * height))
+        camera.update(target, left, top, width, height)
+        start = time.perf_counter()
+        mm.draw_by_layers(surf, camera, LAYERS)
+        visible = 0
+        for light in mm.get_all_lights():
+            sx = light.x - camera.x
+            sy = light.y - camera.y
+            if -light.r < sx < GAME_WIDTH + light.r and -light.r < sy < GAME_HEIGHT + light.r:
+                visible += 1
+        return (time.perf_counter() - start) * 1000
+
+    first = frame(0)
+    times = [frame(i) for i in range(frames)]
+    report = mm.memory_report()
+    mm.shutdown()
+    pygame.quit()
+    return {
+        "load_s": round(load_s, 4),
+        "map_bytes": report["totals"].get("total", 0),
+        "rss_bytes": report.get("peak_rss_bytes", 0),
+        "first_frame_ms": round(first, 3),
+        "frame_ms": round(sum(times) / len(times), 3) if times else 0.0,
+        "frame_p99_ms": round(percentile(times, 0.99), 3),
+    }
+
+
+# --------------------------------------------------------
+# Sweep (parent process)
+# --------------------------------------------------------
+def run_point(args, size, maps):
+    folder = os.path.join(args.out, f"{size}_{maps}")
+    gen = stress_maps.generate(folder, (size, size), maps, args.walls, args.grass, args.warps,
+                               args.signs, args.ledges, args.lights, args.seed, args.encoding)
+    cmd = [sys.executable, os.path.abspath(__file__), "--measure", resource_path(folder),
+           "--frames", str(args.frames), "--backend", args.backend]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        print(f"bench_world: {size}x{size} x{maps} failed:\n{proc.stderr.strip()}")
+        return None
+    row = {"size": size, "maps": maps, "tiles": gen["tiles"], "gen_s": round(gen["seconds"], 3),
+           "file_bytes": gen["bytes"]}
+    row.update(json.loads(lines[-1]))
+    return row
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot(path, rows):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("bench_world: matplotlib not installed, no plot (the CSV has everything)")
+        return False
+
+    fig, axes = plt.subplots(1, len(PLOTS), figsize=(4.5 * len(PLOTS), 4))
+    for ax, (field, label) in zip(axes, PLOTS):
+        scale = 1e-6 if field.endswith("bytes") else 1
+        for maps in sorted({r["maps"] for r in rows}):
+            points = sorted((r["tiles"], r[field] * scale) for r in rows if r["maps"] == maps)
+            ax.plot([p[0] for p in points], [p[1] for p in points], marker="o", label=f"{maps} maps")
+        ax.set_xscale("log")
+        ax.set_xlabel("world tiles")
+        ax.set_ylabel(label)
+        ax.grid(True, alpha=0.3)
+    axes[0].legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="64,256,1024", help="tiles per map side, comma separated")
+    parser.add_argument("--maps", default="1,4", help="stitched map counts, comma separated")
+    parser.add_argument("--walls", type=float, default=0.15, help="wall density 0..1")
+    parser.add_argument("--grass", type=float, default=0.1, help="tall grass density 0..1")
+    parser.add_argument("--warps", type=int, default=4, help="warps per map")
+    parser.add_argument("--signs", type=int, default=4, help="signs per map")
+    parser.add_argument("--ledges", type=int, default=8, help="ledges per map")
+    parser.add_argument("--lights", type=int, default=8, help="lights per map")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--encoding", choices=stress_maps.ENCODINGS, default="zlib")
+    parser.add_argument("--frames", type=int, default=120, help="frames timed per point")
+    parser.add_argument("--backend", default=RENDER_BACKEND, help="tiles, batched or baked")
+    parser.add_argument("--out", default=STRESS_MAPS_FOLDER, help="folder for worlds and results")
+    parser.add_argument("--csv", help="results CSV (default <out>/bench_world.csv)")
+    parser.add_argument("--png", help="plot (default <out>/bench_world.png)")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.frames, args.backend)))
+        return
+
+    rows = []
+    for maps in parse_list(args.maps):
+        for size in parse_list(args.sizes):
+            row = run_point(args, size, maps)
+            if row is None:
+                continue
+            rows.append(row)
+            print(f"{size:>5}x{size:<5} x{maps:<3} {row['tiles']:>11,} tiles  "
+                  f"load {row['load_s']:7.3f} s  maps {row['map_bytes'] / 1e6:8.1f} MB  "
+                  f"rss {row['rss_bytes'] / 1e6:7.0f} MB  first {row['first_frame_ms']:8.2f} ms  "
+                  f"frame {row['frame_ms']:6.2f} ms (p99 {row['frame_p99_ms']:.2f})")
+
+    if not rows:
+        return
+    out = resource_path(args.out)
+    os.makedirs(out, exist_ok=True)
+    csv_path = args.csv or os.path.join(out, "bench_world.csv")
+    write_csv(csv_path, rows)
+    print("bench_world: wrote", csv_path)
+    png_path = args.png or os.path.join(out, "bench_world.png")
+    if plot(png_path, rows):
+        print("bench_world: wrote", png_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# encounters.py
+"""
+Wild encounters in tall grass.
+
+Maps opt in with custom properties (see TileMap):
+
+  encounters      table for the whole map, e.g. "pidgey:50:2-5, rattata:50:2-4"
+                  (species:weight:min-max level, or species:weight:level)
+  encounter_rate  chance per step on grass (default ENCOUNTER_RATE)
+  encounter_tiles GIDs of the grass layer that count as tall grass
+
+and/or rectangles on an "encounters" object layer with their own
+"table" / "rate" properties.
+
+TileMap.encounter_zone already holds the zone of every grass cell, so a
+completed step costs one array lookup. Only on grass does it draw a
+random number, and only for an encounter does it pick a species. Species
+are picked with Vose's alias method, which costs O(1) however long the
+table is.
+"""
+import random
+from collections import namedtuple
+
+Encounter = namedtuple("Encounter", "species level map")
+
+
+class AliasTable:
+    """O(1) sampling of index i with probability weights[i] / sum(weights)."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("empty table")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("weights must sum to more than 0")
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # leftovers are 1.0 up to rounding
+        self.n = n
+
+    def sample(self, u):
+        """Index for one uniform u in [0, 1): the column, then the coin, from one draw."""
+        x = u * self.n
+        i = int(x)
+        return i if x - i < self.prob[i] else self.alias[i]
+
+
+class EncounterTable:
+    def __init__(self, entries):
+        # entries: (species, weight, min level, max level)
+        self.species = [e[0] for e in entries]
+        self.min_level = [e[2] for e in entries]
+        self.level_span = [e[3] - e[2] + 1 for e in entries]
+        self.alias = AliasTable([e[1] for e in entries])
+
+    def roll(self, rng):
+        i = self.alias.sample(rng.random())
+        return self.species[i], self.min_level[i] + int(rng.random() * self.level_span[i])
+
+
+def parse_table(text):
+    """'pidgey:50:2-5, rattata:50:3' → EncounterTable, or None if nothing is valid."""
+    entries = []
+    for item in str(text).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            species, weight, levels = item.split(":")
+            lo, _, hi = levels.partition("-")
+            lo = int(lo)
+            hi = int(hi) if hi else lo
+            weight = float(weight)
+        except ValueError:
+            print("encounters: bad table entry", repr(item))
+            continue
+        if weight > 0 and hi >= lo:
+            entries.append((species.strip(), weight, lo, hi))
+    return EncounterTable(entries) if entries else None
+
+
+class EncounterSystem:
+    def __init__(self, map_manager, seed=None):
+        self.map_manager = map_manager
+        self.rng = random.Random(seed)
+        self.enabled = True
+        self._tables = {}     # table text → EncounterTable (shared by maps)
+        self._zones = {}      # map name → (TileMap, [(rate, EncounterTable)] by zone index)
+
+    def seed(self, seed):
+        self.rng.seed(seed)
+
+    def _zones_of(self, name, tm):
+        cached = self._zones.get(name)
+        if cached is not None and cached[0] is tm:
+            return cached[1]
+        zones = [None]
+        for rate, text in tm.encounter_tables:
+            table = self._tables.get(text)
+            if table is None:
+                table = self._tables[text] = parse_table(text)
+            zones.append((rate, table) if table is not None else None)
+        self._zones[name] = (tm, zones)
+        return zones
+
+    def check(self, wtx, wty):
+        """Roll for an encounter after a completed step onto world tile (wtx, wty)."""
+        if not self.enabled:
+            return None
+        hit = self.map_manager.locate_tile(wtx, wty)
+        if hit is None:
+            return None
+        inst, cx, cy = hit
+        zone = inst.map.encounter_zone[cy, cx]
+        if not zone:
+            return None
+        entry = self._zones_of(inst.name, inst.map)[zone]
+        if entry is None or self.rng.random() >= entry[0]:
+            return None
+        species, level = entry[1].roll(self.rng)
+        return Encounter(species, level, inst.name)
@@ -0,0 +1,354 @@
+# entities.py
+"""
+NPCs for the loaded maps, kept as struct-of-arrays NumPy buffers so a
+map can hold hundreds of them.
+
+Per-entity state (tile, previous tile, facing, movement timer, idle
+timer, behaviour, sprite row) lives in flat arrays indexed by entity id.
+Movement interpolation and timers are updated for all entities at once
+each tick; only entities that are due to act run Python code.
+
+Spawns come from a "npcs" object layer in the Tiled maps (see
+TileMap.npcs) and follow map streaming: NPCs appear when their map is
+loaded and are dropped when it is unloaded.
+
+Occupied tiles are tracked in MapManager.occupancy, which
+MapManager.can_step checks, so the player and NPCs block each other
+through the same collision test.
+"""
+import random
+
+import numpy as np
+import pygame
+
+from settings import TILESIZE, NPC_IMAGE, NPC_MOVE_TIME, NPC_IDLE_TIME
+from utils import resource_path
+
+# npc.png: 16x24 frames on a 17x25 grid starting at (9, 42), one
+# character per row. Rows hold 3 walk frames per facing (down, up, left,
+# right), a few only 1 frame per facing. Orange is the background.
+SHEET_ORIGIN = (9, 42)
+SHEET_PITCH = (17, 25)
+SHEET_FRAME = (16, 24)
+SHEET_BG = (255, 127, 39)
+
+NPC_WIDTH = TILESIZE
+NPC_HEIGHT = int(TILESIZE * 1.5)
+NPC_HEAD_OFFSET = NPC_HEIGHT - TILESIZE
+
+FACINGS = ("down", "up", "left", "right")
+FACING_DELTA = ((0, 1), (0, -1), (-1, 0), (1, 0))
+OPPOSITE = (1, 0, 3, 2)
+
+STAND, LOOK, WANDER = 0, 1, 2
+BEHAVIOURS = {"stand": STAND, "look": LOOK, "wander": WANDER}
+
+
+# --------------------------------------------------------
+# Shared sprite frames
+# --------------------------------------------------------
+class SpriteBank:
+    """Scaled NPC frames, cut once per sheet row and shared by every entity."""
+
+    def __init__(self, path=NPC_IMAGE):
+        try:
+            self.sheet = pygame.image.load(resource_path(path)).convert()
+        except Exception as e:
+            print("entities: could not load", path, e)
+            self.sheet = None
+        self.rows = {}   # row → [facing][anim frame] surfaces
+
+    def row_count(self):
+        if self.sheet is None:
+            return 0
+        return (self.sheet.get_height() - SHEET_ORIGIN[1]) // SHEET_PITCH[1]
+
+    def _cell(self, row, col):
+        return pygame.Rect(
+            SHEET_ORIGIN[0] + col * SHEET_PITCH[0],
+            SHEET_ORIGIN[1] + row * SHEET_PITCH[1],
+            *SHEET_FRAME
+        )
+
+    def _frame(self, rect):
+        surf = self.sheet.subsurface(rect).copy()
+        surf.set_colorkey(SHEET_BG)
+        surf = pygame.transform.scale(surf, (NPC_WIDTH, NPC_HEIGHT))
+        return surf.convert_alpha() if pygame.display.get_surface() else surf
+
+    def frames(self, row):
+        cached = self.rows.get(row)
+        if cached is not None:
+            return cached
+
+        if self.sheet is None or not 0 <= row < self.row_count():
+            placeholder = pygame.Surface((NPC_WIDTH, NPC_HEIGHT), pygame.SRCALPHA)
+            placeholder.fill((200, 60, 200))
+            frames = [[placeholder] for _ in FACINGS]
+            self.rows[row] = frames
+            return frames
+
+        # count filled cells in this row (background-coloured corner)
+        cols = 0
+        sheet_w = self.sheet.get_width()
+        while True:
+            rect = self._cell(row, cols)
+            if rect.right > sheet_w or tuple(self.sheet.get_at(rect.topleft)[:3]) != SHEET_BG:
+                break
+            cols += 1
+
+        per_facing = 3 if cols >= 12 else 1
+        if cols < 4:
+            frames = self.frames(-1)
+        else:
+            frames = [
+                [self._frame(self._cell(row, f * per_facing + a)) for a in range(per_facing)]
+                for f in range(len(FACINGS))
+            ]
+        self.rows[row] = frames
+        return frames
+
+
+# --------------------------------------------------------
+# Entity store
+# --------------------------------------------------------
+class EntityManager:
+    def __init__(self, map_manager, capacity=64, seed=None):
+        self.map_manager = map_manager
+        self.occupancy = map_manager.occupancy
+        self.sprites = SpriteBank()
+        self.rng = random.Random(seed)
+
+        self.count = 0              # high-water mark of used ids
+        self.free = []              # recycled ids
+        self.texts = []             # id → dialogue text (Python objects stay out of the arrays)
+        self.by_map = {}            # map name → [ids]
+        self._loaded = {}           # map name → id(TileMap) the NPCs were spawned from
+
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        def grow(old, shape, dtype):
+            new = np.zeros(shape, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            return new
+
+        get = lambda name: getattr(self, name, None)
+        self.alive = grow(get("alive"), capacity, bool)
+        self.tile = grow(get("tile"), (capacity, 2), np.int32)
+        self.prev = grow(get("prev"), (capacity, 2), np.int32)
+        self.home = grow(get("home"), (capacity, 2), np.int32)
+        self.radius = grow(get("radius"), capacity, np.int16)
+        self.facing = grow(get("facing"), capacity, np.uint8)
+        self.behaviour = grow(get("behaviour"), capacity, np.uint8)
+        self.sprite = grow(get("sprite"), capacity, np.int16)
+        self.moving = grow(get("moving"), capacity, bool)
+        self.move_t = grow(get("move_t"), capacity, np.float32)
+        self.idle = grow(get("idle"), capacity, np.float32)
+        self.pixel = grow(get("pixel"), (capacity, 2), np.float32)
+        self.capacity = capacity
+
+    # --------------------------------------------------------
+    # Spawning
+    # --------------------------------------------------------
+    def spawn(self, tx, ty, sprite=0, facing=0, behaviour=STAND, radius=3, text="", owner=None):
+        """
+        Add an NPC on world tile (tx, ty). Returns its id, or None if the
+        tile is taken. NPCs with an owner map are removed with that map.
+        """
+        if (tx, ty) in self.occupancy:
+            return None
+
+        if self.free:
+            i = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self._alloc(self.capacity * 2)
+            i = self.count
+            self.count += 1
+            self.texts.append("")
+
+        self.alive[i] = True
+        self.tile[i] = self.prev[i] = self.home[i] = (tx, ty)
+        self.pixel[i] = (tx * TILESIZE, ty * TILESIZE)
+        self.radius[i] = radius
+        self.facing[i] = facing
+        self.behaviour[i] = behaviour
+        self.sprite[i] = sprite
+        self.moving[i] = False
+        self.move_t[i] = 0
+        self.idle[i] = self.rng.uniform(*NPC_IDLE_TIME)
+        self.texts[i] = text
+        self.occupancy[(tx, ty)] = i
+        self.sprites.frames(sprite)
+        if owner is not None:
+            self.by_map.setdefault(owner, []).append(i)
+        return i
+
+    def despawn(self, i):
+        if not self.alive[i]:
+            return
+        for key in (tuple(self.tile[i].tolist()), tuple(self.prev[i].tolist())):
+            if self.occupancy.get(key) == i:
+                del self.occupancy[key]
+        self.alive[i] = False
+        self.moving[i] = False
+        self.texts[i] = ""
+        self.free.append(i)
+
+    def _spawn_map(self, name, inst):
+        for npc in inst.map.npcs:
+            facing = FACINGS.index(npc["facing"]) if npc["facing"] in FACINGS else 0
+            self.spawn(
+                inst.world_x + npc["x"], inst.world_y + npc["y"],
+                sprite=npc["sprite"], facing=facing,
+                behaviour=BEHAVIOURS.get(npc["behaviour"], STAND),
+                radius=npc["radius"], text=npc["text"], owner=name
+            )
+
+    def sync(self):
+        """Spawn NPCs of newly loaded maps, drop those of unloaded / reloaded ones."""
+        instances = self.map_manager.instances
+        for name in list(self._loaded):
+            inst = instances.get(name)
+            if inst is None or id(inst.map) != self._loaded[name]:
+                for i in self.by_map.pop(name, []):
+                    self.despawn(i)
+                del self._loaded[name]
+
+        for name, inst in instances.items():
+            if name not in self._loaded:
+                self._loaded[name] = id(inst.map)
+                self._spawn_map(name, inst)
+
+    def clear(self):
+        for name in list(self.by_map):
+            for i in self.by_map.pop(name):
+                self.despawn(i)
+        self._loaded.clear()
+
+    # --------------------------------------------------------
+    # Update
+    # --------------------------------------------------------
+    def update(self, dt, player_tile=None):
+        self.sync()
+        n = self.count
+        if not n:
+            return
+
+        alive = self.alive[:n]
+        moving = self.moving[:n]
+        move_t = self.move_t[:n]
+
+        # finish steps
+        move_t[moving] += dt
+        done = np.nonzero(moving & (move_t >= NPC_MOVE_TIME))[0]
+        for i in done.tolist():
+            key = tuple(self.prev[i].tolist())
+            if self.occupancy.get(key) == i:
+                del self.occupancy[key]
+            self.prev[i] = self.tile[i]
+        moving[done] = False
+
+        # idle timers; only NPCs that are due run per-entity logic
+        idle = self.idle[:n]
+        waiting = alive & ~moving & (self.behaviour[:n] != STAND)
+        idle[waiting] -= dt
+        for i in np.nonzero(waiting & (idle <= 0))[0].tolist():
+            self._act(i, player_tile)
+            idle[i] = self.rng.uniform(*NPC_IDLE_TIME)
+
+        # batched interpolation: pixel = prev + (tile - prev) * t
+        t = np.where(moving, np.minimum(move_t / NPC_MOVE_TIME, 1.0), 1.0)[:, None]
+        prev = self.prev[:n]
+        self.pixel[:n] = (prev + (self.tile[:n] - prev) * t) * TILESIZE
+
+    def _act(self, i, player_tile):
+        d = self.rng.randrange(4)
+        self.facing[i] = d
+        if self.behaviour[i] != WANDER:
+            return
+
+        dx, dy = FACING_DELTA[d]
+        tx, ty = int(self.tile[i, 0]) + dx, int(self.tile[i, 1]) + dy
+        hx, hy = self.home[i].tolist()
+        r = int(self.radius[i])
+        if abs(tx - hx) > r or abs(ty - hy) > r:
+            return
+        if player_tile is not None and (tx, ty) == tuple(player_tile):
+            return
+        mm = self.map_manager
+        if mm.locate_tile(tx, ty) is None or not mm.can_step(tx, ty, dx, dy) or mm.warp_at(tx, ty):
+            return
+
+        self.occupancy[(tx, ty)] = i
+        self.prev[i] = self.tile[i]
+        self.tile[i] = (tx, ty)
+        self.moving[i] = True
+        self.move_t[i] = 0
+
+    # --------------------------------------------------------
+    # Interaction
+    # --------------------------------------------------------
+    def npc_at(self, tx, ty):
+        return self.occupancy.get((tx, ty))
+
+    def talk(self, tx, ty, from_facing):
+        """Dialogue of the NPC on (tx, ty), turning it towards the speaker."""
+        i = self.npc_at(tx, ty)
+        if i is None or not self.texts[i]:
+            return None
+        self.facing[i] = OPPOSITE[FACINGS.index(from_facing)]
+        self.idle[i] = max(float(self.idle[i]), NPC_IDLE_TIME[1])
+        return self.texts[i]
+
+    # --------------------------------------------------------
+    # Draw
+    # --------------------------------------------------------
+    def draw(self, surface, camera, min_y=None, max_y=None):
+        """
+        Blit visible NPCs sorted by y. min_y / max_y (world pixels) pick
+        the ones in front of / behind something drawn in between (the player).
+        """
+        n = self.count
+        if not n:
+            return
+        px = self.pixel[:n, 0]
+        py = self.pixel[:n, 1]
+        vis = self.alive[:n] & (px > camera.x - NPC_WIDTH) & (px < camera.x + camera.w) & \
+            (py > camera.y - TILESIZE) & (py < camera.y + camera.h + NPC_HEAD_OFFSET)
+        if min_y is not None:
+            vis &= py >= min_y
+        if max_y is not None:
+            vis &= py < max_y
+        ids = np.nonzero(vis)[0]
+        if not len(ids):
+            return
+        ids = ids[np.argsort(py[ids], kind="stable")]
+
+        sx = (px[ids] - camera.x).astype(np.int32).tolist()
+        sy = (py[ids] - camera.y - NPC_HEAD_OFFSET).astype(np.int32).tolist()
+        moving = self.moving[ids].tolist()
+        phase = (self.move_t[ids] < NPC_MOVE_TIME * 0.5).tolist()
+        step = (self.tile[ids, 0] + self.tile[ids, 1]).tolist()
+        facing = self.facing[ids].tolist()
+        sprite = self.sprite[ids].tolist()
+        frames = self.sprites.frames
+
+        seq = []
+        for k in range(len(facing)):
+            anim = frames(sprite[k])[facing[k]]
+            f = 0
+            if moving[k] and phase[k] and len(anim) > 1:
+                f = 1 + (step[k] & 1)
+            seq.append((anim[f], (sx[k], sy[k])))
+        surface.blits(seq, False)
+
+    def nbytes(self):
+        return sum(
+            a.nbytes for a in (
+                self.alive, self.tile, self.prev, self.home, self.radius, self.facing,
+                self.behaviour, self.sprite, self.moving, self.move_t, self.idle, self.pixel
+            )
+        )
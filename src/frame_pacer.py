@@ -0,0 +1,240 @@
+# frame_pacer.py
+"""
+Frame pacing for Game.run, in place of pygame.time.Clock.
+
+Modes (FRAME_PACING, or POKEMON_PACING in the environment):
+
+  precise    FPS on a fixed deadline schedule: sleep until PACER_SPIN
+             before the deadline, then spin on perf_counter. Clock.tick
+             sleeps with SDL_Delay only, which is ms-granular and often
+             overshoots by a few ms.
+  vsync      the window is opened with vsync=1 and flip() does the
+             waiting. If the driver ignores vsync (flips come back far
+             faster than the refresh rate) it falls back to precise pacing
+             at the refresh rate.
+  powersave  POWERSAVE_FPS, plain sleeps, no spinning.
+
+Whatever the mode, window events throttle the loop: BACKGROUND_FPS while
+unfocused, HIDDEN_FPS with rendering paused while minimized or hidden, and
+POWERSAVE_FPS after IDLE_TIMEOUT seconds without input. Throttled frames
+only sleep. The simulation keeps running: dt is clamped to MAX_FRAME_DT
+and steps() splits it into updates of at most MAX_SIM_STEP, so a 4 fps
+minimized window advances the world just as a 60 fps one would.
+"""
+import math
+import time
+from collections import deque
+
+import pygame
+
+from settings import FPS, FRAME_PACING, POWERSAVE_FPS, BACKGROUND_FPS, HIDDEN_FPS
+from settings import IDLE_TIMEOUT, MAX_FRAME_DT, MAX_SIM_STEP, PACER_SPIN
+
+MODES = ("precise", "vsync", "powersave")
+
+_INPUT_EVENTS = {pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION, pygame.FINGERDOWN}
+_HIDE_EVENTS = {pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN}
+_SHOW_EVENTS = {pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWMAXIMIZED, pygame.WINDOWEXPOSED}
+
+# frames measured before deciding whether vsync actually blocks
+_VSYNC_PROBE = 30
+
+
+class FrameStats:
+    """Frame intervals of the last `window` foreground frames."""
+
+    def __init__(self, window=240):
+        self.intervals = deque(maxlen=window)
+        self.period = 1.0 / FPS
+        self.late = 0            # frames over 1.5 periods since start
+
+    def add(self, interval, period):
+        self.period = period
+        self.intervals.append(interval)
+        if interval > period * 1.5:
+            self.late += 1
+
+    def mean(self):
+        return sum(self.intervals) / len(self.intervals) if self.intervals else 0.0
+
+    def jitter(self):
+        """Standard deviation of the frame interval (s)."""
+        n = len(self.intervals)
+        if n < 2:
+            return 0.0
+        mean = self.mean()
+        return math.sqrt(sum((x - mean) ** 2 for x in self.intervals) / (n - 1))
+
+    def p99_error(self):
+        """99th percentile of |interval - target period| (s)."""
+        if not self.intervals:
+            return 0.0
+        errors = sorted(abs(x - self.period) for x in self.intervals)
+        return errors[min(len(errors) - 1, int(0.99 * len(errors)))]
+
+
+class FramePacer:
+    def __init__(self, mode=FRAME_PACING, fps=FPS):
+        if mode not in MODES:
+            print("frame pacer: unknown mode", mode, "- using precise")
+            mode = "precise"
+        self.mode = mode
+        self.fps = fps
+        self.refresh_rate = fps
+        self.vsync = False           # window opened with vsync and flips block
+        self.focused = True
+        self.hidden = False
+        self.stats = FrameStats()
+
+        now = time.perf_counter()
+        self.last_input = now
+        self._last = None            # perf_counter at the end of the last tick
+        self._deadline = now
+        self._probe = []
+        self._prev_state = None
+
+    # --------------------------------------------------------
+    # Window
+    # --------------------------------------------------------
+    def open_window(self, size, flags=0):
+        """pygame.display.set_mode, with vsync in vsync mode when the driver allows it."""
+        if self.mode == "vsync":
+            rates = getattr(pygame.display, "get_desktop_refresh_rates", None)
+            if rates is not None:
+                try:
+                    self.refresh_rate = rates()[0] or self.fps
+                except (pygame.error, IndexError):
+                    pass
+            try:
+                window = pygame.display.set_mode(size, flags, vsync=1)
+                self.vsync = True
+                return window
+            except pygame.error as e:
+                print("frame pacer: no vsync,", e)
+        return pygame.display.set_mode(size, flags)
+
+    def observe(self, events):
+        """Track focus, visibility and input from this frame's events."""
+        for e in events:
+            if e.type in _INPUT_EVENTS:
+                self.last_input = time.perf_counter()
+            elif e.type == pygame.WINDOWFOCUSLOST:
+                self.focused = False
+            elif e.type == pygame.WINDOWFOCUSGAINED:
+                self.focused = True
+                self.last_input = time.perf_counter()
+            elif e.type in _HIDE_EVENTS:
+                self.hidden = True
+            elif e.type in _SHOW_EVENTS:
+                self.hidden = False
+
+    # --------------------------------------------------------
+    # State
+    # --------------------------------------------------------
+    @property
+    def should_render(self):
+        return not self.hidden
+
+    @property
+    def idle(self):
+        return IDLE_TIMEOUT > 0 and time.perf_counter() - self.last_input > IDLE_TIMEOUT
+
+    @property
+    def state(self):
+        """"hidden", "background", "idle" or the mode."""
+        if self.hidden:
+            return "hidden"
+        if not self.focused:
+            return "background"
+        if self.idle:
+            return "idle"
+        return self.mode
+
+    @property
+    def target_fps(self):
+        state = self.state
+        if state == "hidden":
+            return HIDDEN_FPS
+        if state == "background":
+            return BACKGROUND_FPS
+        if state in ("idle", "powersave"):
+            return min(POWERSAVE_FPS, self.fps)
+        if state == "vsync":
+            return self.refresh_rate
+        return self.fps
+
+    # --------------------------------------------------------
+    # Pacing
+    # --------------------------------------------------------
+    def tick(self):
+        """Wait for the next frame; returns dt in seconds (clamped to MAX_FRAME_DT)."""
+        state = self.state
+        period = 1.0 / self.target_fps
+        now = time.perf_counter()
+        if self._last is None:
+            self._last = self._deadline = now
+            return 0.0
+
+        if state == "vsync" and self.vsync:
+            deadline = now            # flip() already waited for the refresh
+        else:
+            deadline = self._deadline + period
+            if now > deadline:
+                deadline = now        # missed it: start over from now instead of rushing a short frame
+            self._wait(deadline, spin=state in ("precise", "vsync"))
+        self._deadline = deadline
+
+        t = time.perf_counter()
+        interval = t - self._last
+        self._last = t
+        changed, self._prev_state = state != self._prev_state, state
+        # jitter figures cover foreground frames only
+        if state in MODES and not changed:
+            self.stats.add(interval, period)
+        if state == "vsync" and self.vsync:
+            self._check_vsync(interval, period)
+        return min(interval, MAX_FRAME_DT)
+
+    @staticmethod
+    def _wait(deadline, spin):
+        remaining = deadline - time.perf_counter()
+        if not spin:
+            if remaining > 0:
+                time.sleep(remaining)
+            return
+        if remaining > PACER_SPIN:
+            time.sleep(remaining - PACER_SPIN)
+        while time.perf_counter() < deadline:
+            pass
+
+    def _check_vsync(self, interval, period):
+        if self._probe is None:
+            return
+        self._probe.append(interval)
+        if len(self._probe) < _VSYNC_PROBE:
+            return
+        median = sorted(self._probe)[len(self._probe) // 2]
+        self._probe = None
+        if median < period * 0.75:
+            print(f"frame pacer: vsync not honoured ({1 / max(median, 1e-6):.0f} fps), pacing with the timer")
+            self.vsync = False
+            self._deadline = time.perf_counter()
+            self.stats.intervals.clear()
+
+    @staticmethod
+    def steps(dt):
+        """dt split into equal simulation steps of at most MAX_SIM_STEP."""
+        n = max(1, math.ceil(dt / MAX_SIM_STEP - 1e-9))
+        return [dt / n] * n
+
+    # --------------------------------------------------------
+    # Reporting
+    # --------------------------------------------------------
+    def get_fps(self):
+        mean = self.stats.mean()
+        return 1.0 / mean if mean > 0 else 0.0
+
+    def summary(self):
+        s = self.stats
+        return (f"pace {self.state} {self.target_fps:.0f}  dt {s.mean() * 1000:.1f}"
+                f"±{s.jitter() * 1000:.2f} ms  p99 err {s.p99_error() * 1000:.2f}  late {s.late}")
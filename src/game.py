@@ -1,15 +1,30 @@
 # game.py
 import pygame
 from datetime import datetime
-from settings import MAP_PATH, TILESIZE, MAPS_FOLDER
+from settings import MAP_PATH, TILESIZE, MAPS_FOLDER, DEV_MODE
+from settings import WORLD_ROOT, START_MAP, START_TILE_X, START_TILE_Y, NET_SERVER
+from settings import PROFILE_FRAMES, PROFILE_ON_START, INPUT_LATENCY_REPORT, SIGN_TEXT_CPS
+from settings import AUTOSAVE, SAVE_LOAD_ON_START
 from tilemap import TileMap
 from player import Player
 from camera import Camera
 from virtual_controls import VirtualControls
 from world_manager import MapManager
-from map_connections import REGION_CONNECTIONS
+from navigation import NavGraph
+from entities import EntityManager, FACINGS, FACING_DELTA
+from instrumentation import DebugHUD, InputLatency
+from hot_reload import MapWatcher
+from net_client import NetClient
+from encounters import EncounterSystem
+from particles import WeatherSystem
+from minimap import Minimap
+from profiler import Profiler
+from frame_pacer import FramePacer
+from text_layout import LayoutCache, Typewriter
+import save_system
 from utils import resource_path
 import os
+import time
 import numpy as np
 
 GAME_TILES_W = 16
@@ -37,11 +52,38 @@ def lerp_color(a, b, t):
         int(a[2] + (b[2] - a[2]) * t)
     )
 
+def lighting_at(m):
+    """(phase name, overlay tint, overlay alpha) at m minutes past midnight."""
+    if SUNRISE_START <= m < SUNRISE_END:
+        t = (m - SUNRISE_START)/5
+        return "sunrise", lerp_color(LIGHT_NIGHT, LIGHT_MORNING, t), int(200*(1-t))
+    elif SUNRISE_END <= m < SUNSET_START:
+        return "day", LIGHT_DAY, 0
+    elif SUNSET_START <= m < SUNSET_END:
+        t = (m - SUNSET_START)/5
+        return "sunset", lerp_color(LIGHT_DAY, LIGHT_EVENING, t), int(80*t)
+    elif SUNSET_END <= m < NIGHT_START:
+        return "evening", LIGHT_EVENING, 80
+    elif NIGHT_START <= m < NIGHT_END:
+        t = (m - NIGHT_START)/5
+        return "dusk", lerp_color(LIGHT_EVENING, LIGHT_NIGHT, t), int(200*t)
+    else:
+        return "night", LIGHT_NIGHT, 200
+
+# event type → input kind for the latency histogram
+_INPUT_KINDS = {
+    pygame.KEYDOWN: "key",
+    pygame.MOUSEBUTTONDOWN: "mouse",
+    pygame.FINGERDOWN: "touch",
+}
+
+
 class Game:
     def __init__(self):
         pygame.init()
 
-        self.window = pygame.display.set_mode((1280, 720), pygame.RESIZABLE)
+        self.pacer = FramePacer()
+        self.window = self.pacer.open_window((1280, 720), pygame.RESIZABLE)
         self.game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
 
         # ---------------------------------------------------
@@ -53,27 +95,15 @@ class Game:
         self.dt = 0.0                       # last frame dt
         self.region_popup_y = -100  # start above the window
 
-        # ---------------------------------------------------
-        # START/ROOT MAP CONFIG
-        # ---------------------------------------------------
-        # The stitched overworld root (maps that form the world)
-        WORLD_ROOT = "pallet_town"
-
-        # The map we want to start in (standalone interior)
-        START_MAP = "pallet_house1_f2"
-        START_TILE_X = 9
-        START_TILE_Y = 10
-
         # Save the world root so we can rebuild stitched world when needed
         self.world_root = WORLD_ROOT
 
         # ---------------------------------------------------
-        # Build the overworld (so we know world offsets), then
-        # immediately load the starting interior as a single map.
+        # World offsets/adjacency come from the map manifest, so only
+        # the starting interior needs loading here. The overworld is
+        # built on the first warp into it.
         # ---------------------------------------------------
         self.map_manager = MapManager(maps_folder=MAPS_FOLDER)
-        # Build overworld now (does not affect player placement)
-        self.map_manager.build_world(WORLD_ROOT, load_connected=True)
 
         self.camera = Camera(GAME_WIDTH, GAME_HEIGHT)
         self.controls = VirtualControls()
@@ -110,16 +140,66 @@ class Game:
         except Exception:
             self.signbox_font = pygame.font.SysFont("Courier", 20, bold=True)
 
-        self.clock = pygame.time.Clock()
+        # sign text: wrapped/paginated once per text, pages rendered once
+        self.text_layouts = LayoutCache()
+        self.signbox_layout = None
+        self.signbox_typer = None
+        self._signbox_bg = None
+        self._signbox_arrow = None
+
+        self.hud = DebugHUD()
+
+        # NPCs of the loaded maps
+        self.entities = EntityManager(self.map_manager)
+
+        # pathfinding over the loaded world (click-to-move)
+        self.nav = NavGraph(self.map_manager)
+
+        # wild encounters in tall grass, rolled when a step completes
+        self.encounters = EncounterSystem(self.map_manager)
+        self.pending_encounter = None
+        self.player.on_step_done = self.roll_encounter
+
+        # rain / leaves / snow of the current map ("weather" property)
+        self.weather = WeatherSystem(GAME_WIDTH, GAME_HEIGHT)
+
+        # world overview (M), rendered in the background from the overworld maps
+        self.minimap = Minimap(self.map_manager, self.world_root)
+
+        # dev mode: reload maps edited in Tiled without restarting
+        self.map_watcher = None
+        if DEV_MODE:
+            self.map_watcher = MapWatcher(maps_folder=MAPS_FOLDER)
+            self.map_watcher.start()
+
+        # multiplayer client mode: the server decides where we spawn
+        self.net = None
+        if NET_SERVER:
+            self.connect(NET_SERVER)
+
         self.running = True
 
+        # the one event pump per frame (handle_events) fills these
+        self.events = []
+        self.input_latency = InputLatency()
+
+        # F9 / F10 profiling, tagged with region + time of day
+        self.profiler = Profiler()
+        self.profiler.start_from_env(PROFILE_ON_START, self.profile_tags())
+
+        # story / event flags (name → bool, int, float or str), saved with the game
+        self.flags = {}
+        self.saves = save_system.SaveSystem()
+        if SAVE_LOAD_ON_START:
+            self.load_game()
+
     # ---------------------------------------------------
     # Signbox helpers
     # ---------------------------------------------------
     def open_signbox(self, text: str):
         """
         Wrap text while respecting explicit '\n'.
-        Groups into pages of 2 lines each.
+        Groups into pages of 2 lines each (laid out once per text, see text_layout).
         """
         if not text:
             return
@@ -128,46 +208,12 @@ class Game:
         box_width = GAME_WIDTH - 40
         text_width = box_width - box_padding * 2
 
-        font = self.signbox_font
+        layout = self.text_layouts.get(text, self.signbox_font, text_width, 2,
+                                       line_height=28, background=(255,255,255))
 
-        lines = []
-
-        # ---------------------------------
-        # 1) Split on explicit newlines FIRST
-        # ---------------------------------
-        raw_lines = text.split("\n")
-
-        for raw in raw_lines:
-            words = raw.split(" ")
-            current = ""
-
-            for w in words:
-                if current == "":
-                    trial = w
-                else:
-                    trial = current + " " + w
-
-                if font.size(trial)[0] <= text_width:
-                    current = trial
-                else:
-                    if current:
-                        lines.append(current)
-                    current = w
-
-            # push leftover (even if empty → blank line)
-            lines.append(current)
-
-        # ---------------------------------
-        # 2) Group into pages of 2 lines
-        # ---------------------------------
-        pages = []
-        for i in range(0, len(lines), 2):
-            pages.append(lines[i:i + 2])
-
-        if not pages:
-            pages = [[""]]
-
-        self.signbox_pages = pages
+        self.signbox_layout = layout
+        self.signbox_typer = Typewriter(layout, SIGN_TEXT_CPS)
+        self.signbox_pages = layout.pages
         self.signbox_page_index = 0
         self.signbox_active = True
         self.signbox_cooldown = True  # prevent immediate re-open
@@ -183,6 +229,7 @@ class Game:
         idx = self.signbox_page_index
         self.signbox_current_lines = self.signbox_pages[idx] if idx < len(self.signbox_pages) else [""]
         self.signbox_has_more = (idx < len(self.signbox_pages) - 1)
+        self.signbox_typer.set_page(min(idx, len(self.signbox_pages) - 1))
 
     # ---------------------------------------------------
     # Warp executor (unchanged semantics)
@@ -194,66 +241,40 @@ class Game:
           - dest_x (int tile)
           - dest_y (int tile)
         """
-        dest_map = warp.get("dest_map")
-        # Ensure numeric dests
-        try:
-            dest_x = int(warp.get("dest_x", 0))
-            dest_y = int(warp.get("dest_y", 0))
-        except Exception:
-            dest_x = 0
-            dest_y = 0
-
-        # ------------------------------
-        # OVERWORLD CASE: dest_map is part of REGION_CONNECTIONS keys
-        # ------------------------------
-        if dest_map in REGION_CONNECTIONS.keys():
-            # Ensure stitched world is available: rebuild from WORLD_ROOT if needed.
-            # NOTE: do NOT use dest_map as root here — use self.world_root that
-            # represents the real overworld root (pallet_town etc).
-            if dest_map not in self.map_manager.instances:
-                self.map_manager.build_world(self.world_root, load_connected=True)
-
-            # If still missing, abort
-            if dest_map not in self.map_manager.instances:
-                return
-
-            inst = self.map_manager.instances[dest_map]
-
-            # Compute world pixel coordinates using map instance offsets
-            world_px = inst.pixel_x + dest_x * TILESIZE
-            world_py = inst.pixel_y + dest_y * TILESIZE
-
-            # Place player in world coords
-            self.player.rect.x = world_px
-            self.player.rect.y = world_py
-            # Set tile_x/tile_y to WORLD tile coordinates (not map-local!)
-            self.player.tile_x = world_px // TILESIZE
-            self.player.tile_y = world_py // TILESIZE
-
-            # Update region and debug
-            self.current_region = dest_map
-
-        # ------------------------------
-        # INTERIOR CASE: dest_map is not in overworld graph → load as single
-        # ------------------------------
-        else:
-            self.map_manager.load_single_map(dest_map)
-
-            if dest_map not in self.map_manager.instances:
-                return
-
-            inst = self.map_manager.instances[dest_map]
-            world_px = inst.pixel_x + dest_x * TILESIZE
-            world_py = inst.pixel_y + dest_y * TILESIZE
-
-            # place player (inst.pixel_x normally 0 for single-map)
-            self.player.rect.x = world_px
-            self.player.rect.y = world_py
-            # Set tile_x/tile_y to WORLD tile coordinates (not map-local!)
-            self.player.tile_x = world_px // TILESIZE
-            self.player.tile_y = world_py // TILESIZE
-
-            self.current_region = dest_map
+        # loads the stitched overworld (rebuilt from world_root when needed)
+        # or the interior on its own; shared with headless.HeadlessEnv
+        dest = self.map_manager.resolve_warp(warp, self.world_root)
+        if dest is None:
+            return
+
+        self.place_player(dest, warp.get("dest_map"))
+        if AUTOSAVE:
+            self.save_game()
+
+    def save_game(self):
+        """Snapshot now (microseconds), write in the background."""
+        self.saves.save(save_system.capture(self))
+
+    def load_game(self):
+        if self.net is not None:
+            print("save: not loading while connected to a server")
+            return False
+        snap = self.saves.load()
+        if snap is None or not save_system.apply(self, snap):
+            return False
+        print("save: loaded", snap.map, (snap.tx, snap.ty))
+        return True
+
+    def place_player(self, dest, map_name):
+        """Put the player on world pixel position dest and re-centre the camera."""
+        # Place player in world coords; tile_x/tile_y are WORLD tiles
+        world_px, world_py = dest
+        self.player.rect.x = world_px
+        self.player.rect.y = world_py
+        self.player.tile_x = world_px // TILESIZE
+        self.player.tile_y = world_py // TILESIZE
+
+        self.current_region = map_name
 
         # Re-center camera with correct world bounds
         wl, wt, ww, wh = self.map_manager.get_world_bounds()
@@ -269,38 +290,160 @@ class Game:
         # Hide any popup and reset popup timer
         self.region_popup_timer = 0.0
 
+    def roll_encounter(self, tx, ty):
+        encounter = self.encounters.check(tx, ty)
+        if encounter is not None:
+            self.pending_encounter = encounter
+
+    def clock_minutes(self):
+        now = datetime.now()
+        return now.hour * 60 + now.minute
+
+    def time_of_day(self):
+        """Current lighting phase: sunrise / day / sunset / evening / dusk / night."""
+        return lighting_at(self.clock_minutes())[0]
+
+    def profile_tags(self):
+        return (self.current_region or "none", self.time_of_day())
+
+    # ---------------------------------------------------
+    # Multiplayer client
+    # ---------------------------------------------------
+    def connect(self, address):
+        try:
+            net = NetClient(address)
+            spawn = net.wait_welcome(sorted(self.map_manager.manifest.maps))
+        except (OSError, ValueError) as e:
+            print("net: can't join server", address, e)
+            return
+        if spawn is None:
+            return
+        self.net = net
+        self.player.on_step = net.send_move
+        map_name, x, y, facing = spawn
+        self.player.direction = FACINGS[facing]
+        self.player.image = self.player.frames[self.player.direction]
+        self.snap_player(map_name, x, y)
+
+    def snap_player(self, map_name, x, y):
+        """Move the player to the server's position (world tile x, y on map_name)."""
+        player = self.player
+        player.moving = False
+        player.pending_warp = None
+        player.path.clear()
+        if map_name in self.map_manager.instances:
+            self.place_player((x * TILESIZE, y * TILESIZE), map_name)
+            return
+        ox, oy = self.map_manager.manifest.world_offset(map_name)
+        dest = self.map_manager.enter_map(map_name, x - ox, y - oy, self.world_root)
+        if dest is not None:
+            self.place_player(dest, map_name)
+
+    def apply_acks(self):
+        # moves are predicted locally; a rejected one puts us back where
+        # the server has us (later acks then agree again)
+        for seq, ok, map_name, x, y in self.net.acks:
+            if not ok:
+                self.snap_player(map_name, x, y)
+        self.net.acks.clear()
+
     # ---------------------------------------------------
     # EVENT HANDLING
     # ---------------------------------------------------
     def handle_events(self):
-        for e in pygame.event.get():
+        """
+        The only pygame.event.get() of the frame. Quit and hotkeys are
+        handled here; update() hands the same list to VirtualControls.
+        """
+        self.events = pygame.event.get()
+        now = time.perf_counter()
+        self.pacer.observe(self.events)
+        for e in self.events:
+            kind = _INPUT_KINDS.get(e.type)
+            if kind is not None and not (kind == "mouse" and getattr(e, "touch", False)):
+                self.input_latency.input(now, kind)
             if e.type == pygame.QUIT:
                 self.running = False
             elif e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
                 self.running = False
-
-    def update(self, dt):
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+                self.hud.toggle()
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F5:
+                print("render backend:", self.map_manager.cycle_render_backend())
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_m:
+                self.minimap.toggle()
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F6:
+                self.save_game()
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F7:
+                self.load_game()
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F9:
+                self.profiler.toggle_sampling(self.profile_tags())
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F10:
+                self.profiler.capture_frames(PROFILE_FRAMES, self.profile_tags())
+            elif e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                self.click_to_move(e.pos)
+
+    def window_to_game(self, pos):
+        """Window pixel → game surface pixel, or None in the letterbox margins."""
+        scale, offset_x, offset_y, scaled_width, scaled_height = self._viewport()
+        x, y = pos[0] - offset_x, pos[1] - offset_y
+        if not (0 <= x < scaled_width and 0 <= y < scaled_height):
+            return None
+        return int(x / scale), int(y / scale)
+
+    def click_to_move(self, pos):
+        if self.signbox_active:
+            return
+        win_size = self.window.get_size()
+        if any(r.collidepoint(pos) for r in self.controls.get_buttons(win_size).values()):
+            return
+        gpos = self.window_to_game(pos)
+        if gpos is None:
+            return
+        goal = ((self.camera.x + gpos[0]) // TILESIZE, (self.camera.y + gpos[1]) // TILESIZE)
+        path = self.nav.find_path((self.player.tile_x, self.player.tile_y), goal)
+        self.player.follow_path(path)
+
+    def apply_hot_reload(self):
+        """Apply edits picked up by the map watcher; player and camera stay put."""
+        maps, tilesets = self.map_watcher.poll()
+        for file_name in tilesets:
+            self.map_manager.reload_tileset(file_name)
+        for name in maps:
+            changed = self.map_manager.reload_map(name)
+            if changed or name in self.map_manager.instances:
+                print("hot reload:", name, sorted(changed))
+
+    def update(self, dt, events=None):
+        """
+        One simulation step. events: what the controls see this step;
+        run() hands the frame's events to its first step only, so a key
+        press is not repeated in every catch-up step of a long frame.
+        """
         self.dt = dt
 
+        if self.map_watcher is not None:
+            self.apply_hot_reload()
+
+        if self.net is not None:
+            self.net.poll(dt)
+            self.apply_acks()
+
+        inst = self.map_manager.instances.get(self.current_region)
+        self.weather.follow(inst.map if inst is not None else None)
+        self.weather.update(dt)
+        self.minimap.update(self.current_region, (self.player.tile_x, self.player.tile_y))
+
         # --------------------
-        # EVENTS
+        # EVENTS (pumped once, in handle_events)
         # --------------------
-        events = pygame.event.get()
-        for e in events:
-            if e.type == pygame.QUIT:
-                self.running = False
-
-        win_w, win_h = self.window.get_size()
-        try:
-            self.controls.update(events, (win_w, win_h))
-        except TypeError:
-            self.controls.update(events)
+        self.controls.update(self.events if events is None else events, self.window.get_size())
 
         # --------------------
         # A BUTTON EDGE DETECT
         # --------------------
-        keys = pygame.key.get_pressed()
-        kb_A = keys[pygame.K_z] or keys[pygame.K_RETURN] or keys[pygame.K_SPACE]
+        key = self.controls.key_held
+        kb_A = key(pygame.K_z) or key(pygame.K_RETURN) or key(pygame.K_SPACE)
         ctrl_A = self.controls.actions.get("A", False)
 
         A_now = bool(kb_A or ctrl_A)
@@ -312,7 +455,10 @@ class Game:
         # SIGNBOX ACTIVE
         # -------------------------
         if self.signbox_active:
-            if A_pressed:
+            self.signbox_typer.update(dt)
+            if A_pressed and not self.signbox_typer.page_done:
+                self.signbox_typer.skip()
+            elif A_pressed:
                 if self.signbox_has_more:
                     self.signbox_page_index += 1
                     self._update_signbox_page()
@@ -325,6 +471,11 @@ class Game:
         # -------------------------
         if A_pressed:
             sign_text = self.player.check_sign_ahead()
+            if not sign_text:
+                dx, dy = FACING_DELTA[FACINGS.index(self.player.direction)]
+                sign_text = self.entities.talk(
+                    self.player.tile_x + dx, self.player.tile_y + dy, self.player.direction
+                )
             if sign_text:
                 self.open_signbox(sign_text)
                 return  # consume input
@@ -332,6 +483,7 @@ class Game:
         # -------------------------
         # NORMAL GAMEPLAY
         # -------------------------
+        self.entities.update(dt, (self.player.tile_x, self.player.tile_y))
         self.player.update(dt, self.controls)
 
         if getattr(self.player, "pending_warp", None):
@@ -339,6 +491,13 @@ class Game:
             self.player.pending_warp = None
             return
 
+        if self.pending_encounter is not None:
+            # no battle screen yet: announce it and stop walking
+            encounter = self.pending_encounter
+            self.pending_encounter = None
+            self.player.path.clear()
+            self.open_signbox(f"A wild {encounter.species.upper()} appeared! (Lv. {encounter.level})")
+
         # -------------------------
         # REGION POPUP
         # -------------------------
@@ -352,6 +511,8 @@ class Game:
             self.current_region = new_region
             self.region_popup_text = new_region.replace("_", " ").upper()
             self.region_popup_timer = 2.0
+            if AUTOSAVE:
+                self.save_game()
 
         if self.region_popup_timer > 0:
             self.region_popup_timer = max(0.0, self.region_popup_timer - dt)
@@ -362,6 +523,11 @@ class Game:
         wl, wt, ww, wh = self.map_manager.get_world_bounds()
         self.camera.update(self.player.rect, wl, wt, ww, wh)
 
+        # load/unload overworld maps around the camera
+        self.map_manager.update_streaming(self.camera)
+
+        self.hud.update(dt, self)
+
 
 
     # -------------------------
@@ -374,35 +540,22 @@ class Game:
         # Draw world layers
         layer_order = ["floor", "grass", "grass2", "walls"]
         self.map_manager.draw_by_layers(surf, self.camera, layer_order)
+        self.entities.draw(surf, self.camera, max_y=self.player.rect.y)
+        if self.net is not None:
+            self.net.draw(surf, self.camera, self.player.frames, self.map_manager.instances, max_y=self.player.rect.y)
         self.player.draw(surf, self.camera)
+        if self.net is not None:
+            self.net.draw(surf, self.camera, self.player.frames, self.map_manager.instances, min_y=self.player.rect.y)
+        self.entities.draw(surf, self.camera, min_y=self.player.rect.y)
         self.map_manager.draw_by_layers(surf, self.camera, ["above"])
 
+        # weather under the lighting overlay: darkens at night like the world
+        self.weather.draw(surf, self.camera)
+
         # DAY/NIGHT LIGHTING
         overlay = pygame.Surface((GAME_WIDTH, GAME_HEIGHT), pygame.SRCALPHA)
-        now = datetime.now()
-        m = now.hour * 60 + now.minute
-
-        if SUNRISE_START <= m < SUNRISE_END:
-            t = (m - SUNRISE_START)/5
-            tint = lerp_color(LIGHT_NIGHT, LIGHT_MORNING, t)
-            alpha = int(200*(1-t))
-        elif SUNRISE_END <= m < SUNSET_START:
-            tint = LIGHT_DAY
-            alpha = 0
-        elif SUNSET_START <= m < SUNSET_END:
-            t = (m - SUNSET_START)/5
-            tint = lerp_color(LIGHT_DAY, LIGHT_EVENING, t)
-            alpha = int(80*t)
-        elif SUNSET_END <= m < NIGHT_START:
-            tint = LIGHT_EVENING
-            alpha = 80
-        elif NIGHT_START <= m < NIGHT_END:
-            t = (m - NIGHT_START)/5
-            tint = lerp_color(LIGHT_EVENING, LIGHT_NIGHT, t)
-            alpha = int(200*t)
-        else:
-            tint = LIGHT_NIGHT
-            alpha = 200
+        m = self.clock_minutes()
+        _, tint, alpha = lighting_at(m)
 
         if alpha > 0:
             overlay.fill((*tint, alpha))
@@ -419,13 +572,13 @@ class Game:
 
             falloff = 50
 
-            for Lx, Ly, Lw, Lh, _ in lights:
+            for light in lights:
 
                 # Convert world → screen
-                sx = int(Lx - self.camera.x)
-                sy = int(Ly - self.camera.y)
-                ex = sx + int(Lw)
-                ey = sy + int(Lh)
+                sx = int(light.x - self.camera.x)
+                sy = int(light.y - self.camera.y)
+                ex = sx + int(light.w)
+                ey = sy + int(light.h)
 
                 # ----- Clamp rectangle to screen -----
                 rsx = max(sx, 0)
@@ -536,33 +689,31 @@ class Game:
             box_x = 20
             box_y = GAME_HEIGHT - box_height - 20
 
-            # box surface
-            box = pygame.Surface((box_width, box_height))
-            box.fill((255,255,255))
-            pygame.draw.rect(box, (0,0,0), box.get_rect(), 4)
-
-            # small pixel font already stored as self.signbox_font
-            font = self.signbox_font
+            # box frame, drawn once
+            if self._signbox_bg is None or self._signbox_bg.get_size() != (box_width, box_height):
+                self._signbox_bg = pygame.Surface((box_width, box_height))
+                self._signbox_bg.fill((255,255,255))
+                pygame.draw.rect(self._signbox_bg, (0,0,0), self._signbox_bg.get_rect(), 4)
+            surf.blit(self._signbox_bg, (box_x, box_y))
 
-            # draw up to 2 lines (signbox_current_lines provided by open_signbox/_update_signbox_page)
-            y = 16
-            for line in self.signbox_current_lines:
-                txt = font.render(line, True, (0,0,0))
-                box.blit(txt, (16, y))
-                y += 28   # line height
+            # the page is rendered once and cached by its layout (up to 2
+            # lines, laid out by open_signbox; clipped while the typewriter runs)
+            typer = self.signbox_typer
+            self.signbox_layout.draw(surf, typer.page, (box_x + 16, box_y + 16), typer.chars)
 
             # arrow if more text exists
-            if self.signbox_has_more:
-                arrow = font.render("->", True, (0,0,0))
-                box.blit(arrow, (box_width - 32, box_height - 32))
+            if self.signbox_has_more and typer.page_done:
+                if self._signbox_arrow is None:
+                    self._signbox_arrow = self.signbox_font.render("->", True, (0,0,0))
+                surf.blit(self._signbox_arrow, (box_x + box_width - 32, box_y + box_height - 32))
 
-            # final blit
-            surf.blit(box, (box_x, box_y))
+        self.minimap.draw(surf)
+        self.hud.draw(surf)
 
     # ----------------------------------------
     # SCALE TO WINDOW + DRAW UI CONTROLS
     # ----------------------------------------
-    def present(self):
+    def _viewport(self):
         win_w, win_h = self.window.get_size()
 
         # Compute scale to maintain aspect ratio
@@ -577,6 +728,10 @@ class Game:
         # Offsets for centering (letterbox/pillarbox)
         offset_x = (win_w - scaled_width)//2
         offset_y = (win_h - scaled_height)//2
+        return scale, offset_x, offset_y, scaled_width, scaled_height
+
+    def present(self):
+        scale, offset_x, offset_y, scaled_width, scaled_height = self._viewport()
 
         # Scale and blit game surface
         final_surf = pygame.transform.scale(self.game_surface, (scaled_width, scaled_height))
@@ -587,16 +742,32 @@ class Game:
         self.controls.draw(self.window)
 
         pygame.display.flip()
+        self.input_latency.presented(time.perf_counter())
 
     # ---------------------------------------------------
     # MAIN LOOP
     # ---------------------------------------------------
     def run(self):
         while self.running:
-            dt = self.clock.tick(60)/1000
+            dt = self.pacer.tick()
             self.handle_events()
-            self.update(dt)
-            self.draw_native()
-            self.present()
-
+            for i, step in enumerate(self.pacer.steps(dt)):
+                self.update(step, self.events if i == 0 else ())
+            if self.pacer.should_render:
+                self.draw_native()
+                self.present()
+            if self.profiler.active:
+                self.profiler.set_tags(self.profile_tags())
+                self.profiler.frame_done()
+
+        if self.map_watcher is not None:
+            self.map_watcher.stop()
+        if self.net is not None:
+            self.net.close()
+        self.profiler.shutdown()
+        self.saves.shutdown()
+        if INPUT_LATENCY_REPORT:
+            print(self.input_latency.report())
+        self.minimap.shutdown()
+        self.map_manager.shutdown()
         pygame.quit()
@@ -0,0 +1,318 @@
+# headless.py
+"""
+Windowless simulation API for QA walkers and RL agents.
+
+    env = HeadlessEnv()
+    obs, info = env.reset("pallet_town", (10, 12))
+    obs, info = env.step(ACTIONS.index("up"))
+
+One step is one discrete action: a move completes its whole tile step
+(including ledge hops and warps) or bumps into something, "a" reads the
+sign / NPC ahead. There is no frame limiter and nothing is drawn unless
+render=True, so a step costs a few grid lookups. Completed steps on
+tall grass roll for wild encounters (info["encounter"]). The default
+observation is the symbolic tile window of observation.py;
+PositionObservation is a smaller alternative. Without `out`, reset() and
+step() return one env-owned array that the next call overwrites; copy
+it to keep an observation.
+
+VectorEnv runs N independent envs in worker processes. Observations are
+written straight into one shared-memory array (num_envs, *obs shape);
+only actions and small info dicts go through the pipes.
+"""
+import multiprocessing as mp
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from settings import (
+    TILESIZE, MAPS_FOLDER, MOVE_TIME, GAME_WIDTH, GAME_HEIGHT,
+    WORLD_ROOT, START_MAP, START_TILE_X, START_TILE_Y
+)
+from world_manager import MapManager
+from player import Player
+from camera import Camera
+from entities import EntityManager, FACINGS, FACING_DELTA
+from observation import ObservationBuilder
+from encounters import EncounterSystem
+
+ACTIONS = ("noop", "up", "down", "left", "right", "a")
+_ACTION_KEYS = {"up": "up", "down": "down", "left": "left", "right": "right"}
+
+
+class ScriptedControls:
+    """Stands in for VirtualControls: the env sets actions instead of the keyboard."""
+
+    def __init__(self):
+        self.actions = {k: False for k in ("up", "down", "left", "right", "A", "B", "start", "select")}
+        self.just_pressed = dict(self.actions)
+
+    def press(self, key=None):
+        for k in self.actions:
+            self.actions[k] = False
+            self.just_pressed[k] = False
+        if key is not None:
+            self.actions[key] = True
+            self.just_pressed[key] = True
+
+
+class PositionObservation:
+    """[map id, world tile x, world tile y, facing] as int32."""
+
+    shape = (4,)
+    dtype = np.int32
+
+    def build(self, env, out):
+        out[0] = env.map_id(env.map_name)
+        out[1] = env.player.tile_x
+        out[2] = env.player.tile_y
+        out[3] = FACINGS.index(env.player.direction)
+        return out
+
+
+# --------------------------------------------------------
+# Single environment
+# --------------------------------------------------------
+class HeadlessEnv:
+    def __init__(self, maps_folder=MAPS_FOLDER, world_root=WORLD_ROOT, render=False,
+                 npcs=True, streaming=False, seed=None, observation=None, encounters=True):
+        if not pygame.display.get_init() or pygame.display.get_surface() is None:
+            pygame.display.init()
+            pygame.display.set_mode((1, 1))
+
+        self.world_root = world_root
+        self.render_enabled = render
+        self.streaming = streaming
+        self.map_manager = MapManager(maps_folder=maps_folder, load_tiles=render)
+        self.map_ids = {name: i for i, name in enumerate(sorted(self.map_manager.manifest.maps))}
+
+        self.player = Player(0, 0, self.map_manager)
+        self.controls = ScriptedControls()
+        self.camera = Camera(GAME_WIDTH, GAME_HEIGHT)
+        self.entities = EntityManager(self.map_manager, seed=seed) if npcs else None
+        self.encounters = EncounterSystem(self.map_manager, seed=seed) if encounters else None
+        self.encounter = None
+        if self.encounters is not None:
+            self.player.on_step_done = self._roll_encounter
+        self.observation = observation or ObservationBuilder()
+        # reset()/step() without `out` write here: the returned array is
+        # the same every step and is overwritten by the next one
+        self._obs = np.zeros(self.observation.shape, dtype=self.observation.dtype)
+        self.surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT)) if render else None
+
+        self.map_name = None
+        self.steps = 0
+
+    def map_id(self, name):
+        return self.map_ids.get(name, -1)
+
+    # --------------------------------------------------------
+    # API
+    # --------------------------------------------------------
+    def reset(self, map_name=START_MAP, tile=(START_TILE_X, START_TILE_Y), out=None):
+        """Place the player on map-local tile `tile` of map_name."""
+        pos = self.map_manager.enter_map(map_name, tile[0], tile[1], self.world_root, self.streaming)
+        if pos is None:
+            raise ValueError(f"can't enter map '{map_name}'")
+        self.map_name = map_name
+        self._place(pos)
+        self.player.set_direction(0, 1)
+        self.player.path.clear()
+        self.steps = 0
+        self.encounter = None
+        if self.entities is not None:
+            self.entities.sync()
+        self._follow_camera()
+        return self._observe(out), self._info(False, False, None)
+
+    def step(self, action, out=None):
+        self.steps += 1
+        self.encounter = None
+        name = ACTIONS[action]
+        player = self.player
+        before = (player.tile_x, player.tile_y)
+        text = None
+
+        if name == "a":
+            self.controls.press()
+            text = player.check_sign_ahead()
+            if not text and self.entities is not None:
+                dx, dy = FACING_DELTA[FACINGS.index(player.direction)]
+                text = self.entities.talk(player.tile_x + dx, player.tile_y + dy, player.direction)
+        else:
+            self.controls.press(_ACTION_KEYS.get(name))
+            # dt of one full MOVE_TIME: a started move finishes within this call
+            player.update(MOVE_TIME, self.controls)
+
+        if self.entities is not None:
+            self.entities.update(MOVE_TIME, (player.tile_x, player.tile_y))
+
+        warped = False
+        if player.pending_warp:
+            warp = player.pending_warp
+            player.pending_warp = None
+            pos = self.map_manager.resolve_warp(warp, self.world_root, self.streaming)
+            if pos is not None:
+                self._place(pos)
+                self.map_name = warp.get("dest_map")
+                warped = True
+        elif len(self.map_manager.instances) > 1:
+            region = self.map_manager.get_region_of_world(player.rect.centerx, player.rect.centery)
+            if region:
+                self.map_name = region
+
+        self._follow_camera()
+        moved = (player.tile_x, player.tile_y) != before or warped
+        return self._observe(out), self._info(moved, warped, text)
+
+    def render(self):
+        """Draw the current view; returns the surface (None unless render=True)."""
+        if self.surface is None:
+            return None
+        surf = self.surface
+        surf.fill((0, 0, 0))
+        self.map_manager.draw_by_layers(surf, self.camera, ["floor", "grass", "grass2", "walls"])
+        if self.entities is not None:
+            self.entities.draw(surf, self.camera, max_y=self.player.rect.y)
+        self.player.draw(surf, self.camera)
+        if self.entities is not None:
+            self.entities.draw(surf, self.camera, min_y=self.player.rect.y)
+        self.map_manager.draw_by_layers(surf, self.camera, ["above"])
+        return surf
+
+    def close(self):
+        self.map_manager.shutdown()
+
+    # --------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------
+    def _roll_encounter(self, tx, ty):
+        self.encounter = self.encounters.check(tx, ty)
+
+    def _place(self, pos):
+        player = self.player
+        player.rect.topleft = pos
+        player.tile_x = pos[0] // TILESIZE
+        player.tile_y = pos[1] // TILESIZE
+        player.moving = False
+        player.pending_warp = None
+
+    def _follow_camera(self):
+        if not (self.streaming or self.render_enabled):
+            return
+        wl, wt, ww, wh = self.map_manager.get_world_bounds()
+        self.camera.update(self.player.rect, wl, wt, ww, wh)
+        self.map_manager.update_streaming(self.camera)
+
+    def _observe(self, out):
+        return self.observation.build(self, self._obs if out is None else out)
+
+    def _info(self, moved, warped, text):
+        return {
+            "map": self.map_name,
+            "tile": (self.player.tile_x, self.player.tile_y),
+            "moved": moved,
+            "warped": warped,
+            "text": text,
+            "encounter": self.encounter and (self.encounter.species, self.encounter.level),
+            "steps": self.steps,
+        }
+
+
+# --------------------------------------------------------
+# Vectorized runner
+# --------------------------------------------------------
+def _worker(conn, shm_name, shape, dtype, indices, env_kwargs):
+    shm = SharedMemory(name=shm_name)
+    obs = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    envs = [HeadlessEnv(**env_kwargs) for _ in indices]
+    try:
+        while True:
+            cmd, data = conn.recv()
+            if cmd == "step":
+                conn.send([env.step(a, out=obs[i])[1] for i, env, a in zip(indices, envs, data)])
+            elif cmd == "reset":
+                conn.send([env.reset(*args, out=obs[i])[1] for i, env, args in zip(indices, envs, data)])
+            elif cmd == "close":
+                break
+    finally:
+        for env in envs:
+            env.close()
+        del obs
+        shm.close()
+        conn.close()
+
+
+class VectorEnv:
+    """
+    num_envs HeadlessEnvs spread over num_workers processes.
+
+    reset()/step() return (obs, infos) where obs is a view of the shared
+    (num_envs, *shape) array; it is overwritten by the next call.
+    """
+
+    def __init__(self, num_envs, num_workers=None, start_method="spawn", **env_kwargs):
+        self.num_envs = num_envs
+        observation = env_kwargs.get("observation") or ObservationBuilder()
+        env_kwargs["observation"] = observation
+        shape = (num_envs,) + tuple(observation.shape)
+        dtype = np.dtype(observation.dtype)
+
+        self._shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.obs = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+
+        num_workers = max(1, min(num_envs, num_workers or os.cpu_count() or 1))
+        ctx = mp.get_context(start_method)
+        self._slices = [list(range(num_envs))[w::num_workers] for w in range(num_workers)]
+        self._conns = []
+        self._procs = []
+        for indices in self._slices:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker, args=(child, self._shm.name, shape, dtype, indices, env_kwargs), daemon=True
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def _gather(self, cmd, per_env):
+        for conn, indices in zip(self._conns, self._slices):
+            conn.send((cmd, [per_env[i] for i in indices]))
+        infos = [None] * self.num_envs
+        for conn, indices in zip(self._conns, self._slices):
+            for i, info in zip(indices, conn.recv()):
+                infos[i] = info
+        return self.obs, infos
+
+    def reset(self, starts=None):
+        """starts: one (map_name, tile) per env; default is the game's start tile."""
+        if starts is None:
+            starts = [(START_MAP, (START_TILE_X, START_TILE_Y))] * self.num_envs
+        return self._gather("reset", list(starts))
+
+    def step(self, actions):
+        return self._gather("step", [int(a) for a in actions])
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        del self.obs
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,75 @@
+# hot_reload.py
+import os
+import queue
+import threading
+
+from settings import MAPS_FOLDER, TILESET_FOLDER
+from utils import resource_path
+import world_manifest
+
+
+class MapWatcher:
+    """
+    Dev-mode file watcher. A background thread polls the mtimes of
+    <maps_folder>/*.json and <tileset_folder>/* and queues what changed;
+    the game drains the queue with poll() on the main thread.
+    """
+
+    def __init__(self, maps_folder=MAPS_FOLDER, tileset_folder=TILESET_FOLDER, interval=0.25):
+        self.maps_folder = maps_folder
+        self.tileset_folder = tileset_folder
+        self.interval = interval
+
+        self._changes = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._mtimes = self._scan()
+
+    def _scan(self):
+        mtimes = {}
+        for name in world_manifest.list_map_names(self.maps_folder):
+            path = resource_path(os.path.join(self.maps_folder, name + ".json"))
+            try:
+                mtimes[("map", name)] = os.path.getmtime(path)
+            except OSError:
+                pass
+
+        folder = resource_path(self.tileset_folder)
+        if os.path.isdir(folder):
+            for f in os.listdir(folder):
+                try:
+                    mtimes[("tileset", f)] = os.path.getmtime(os.path.join(folder, f))
+                except OSError:
+                    pass
+        return mtimes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = self._scan()
+            for key, mtime in current.items():
+                if self._mtimes.get(key) != mtime:
+                    self._changes.put(key)
+            self._mtimes = current
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="map-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def poll(self):
+        """
+        Changes since the last call as (maps, tilesets): sets of map names
+        and tileset file names.
+        """
+        maps, tilesets = set(), set()
+        while True:
+            try:
+                kind, name = self._changes.get_nowait()
+            except queue.Empty:
+                break
+            (maps if kind == "map" else tilesets).add(name)
+        return maps, tilesets
@@ -0,0 +1,141 @@
+# instrumentation.py
+from collections import deque
+
+import pygame
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class InputLatency:
+    """
+    Input-to-photon latency: the time from when Game.handle_events pumps an
+    input event until pygame.display.flip() returns for the frame that
+    consumed it. Time the event waited in SDL's queue before the pump is
+    not included (pygame events carry no timestamp).
+
+    Kept as a histogram over BUCKETS_MS (upper edges, one overflow bucket)
+    plus the last WINDOW samples for percentiles.
+    """
+    BUCKETS_MS = (4, 8, 12, 16, 20, 25, 33, 50, 67, 100, 150)
+    WINDOW = 1024
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.by_kind = {}
+        self.recent = deque(maxlen=self.WINDOW)
+        self.worst = 0.0
+        self._pending = []      # (pump time, kind) waiting for the next flip
+
+    def input(self, t, kind):
+        self._pending.append((t, kind))
+
+    def presented(self, t):
+        if not self._pending:
+            return
+        for t_in, kind in self._pending:
+            ms = (t - t_in) * 1000.0
+            i = 0
+            while i < len(self.BUCKETS_MS) and ms > self.BUCKETS_MS[i]:
+                i += 1
+            self.counts[i] += 1
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+            self.recent.append(ms)
+            self.worst = max(self.worst, ms)
+        self._pending.clear()
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def percentile(self, q):
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def summary(self):
+        return (f"input p50 {self.percentile(0.5):.1f}  p95 {self.percentile(0.95):.1f}"
+                f"  max {self.worst:.1f} ms  (n={self.total})")
+
+    def report(self):
+        """Text histogram, one bucket per line."""
+        total = self.total
+        if not total:
+            return "input latency: no input"
+        kinds = ", ".join(f"{k} {n}" for k, n in sorted(self.by_kind.items()))
+        lines = [f"input latency: {self.summary()}  [{kinds}]"]
+        lo = 0
+        for i, n in enumerate(self.counts):
+            label = f"{lo:>4}-{self.BUCKETS_MS[i]:<4}" if i < len(self.BUCKETS_MS) else f"{lo:>4}+    "
+            lines.append(f"  {label} ms {n:>6} {'#' * round(40 * n / total)}".rstrip())
+            if i < len(self.BUCKETS_MS):
+                lo = self.BUCKETS_MS[i]
+        return "\n".join(lines)
+
+
+class DebugHUD:
+    """
+    F3 overlay with frame rate, renderer, streaming and memory stats.
+    The memory report is refreshed at most every REFRESH seconds since it
+    walks every object record of every resident map.
+    """
+    REFRESH = 0.5
+
+    def __init__(self):
+        self.visible = False
+        self._font = None
+        self._lines = []
+        self._since_refresh = self.REFRESH
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._since_refresh = self.REFRESH
+
+    def update(self, dt, game):
+        if not self.visible:
+            return
+        self._since_refresh += dt
+        if self._since_refresh < self.REFRESH:
+            return
+        self._since_refresh = 0.0
+
+        mm = game.map_manager
+        report = mm.memory_report()
+        totals = report["totals"]
+
+        lines = [
+            f"FPS {game.pacer.get_fps():.1f}  render: {mm.renderer.name}",
+            game.pacer.summary(),
+            game.input_latency.summary(),
+            f"region: {game.current_region}  maps: {len(mm.instances)}"
+            + ("  (streaming)" if mm.streaming else ""),
+            f"mem {format_bytes(totals.get('total', 0))}  peak {format_bytes(report['peak_bytes'])}",
+            f" tiles {format_bytes(totals.get('tile_surfaces', 0))}"
+            f"  layers {format_bytes(totals.get('layer_data', 0))}"
+            f"  objs {format_bytes(totals.get('objects', 0))}",
+            f" render {format_bytes(totals.get('render_cache', 0))}"
+            f"  json {format_bytes(totals.get('retained_json', 0))}"
+            f"  atlas {report['atlas_pages']}p {format_bytes(report['atlas_bytes'])}",
+        ]
+        for ev in list(mm.stream_events)[-3:]:
+            lines.append(f" stream {ev.kind:<3} {ev.name} {format_bytes(ev.bytes)}")
+        self._lines = lines
+
+    def draw(self, surface):
+        if not self.visible or not self._lines:
+            return
+        if self._font is None:
+            self._font = pygame.font.SysFont("Courier", 12, bold=True)
+
+        line_h = self._font.get_linesize()
+        width = max(self._font.size(l)[0] for l in self._lines) + 8
+        bg = pygame.Surface((width, line_h * len(self._lines) + 6), pygame.SRCALPHA)
+        bg.fill((0, 0, 0, 160))
+        for i, line in enumerate(self._lines):
+            bg.blit(self._font.render(line, True, (255, 255, 255)), (4, 3 + i * line_h))
+        surface.blit(bg, (4, 4))
@@ -1,5 +1,41 @@
+# map_connections.py
+# Overworld adjacency is derived from each map's world_x/world_y (see
+# world_manifest.py). Only list links here for maps that should be
+# stitched together without touching geometrically.
+#
+# A maps folder may add its own links in region_connections.json (same
+# shape as REGION_CONNECTIONS); stress_maps.py writes one for every
+# world it generates.
+import json
+import os
+
+from utils import resource_path
+
+CONNECTIONS_FILENAME = "region_connections.json"
+
 REGION_CONNECTIONS = {
     "pallet_town": ["pallet_town", "route_1"],
     "route_1": ["route_1", "pallet_town", "viridian_city"],
     "viridian_city": ["route_1", "viridian_city"]
 }
+
+
+def connections_path_for(maps_folder):
+    return resource_path(os.path.join(maps_folder, CONNECTIONS_FILENAME))
+
+
+def connections_for(maps_folder):
+    """REGION_CONNECTIONS plus the folder's region_connections.json, if any."""
+    path = connections_path_for(maps_folder)
+    if not os.path.exists(path):
+        return REGION_CONNECTIONS
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            extra = json.load(f)
+    except (OSError, ValueError) as e:
+        print("map_connections: could not read", path, e)
+        return REGION_CONNECTIONS
+    merged = {name: list(linked) for name, linked in REGION_CONNECTIONS.items()}
+    for name, linked in extra.items():
+        merged.setdefault(name, []).extend(n for n in linked if n not in merged[name])
+    return merged
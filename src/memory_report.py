@@ -0,0 +1,40 @@
+# memory_report.py
+"""
+Dump MapManager.memory_report() as JSON without opening a game window.
+
+    python src/memory_report.py                   # stitched overworld
+    python src/memory_report.py --map oak_lab     # one interior
+"""
+import argparse
+import json
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from world_manager import MapManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default="pallet_town", help="overworld root map")
+    parser.add_argument("--map", help="load a single map instead of the overworld")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    mm = MapManager()
+    if args.map:
+        mm.load_single_map(args.map)
+    else:
+        mm.build_world(args.root, load_connected=True, streaming=False)
+
+    print(json.dumps(mm.memory_report(), indent=2))
+    mm.shutdown()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
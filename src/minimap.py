@@ -0,0 +1,384 @@
+# minimap.py
+"""
+World overview generated from the real overworld maps.
+
+Every overworld map of the world_root component is rendered to a small
+image, MINIMAP_TILE_PX pixels per tile. A lookup table maps every GID
+a map uses to the k×k block mean colours of its tile (alpha
+premultiplied, computed once per tile and shared by all maps). A map
+layer is then lut[layer_gids] (one NumPy gather), and the layers are
+composited with the "over" operator. No tile is ever blitted.
+
+Images are cached as PNGs in MINIMAP_CACHE. The file name is keyed on
+the map JSON and tileset images it was made from, so only maps whose
+source changed are rendered again. Reading and rendering happens on a
+worker thread; the main thread only pastes finished images into the
+world surface (poll()), so opening the map (M) is instant. Runtime tile
+edits and hot reloads re-render the affected map; a map with journaled
+edits is always rendered from the live map and never cached.
+"""
+import glob
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pygame
+
+from settings import (
+    TILESIZE, TILESET_FOLDER, MINIMAP_TILE_PX, MINIMAP_CACHE, MINIMAP_LAYERS
+)
+import tilemap
+from utils import resource_path
+
+CACHE_VERSION = 1
+
+_tables_lock = threading.Lock()
+_tables = {}    # (image path, stamp, tw, th, margin, spacing, k) → _TilesetTable
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return f"{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        return "missing"
+
+
+def _tileset_path(ts):
+    return resource_path(os.path.join(TILESET_FOLDER, ts["image"]))
+
+
+# --------------------------------------------------------
+# Per-tileset colour tables
+# --------------------------------------------------------
+class _TilesetTable:
+    """
+    k×k block mean colours (premultiplied RGBA, 0..1) of a tileset's
+    tiles, computed for the tiles maps actually use and kept.
+    """
+
+    def __init__(self, path, tw, th, margin, spacing, k):
+        self.tw, self.th = tw, th
+        self.margin, self.spacing = margin, spacing
+        self.k = k
+        self.lock = threading.Lock()
+        try:
+            image = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError) as e:
+            print("minimap: can't read tileset", path, e)
+            image = pygame.Surface((0, 0), pygame.SRCALPHA)
+        w, h = image.get_size()
+        self.pixels = np.frombuffer(pygame.image.tobytes(image, "RGBA"), dtype=np.uint8).reshape(h, w, 4)
+        self.cols = max(0, (w - margin + spacing) // (tw + spacing))
+        self.rows = max(0, (h - margin + spacing) // (th + spacing))
+        self.count = self.cols * self.rows
+        self.blocks = np.zeros((self.count, k, k, 4), dtype=np.float32)
+        self.known = np.zeros(self.count, dtype=bool)
+
+    def lookup(self, local):
+        """Blocks of local tile ids (array, all < count)."""
+        with self.lock:
+            todo = np.unique(local[~self.known[local]])
+            if len(todo):
+                self._compute(todo)
+            return self.blocks[local]
+
+    def _compute(self, ids):
+        tw, th, k = self.tw, self.th, self.k
+        bh, bw = max(1, th // k), max(1, tw // k)
+        # pixel rows / columns of every requested tile: (n, th) and (n, tw)
+        y0 = self.margin + (ids // self.cols) * (th + self.spacing)
+        x0 = self.margin + (ids % self.cols) * (tw + self.spacing)
+        ys = y0[:, None] + np.arange(bh * k)[None, :]
+        xs = x0[:, None] + np.arange(bw * k)[None, :]
+        tiles = self.pixels[ys[:, :, None], xs[:, None, :]].astype(np.float32) / 255.0   # (n, th, tw, 4)
+        tiles[..., :3] *= tiles[..., 3:4]
+        blocks = tiles.reshape(len(ids), k, bh, k, bw, 4).mean(axis=(2, 4))
+        self.blocks[ids] = blocks
+        self.known[ids] = True
+
+
+def tileset_table(ts, tile_w, tile_h, k):
+    path = _tileset_path(ts)
+    tw = ts.get("tilewidth", tile_w)
+    th = ts.get("tileheight", tile_h)
+    margin = ts.get("margin", 0)
+    spacing = ts.get("spacing", 0)
+    key = (path, _file_stamp(path), tw, th, margin, spacing, k)
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is None:
+            table = _tables[key] = _TilesetTable(path, tw, th, margin, spacing, k)
+    return table
+
+
+def map_lut(tm, k, layers=MINIMAP_LAYERS):
+    """GID → k×k block table for the GIDs a map's layers use (row 0 = empty)."""
+    layer_ids = [tm.layer_map[n] for n in layers if n in tm.layer_map]
+    used = np.unique(np.concatenate([tm.layer_gids[i].ravel() for i in layer_ids])) if layer_ids else np.zeros(1, np.uint32)
+    used = used[used != 0].astype(np.int64)
+    out = np.zeros((int(used.max()) + 1 if len(used) else 1, k, k, 4), dtype=np.float32)
+
+    firsts = [ts["firstgid"] for ts in tm.tilesets] + [1 << 62]
+    for ts, nxt in zip(tm.tilesets, firsts[1:]):
+        gids = used[(used >= ts["firstgid"]) & (used < nxt)]
+        if not len(gids):
+            continue
+        table = tileset_table(ts, tm.tile_w, tm.tile_h, k)
+        local = gids - ts["firstgid"]
+        ok = local < table.count
+        out[gids[ok]] = table.lookup(local[ok])
+    return out
+
+
+def render_map(tm, k=MINIMAP_TILE_PX, layers=MINIMAP_LAYERS):
+    """(height*k, width*k, 4) uint8 RGBA overview of a TileMap (flip bits ignored at this scale)."""
+    lut = map_lut(tm, k, layers)
+    h, w = tm.height, tm.width
+    acc = np.zeros((h, w, k, k, 4), dtype=np.float32)
+    for name in layers:
+        idx = tm.layer_map.get(name)
+        if idx is None:
+            continue
+        gids = tm.layer_gids[idx]
+        src = lut[np.where(gids < len(lut), gids, 0)]
+        # premultiplied "over": src + dst * (1 - src alpha)
+        acc *= 1.0 - src[..., 3:4]
+        acc += src
+
+    img = acc.transpose(0, 2, 1, 3, 4).reshape(h * k, w * k, 4)
+    alpha = img[..., 3:4]
+    rgb = np.where(alpha > 0, img[..., :3] / np.maximum(alpha, 1e-6), 0.0)
+    out = np.empty((h * k, w * k, 4), dtype=np.uint8)
+    out[..., :3] = np.clip(rgb * 255.0 + 0.5, 0, 255)
+    out[..., 3] = np.clip(alpha[..., 0] * 255.0 + 0.5, 0, 255)
+    return out
+
+
+# --------------------------------------------------------
+# Disk cache
+# --------------------------------------------------------
+def source_key(map_path, tilesets, k=MINIMAP_TILE_PX, layers=MINIMAP_LAYERS):
+    """Hash of everything a map's overview is made from."""
+    h = hashlib.sha1()
+    h.update(f"{CACHE_VERSION}|{k}|{','.join(layers)}|{_file_stamp(map_path)}".encode())
+    for ts in tilesets:
+        h.update(f"|{ts['firstgid']}:{ts['image']}:{_file_stamp(_tileset_path(ts))}".encode())
+    return h.hexdigest()[:16]
+
+
+def _cache_file(name, key):
+    return resource_path(os.path.join(MINIMAP_CACHE, f"{name}.{key}.png"))
+
+
+def _rgba_surface(rgba):
+    h, w = rgba.shape[:2]
+    return pygame.image.frombuffer(rgba.tobytes(), (w, h), "RGBA")
+
+
+def _save(name, key, rgba):
+    folder = resource_path(MINIMAP_CACHE)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        for old in glob.glob(os.path.join(folder, glob.escape(name) + ".*.png")):
+            os.remove(old)
+        path = _cache_file(name, key)
+        tmp = path + ".tmp.png"
+        pygame.image.save(_rgba_surface(rgba), tmp)
+        os.replace(tmp, path)
+    except (OSError, pygame.error) as e:
+        # read-only install: keep it in memory only
+        print("minimap: could not cache", name, e)
+
+
+def _load(name, key):
+    path = _cache_file(name, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        surf = pygame.image.load(path)
+    except pygame.error:
+        return None
+    rgb = pygame.surfarray.array3d(surf).transpose(1, 0, 2)
+    out = np.empty(rgb.shape[:2] + (4,), dtype=np.uint8)
+    out[..., :3] = rgb
+    out[..., 3] = pygame.surfarray.array_alpha(surf).T
+    return out
+
+
+# --------------------------------------------------------
+# Minimap
+# --------------------------------------------------------
+class Minimap:
+    def __init__(self, map_manager, world_root, k=MINIMAP_TILE_PX):
+        self.map_manager = map_manager
+        self.manifest = map_manager.manifest
+        self.k = k
+        self.visible = False
+
+        self.names = [n for n in self.manifest.component(world_root) if self.manifest.is_overworld(n)]
+        self.rects = {}            # name → (x, y, w, h) in minimap pixels
+        for name in self.names:
+            # world pixel position → world tile; size in the map's own tiles
+            x, y, w, h = self.manifest.world_pixel_rect(name)
+            entry = self.manifest.get(name)
+            self.rects[name] = (x // TILESIZE * k, y // TILESIZE * k, w // entry["tile_w"] * k, h // entry["tile_h"] * k)
+
+        if self.rects:
+            left = min(r[0] for r in self.rects.values())
+            top = min(r[1] for r in self.rects.values())
+            right = max(r[0] + r[2] for r in self.rects.values())
+            bottom = max(r[1] + r[3] for r in self.rects.values())
+        else:
+            left = top = 0
+            right = bottom = 1
+        self.origin = (left, top)
+        self.surface = pygame.Surface((right - left, bottom - top), pygame.SRCALPHA)
+
+        self.ready = set()             # maps pasted into self.surface
+        self.last_tile = None          # last overworld player tile
+        self.region = None
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="minimap")
+        self._pending = {}             # name → Future[(rgba, origin tile)]
+        self._font = None
+        self._scaled = None            # (source size, target size, Surface)
+
+        map_manager.reload_listeners.append(self._on_reload)
+        map_manager.mutation_listeners.append(self._on_mutation)
+        for name in self.names:
+            self.request(name)
+
+    # --------------------------------------------------------
+    # Generation
+    # --------------------------------------------------------
+    def request(self, name, use_cache=True, save=True):
+        """(Re)generate one map's overview in the background."""
+        if name not in self.rects:
+            return
+        inst = self.map_manager.instances.get(name)
+        tm = inst.map if inst is not None else None
+        # snapshot of the live arrays so the worker never sees a half-edit
+        if tm is not None:
+            if self.map_manager.mutations.get(name):
+                # journaled runtime edits are replayed into the live map:
+                # the file's cached image is out of date for it, and its
+                # render must not be cached under the file's key
+                use_cache = save = False
+            tm = _MapSnapshot(tm)
+        self._pending[name] = self._executor.submit(self._generate, name, tm, use_cache, save)
+
+    def _generate(self, name, tm, use_cache, save):
+        map_path = resource_path(os.path.join(self.map_manager.maps_folder, name + ".json"))
+        if tm is None:
+            tm = tilemap.TileMap(os.path.join(self.map_manager.maps_folder, name + ".json"), load_tiles=False)
+        key = source_key(map_path, tm.tilesets, self.k)
+        rgba = _load(name, key) if use_cache else None
+        if rgba is None:
+            rgba = render_map(tm, self.k)
+            if save:
+                _save(name, key, rgba)
+        return rgba, (tm.origin_tx, tm.origin_ty)
+
+    def poll(self):
+        """Paste finished maps into the world surface (main thread)."""
+        for name, future in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[name]
+            try:
+                rgba, _ = future.result()
+            except Exception as e:
+                print("minimap: failed to render", name, e)
+                continue
+            x, y, w, h = self.rects[name]
+            pos = (x - self.origin[0], y - self.origin[1])
+            self.surface.fill((0, 0, 0, 0), pygame.Rect(pos, (w, h)))
+            self.surface.blit(_rgba_surface(rgba), pos)
+            self.ready.add(name)
+            self._scaled = None
+
+    @property
+    def done(self):
+        return not self._pending
+
+    def _on_reload(self, name, changed):
+        # source edited on disk (hot reload): re-render and re-cache,
+        # unless the map has runtime edits on top (see request)
+        if name in self.rects:
+            self.request(name, use_cache=True)
+
+    def _on_mutation(self, name, changes):
+        # runtime tile edits aren't part of the source: don't touch the cache
+        if name in self.rects and any(k in MINIMAP_LAYERS for k in changes):
+            self.request(name, use_cache=False, save=False)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --------------------------------------------------------
+    # Runtime
+    # --------------------------------------------------------
+    def toggle(self):
+        self.visible = not self.visible
+
+    def update(self, region, player_tile):
+        self.poll()
+        self.region = region
+        if region in self.rects:
+            self.last_tile = player_tile
+
+    def draw(self, surface):
+        if not self.visible:
+            return
+        sw, sh = surface.get_size()
+        mw, mh = self.surface.get_size()
+        scale = min((sw - 40) / mw, (sh - 80) / mh)
+        tw, th = max(1, int(mw * scale)), max(1, int(mh * scale))
+        if self._scaled is None or self._scaled[0] != (tw, th):
+            self._scaled = ((tw, th), pygame.transform.scale(self.surface, (tw, th)))
+        img = self._scaled[1]
+        x0, y0 = (sw - tw) // 2, 50 + (sh - 80 - th) // 2
+
+        backdrop = pygame.Rect(x0 - 6, y0 - 6, tw + 12, th + 12)
+        surface.fill((24, 24, 32), backdrop)
+        pygame.draw.rect(surface, (255, 255, 255), backdrop, 2)
+        surface.blit(img, (x0, y0))
+
+        def to_screen(px, py):
+            return x0 + int((px - self.origin[0]) * scale), y0 + int((py - self.origin[1]) * scale)
+
+        if self.region in self.rects:
+            x, y, w, h = self.rects[self.region]
+            sx, sy = to_screen(x, y)
+            pygame.draw.rect(surface, (255, 220, 80), (sx, sy, int(w * scale), int(h * scale)), 1)
+
+        if self.last_tile is not None and pygame.time.get_ticks() // 400 % 2 == 0:
+            mx, my = to_screen(self.last_tile[0] * self.k + self.k // 2, self.last_tile[1] * self.k + self.k // 2)
+            pygame.draw.circle(surface, (230, 40, 40), (mx, my), max(3, int(self.k * scale)))
+            pygame.draw.circle(surface, (255, 255, 255), (mx, my), max(3, int(self.k * scale)), 1)
+
+        if self._font is None:
+            try:
+                self._font = pygame.font.Font("PressStart2P.ttf", 16)
+            except Exception:
+                self._font = pygame.font.SysFont("Courier", 16, bold=True)
+        label = (self.region or "").replace("_", " ").upper()
+        if not self.done:
+            label += f"  ({len(self.ready)}/{len(self.rects)})"
+        text = self._font.render(label, True, (255, 255, 255))
+        surface.blit(text, ((sw - text.get_width()) // 2, 16))
+
+
+class _MapSnapshot:
+    """The parts of a TileMap render_map / source_key read, copied."""
+
+    def __init__(self, tm):
+        self.tilesets = list(tm.tilesets)
+        self.tile_w, self.tile_h = tm.tile_w, tm.tile_h
+        self.width, self.height = tm.width, tm.height
+        self.origin_tx, self.origin_ty = tm.origin_tx, tm.origin_ty
+        self.layer_map = dict(tm.layer_map)
+        self.layer_gids = [g.copy() for g in tm.layer_gids]
@@ -0,0 +1,557 @@
+# navigation.py
+"""
+Tile navigation over the world grid of the currently loaded maps.
+
+Movement rules mirror MapManager.can_step / Player.can_move: a step onto
+a tile is allowed if no loaded map has a wall there and every ledge on
+the tile points in the step's direction (Player._ledge_allows). Tiles
+outside every loaded map are not walkable.
+
+Warps are graph edges: stepping onto a warp tile whose destination is
+in the loaded world teleports to the destination tile. Warps leading
+out of the loaded world (doors into interiors) are only entered when
+they are the goal.
+
+Reachability uses strongly connected components (ledges make the graph
+directed) plus a transitive closure of the component DAG, so
+reachable(a, b) is a couple of lookups. Wall changes update the grid in
+place; components are recomputed lazily only when a change can affect
+them.
+"""
+import heapq
+from collections import deque
+
+import numpy as np
+
+from world_manager import ledge_dir_for_move
+
+# (dx, dy, ledge bit that allows the step)
+_STEPS = [(dx, dy, 1 << ledge_dir_for_move(dx, dy)) for dx, dy in ((0, 1), (0, -1), (-1, 0), (1, 0))]
+
+# A* landmarks (ALT): BFS distances from / to a few far-apart tiles give a
+# much tighter lower bound than Manhattan distance around buildings.
+# Grids bigger than SEARCH_TABLE_CELLS skip them and the cached adjacency
+# lists, and expand neighbours on the fly.
+LANDMARKS = 8
+SEARCH_TABLE_CELLS = 1 << 16
+_INF = 1 << 30
+
+
+class NavGraph:
+    def __init__(self, map_manager):
+        self.map_manager = map_manager
+        self._signature = None
+        self._components_dirty = True
+        self.left = self.top = 0
+        self.width = self.height = 0
+        self.passable = bytearray()
+        self.ledges = bytearray()
+        self.warps = {}        # src index → dest index (inside the loaded world)
+        self.exits = {}        # src index → warp dict (leaves the loaded world)
+        self.comp = []         # index → component id (-1 = not walkable)
+        self.reach = []        # component id → bitset of reachable components
+        self.warp_dist = None  # index → tiles to the nearest warp source (None: no warps)
+        self.landmarks = None  # [(dist from landmark, dist to landmark)] flat lists; None = stale
+        self.adjacency = None  # index → _edges(index), for grids up to SEARCH_TABLE_CELLS
+
+        # A* scratch, one slot per grid index, valid where stamp == _search
+        self._cost = []
+        self._came = []
+        self._via = []
+        self._stamp = []
+        self._search = 0
+
+        map_manager.mutation_listeners.append(self._on_mutation)
+        map_manager.reload_listeners.append(lambda name, changed: self.invalidate())
+
+    # --------------------------------------------------------
+    # Build
+    # --------------------------------------------------------
+    def invalidate(self):
+        self._signature = None
+
+    def _current_signature(self):
+        return tuple(
+            (name, id(inst.map), inst.world_x, inst.world_y)
+            for name, inst in self.map_manager.instances.items()
+        )
+
+    def _ensure(self):
+        sig = self._current_signature()
+        if sig != self._signature:
+            self.rebuild()
+            self._signature = sig
+        if self._components_dirty:
+            self._compute_components()
+
+    def rebuild(self):
+        insts = list(self.map_manager.instances.values())
+        if not insts:
+            self.width = self.height = 0
+            self.passable = bytearray()
+            self.ledges = bytearray()
+            self.warps, self.exits = {}, {}
+            self.warp_dist = None
+            self.landmarks = self.adjacency = None
+            self._reset_scratch(0)
+            self._components_dirty = True
+            return
+
+        rects = [
+            (inst.world_x + inst.map.origin_tx, inst.world_y + inst.map.origin_ty,
+             inst.map.width, inst.map.height)
+            for inst in insts
+        ]
+        self.left = min(r[0] for r in rects)
+        self.top = min(r[1] for r in rects)
+        self.width = max(r[0] + r[2] for r in rects) - self.left
+        self.height = max(r[1] + r[3] for r in rects) - self.top
+
+        covered = np.zeros((self.height, self.width), dtype=bool)
+        blocked = np.zeros((self.height, self.width), dtype=bool)
+        ledges = np.zeros((self.height, self.width), dtype=np.uint8)
+        for inst, (x, y, w, h) in zip(insts, rects):
+            x -= self.left
+            y -= self.top
+            covered[y:y + h, x:x + w] = True
+            blocked[y:y + h, x:x + w] |= inst.map.blocked
+            ledges[y:y + h, x:x + w] |= inst.map.ledge_mask
+
+        self.passable = bytearray((covered & ~blocked).astype(np.uint8).tobytes())
+        self.ledges = bytearray(ledges.tobytes())
+
+        self.warps, self.exits = {}, {}
+        for inst in insts:
+            for warp in inst.warps:
+                src = self.index(warp.x, warp.y)
+                if src is None:
+                    continue
+                dest = self.map_manager.instances.get(warp.dest_map)
+                dst = None
+                if dest is not None:
+                    try:
+                        dst = self.index(dest.world_x + int(warp.dest_x), dest.world_y + int(warp.dest_y))
+                    except (TypeError, ValueError):
+                        dst = None
+                if dst is not None:
+                    self.warps[src] = dst
+                else:
+                    self.exits[src] = warp
+
+        self.warp_dist = self._warp_distances() if self.warps else None
+        self.landmarks = self.adjacency = None
+        self._reset_scratch(self.width * self.height)
+        self._components_dirty = True
+
+    def _reset_scratch(self, n):
+        self._cost = [0] * n
+        self._came = [0] * n
+        self._via = [0] * n
+        self._stamp = [0] * n
+        self._search = 0
+
+    def _warp_distances(self):
+        """
+        Manhattan distance from every cell to the nearest warp source, as
+        a flat list (the A* heuristic's "walk to a warp" term). L1 distance
+        transforms are separable: two sweeps along x, then two along y.
+        """
+        h, w = self.height, self.width
+        far = h + w
+        d = np.full((h, w), far, dtype=np.int32)
+        for src in self.warps:
+            d[src // w, src % w] = 0
+        for x in range(1, w):
+            np.minimum(d[:, x], d[:, x - 1] + 1, out=d[:, x])
+        for x in range(w - 2, -1, -1):
+            np.minimum(d[:, x], d[:, x + 1] + 1, out=d[:, x])
+        for y in range(1, h):
+            np.minimum(d[y], d[y - 1] + 1, out=d[y])
+        for y in range(h - 2, -1, -1):
+            np.minimum(d[y], d[y + 1] + 1, out=d[y])
+        return d.ravel().tolist()
+
+    # --------------------------------------------------------
+    # Coordinates
+    # --------------------------------------------------------
+    def index(self, tx, ty):
+        x, y = tx - self.left, ty - self.top
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def tile(self, idx):
+        return (idx % self.width + self.left, idx // self.width + self.top)
+
+    def is_walkable(self, tx, ty):
+        self._ensure()
+        idx = self.index(tx, ty)
+        return idx is not None and bool(self.passable[idx])
+
+    # --------------------------------------------------------
+    # Edges
+    # --------------------------------------------------------
+    def _successors(self, idx):
+        """(next node, stepped tile index) pairs; warps jump to their destination."""
+        w, h = self.width, self.height
+        x, y = idx % w, idx // w
+        passable, ledges, warps = self.passable, self.ledges, self.warps
+        for dx, dy, bit in _STEPS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < w and 0 <= ny < h):
+                continue
+            n = ny * w + nx
+            if not passable[n]:
+                continue
+            mask = ledges[n]
+            if mask and mask & ~bit:
+                continue
+            yield warps.get(n, n), n
+
+    def _edges(self, idx):
+        """
+        _successors as a list, with next node -1 where the step is onto a
+        warp out of the loaded world (only taken when it is the goal).
+        """
+        exits = self.exits
+        return [(-1 if n in exits else nxt, n) for nxt, n in self._successors(idx)]
+
+    # --------------------------------------------------------
+    # Components (Tarjan, iterative)
+    # --------------------------------------------------------
+    def _compute_components(self):
+        n = self.width * self.height
+        passable = self.passable
+        exits = self.exits
+        index = [-1] * n
+        low = [0] * n
+        on_stack = bytearray(n)
+        stack = []
+        comp = [-1] * n
+        succ_lists = {}
+        counter = 0
+        comp_count = 0
+        comp_succ = []  # component id → set of successor component ids
+
+        def succ(v):
+            lst = succ_lists.get(v)
+            if lst is None:
+                lst = [nxt for nxt, stepped in self._successors(v) if stepped not in exits]
+                succ_lists[v] = lst
+            return lst
+
+        for root in range(n):
+            if not passable[root] or index[root] != -1 or root in exits:
+                continue
+            work = [(root, 0)]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                v, i = work[-1]
+                children = succ(v)
+                if i < len(children):
+                    work[-1] = (v, i + 1)
+                    wv = children[i]
+                    if index[wv] == -1:
+                        index[wv] = low[wv] = counter
+                        counter += 1
+                        stack.append(wv)
+                        on_stack[wv] = 1
+                        work.append((wv, 0))
+                    elif on_stack[wv]:
+                        low[v] = min(low[v], index[wv])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[v])
+                if low[v] == index[v]:
+                    while True:
+                        u = stack.pop()
+                        on_stack[u] = 0
+                        comp[u] = comp_count
+                        if u == v:
+                            break
+                    comp_succ.append(set())
+                    comp_count += 1
+
+        for v, lst in succ_lists.items():
+            cv = comp[v]
+            for wv in lst:
+                if comp[wv] != cv:
+                    comp_succ[cv].add(comp[wv])
+
+        # Tarjan emits components in reverse topological order, so every
+        # successor's closure is final before its predecessors are visited
+        reach = [0] * comp_count
+        for c in range(comp_count):
+            bits = 1 << c
+            for s in comp_succ[c]:
+                bits |= reach[s]
+            reach[c] = bits
+
+        self.comp = comp
+        self.reach = reach
+        self._components_dirty = False
+
+    def reachable(self, start, goal):
+        """Can something standing on start walk to goal? (tile tuples)"""
+        self._ensure()
+        a = self.index(*start)
+        b = self.index(*goal)
+        if a is None or b is None:
+            return False
+        if b in self.exits:
+            # exits aren't graph nodes: reachable if any tile stepping onto it is
+            bx, by = b % self.width, b // self.width
+            return any(
+                self._steps_onto(p, b) and self.reachable(start, self.tile(p))
+                for p in (b - 1 if bx > 0 else None, b + 1 if bx < self.width - 1 else None,
+                          b - self.width if by > 0 else None, b + self.width if by < self.height - 1 else None)
+                if p is not None and self.comp[p] >= 0
+            )
+        ca, cb = self.comp[a], self.comp[b]
+        if ca < 0 or cb < 0:
+            return False
+        return bool(self.reach[ca] & (1 << cb))
+
+    def _steps_onto(self, src, dst):
+        return any(stepped == dst for _, stepped in self._successors(src))
+
+    def component_of(self, tile):
+        self._ensure()
+        idx = self.index(*tile)
+        return self.comp[idx] if idx is not None else -1
+
+    # --------------------------------------------------------
+    # Incremental updates
+    # --------------------------------------------------------
+    def _on_mutation(self, map_name, changes):
+        if self._signature is None:
+            return
+        inst = self.map_manager.instances.get(map_name)
+        if inst is None:
+            return
+
+        if "warps" in changes:
+            self.invalidate()
+            return
+
+        cells = changes.get("walls", set()) | changes.get("passable", set())
+        tm = inst.map
+        for cx, cy in cells:
+            idx = self.index(inst.world_x + tm.origin_tx + cx, inst.world_y + tm.origin_ty + cy)
+            if idx is None:
+                continue
+            walkable = 0 if self.map_manager.is_blocked(*self.tile(idx)) else 1
+            if self.passable[idx] == walkable:
+                continue
+            self.passable[idx] = walkable
+            self._patch_adjacency(idx)
+            # a closed cell only makes walks longer, so landmark bounds stay
+            # admissible; an opened one can make them overestimate
+            if walkable:
+                self.landmarks = None
+            if not self._components_dirty and not self._join_component(idx):
+                self._components_dirty = True
+
+    def _patch_adjacency(self, idx):
+        """Redo the adjacency lists a walkability change at idx touches."""
+        adj = self.adjacency
+        if adj is None:
+            return
+        w = self.width
+        x, y = idx % w, idx // w
+        adj[idx] = self._edges(idx) if self.passable[idx] else ()
+        for dx, dy, _ in _STEPS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < w and 0 <= ny < self.height:
+                n = ny * w + nx
+                if self.passable[n]:
+                    adj[n] = self._edges(n)
+
+    def _join_component(self, idx):
+        """
+        Cheap case: a cell opening up next to a single component with no
+        ledges or warps involved joins that component. Anything else
+        (closing cells may split components) needs a recompute.
+        """
+        if not self.passable[idx] or self.ledges[idx] or idx in self.warps or idx in self.exits:
+            return False
+        w = self.width
+        x, y = idx % w, idx // w
+        comps = set()
+        for dx, dy, _ in _STEPS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < w and 0 <= ny < self.height):
+                continue
+            n = ny * w + nx
+            if not self.passable[n]:
+                continue
+            if self.ledges[n] or n in self.warps or n in self.exits or self.comp[n] < 0:
+                return False
+            comps.add(self.comp[n])
+        if len(comps) != 1:
+            return False
+        self.comp[idx] = comps.pop()
+        return True
+
+    # --------------------------------------------------------
+    # Search tables
+    # --------------------------------------------------------
+    def _ensure_tables(self):
+        """
+        Adjacency lists and landmark distance tables, built on first use
+        after a rebuild; (None, []) on grids past SEARCH_TABLE_CELLS.
+        """
+        if self.landmarks is not None:
+            return self.adjacency, self.landmarks
+        n = self.width * self.height
+        self.landmarks = []
+        if n > SEARCH_TABLE_CELLS:
+            return None, self.landmarks
+        passable, exits = self.passable, self.exits
+        if self.adjacency is None:
+            self.adjacency = [self._edges(i) if passable[i] else () for i in range(n)]
+        adj = self.adjacency
+        nodes = [i for i in range(n) if passable[i] and i not in exits]
+        if not nodes:
+            return adj, self.landmarks
+
+        succ = {v: [nxt for nxt, _ in adj[v] if nxt >= 0] for v in nodes}
+        pred = {v: [] for v in nodes}
+        for v, lst in succ.items():
+            for nxt in lst:
+                pred[nxt].append(v)
+
+        def bfs(root, edges):
+            dist = [_INF] * n
+            dist[root] = 0
+            queue = deque([root])
+            while queue:
+                v = queue.popleft()
+                d = dist[v] + 1
+                for nxt in edges[v]:
+                    if dist[nxt] == _INF:
+                        dist[nxt] = d
+                        queue.append(nxt)
+            return dist
+
+        # farthest-point selection inside the largest component (small
+        # pockets would waste landmarks): each landmark is the tile farthest
+        # by walking distance from the ones picked so far
+        comp = self.comp
+        sizes = {}
+        for v in nodes:
+            sizes[comp[v]] = sizes.get(comp[v], 0) + 1
+        main = max(sizes, key=sizes.get)
+        candidates = [v for v in nodes if comp[v] == main]
+        nearest = [_INF] * n
+        root = candidates[0]
+        for _ in range(LANDMARKS):
+            forward = bfs(root, succ)
+            self.landmarks.append((forward, bfs(root, pred)))
+            for v in candidates:
+                if forward[v] < nearest[v]:
+                    nearest[v] = forward[v]
+            root = max(candidates, key=nearest.__getitem__)
+            if nearest[root] == 0:
+                break
+        return adj, self.landmarks
+
+    # --------------------------------------------------------
+    # A*
+    # --------------------------------------------------------
+    def find_path(self, start, goal, max_expansions=None):
+        """
+        Shortest list of tiles to step onto to get from start to goal
+        (start excluded; a warp shows up as its source tile, the next
+        entry continues from its destination). None if unreachable.
+        """
+        self._ensure()
+        s = self.index(*start)
+        g = self.index(*goal)
+        if s is None or g is None:
+            return None
+        if s == g:
+            return []
+        if not self.reachable(start, goal):
+            return None
+
+        w = self.width
+        gx, gy = g % w, g // w
+        warps = self.warps
+        adj, landmarks = self._ensure_tables()
+        # "walk to some warp, come out of some warp": a lower bound when
+        # that beats the straight Manhattan distance
+        dst_to_goal = min((abs(d % w - gx) + abs(d // w - gy) for d in warps.values()), default=0)
+        warp_dist = self.warp_dist
+        # ALT bounds d(L, g) - d(L, v) and d(v, L) - d(g, L); an exit tile
+        # isn't a graph node, so it has no landmark distances
+        alt = []
+        if g not in self.exits:
+            alt = [(frm, frm[g], to, to[g]) for frm, to in landmarks
+                   if frm[g] < _INF and to[g] < _INF]
+
+        # flat per-index scratch instead of dicts; a new stamp clears it
+        self._search += 1
+        search = self._search
+        cost, came, via, stamp = self._cost, self._came, self._via, self._stamp
+        cost[s] = 0
+        came[s] = -1
+        stamp[s] = search
+
+        # (f, -g, node): among equal f, the deepest node first, so open
+        # areas aren't flooded level by level
+        heap = [(0, 0, s)]
+        expansions = 0
+        push, pop = heapq.heappush, heapq.heappop
+        edges = self._edges
+
+        while heap:
+            _, neg, v = pop(heap)
+            if v == g:
+                break
+            gc = -neg
+            if gc > cost[v]:
+                continue
+            expansions += 1
+            if max_expansions is not None and expansions > max_expansions:
+                return None
+            ng = gc + 1
+            for nxt, stepped in (adj[v] if adj is not None else edges(v)):
+                if nxt < 0:
+                    if stepped != g:
+                        continue
+                    nxt = stepped
+                if stamp[nxt] == search and ng >= cost[nxt]:
+                    continue
+                stamp[nxt] = search
+                cost[nxt] = ng
+                came[nxt] = v
+                via[nxt] = stepped
+                hx = abs(nxt % w - gx) + abs(nxt // w - gy)
+                if warp_dist is not None and warp_dist[nxt] + dst_to_goal < hx:
+                    hx = warp_dist[nxt] + dst_to_goal
+                for frm, fg, to, tg in alt:
+                    lb = fg - frm[nxt]
+                    if lb > hx:
+                        hx = lb
+                    lb = to[nxt] - tg
+                    if lb > hx:
+                        hx = lb
+                push(heap, (ng + hx, -ng, nxt))
+        else:
+            return None
+
+        if stamp[g] != search:
+            return None
+        path = deque()
+        v = g
+        while came[v] != -1:
+            path.appendleft(self.tile(via[v]))
+            v = came[v]
+        return list(path)
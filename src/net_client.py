@@ -0,0 +1,215 @@
+# net_client.py
+"""
+Game side of the multiplayer server (net_server.py).
+
+NetClient talks to the server over a non-blocking socket polled once per
+frame, so the game loop never waits on the network. The local player
+keeps moving at once (client-side prediction); the server answers each
+step with an ACK and Game snaps the player back if it was rejected.
+
+Remote players are drawn between their last two known tiles and move
+over MOVE_TIME, like the local player.
+"""
+import socket
+
+import pygame
+
+from settings import TILESIZE, MOVE_TIME, NET_HOST, NET_PORT
+from entities import FACINGS
+import net_protocol as proto
+
+
+def parse_address(text):
+    """'host:port' / 'host' / ':port' → (host, port)."""
+    host, _, port = (text or "").partition(":")
+    return host or NET_HOST, int(port) if port else NET_PORT
+
+
+class RemotePlayer:
+    __slots__ = ("id", "map", "x", "y", "facing", "from_x", "from_y", "t")
+
+    def __init__(self, pid, map_name, x, y, facing):
+        self.id = pid
+        self.map = map_name
+        self.x, self.y = x, y
+        self.facing = facing
+        self.snap()
+
+    def snap(self):
+        self.from_x, self.from_y = self.x, self.y
+        self.t = 1.0
+
+    def move_to(self, x, y):
+        # start from wherever the sprite is drawn now
+        px, py = self.position()
+        self.from_x, self.from_y = px / TILESIZE, py / TILESIZE
+        self.x, self.y = x, y
+        self.t = 0.0
+
+    def position(self):
+        """Interpolated world pixel position."""
+        t = self.t
+        return (
+            round((self.from_x + (self.x - self.from_x) * t) * TILESIZE),
+            round((self.from_y + (self.y - self.from_y) * t) * TILESIZE),
+        )
+
+
+class NetClient:
+    def __init__(self, address, name="player", timeout=5.0):
+        self.sock = socket.create_connection(parse_address(address), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = proto.FrameReader()
+        self.out = bytearray()
+
+        self.map_names = None
+        self.player_id = None
+        self.spawn = None        # (map name, world x, world y, facing) from WELCOME
+        self.acks = []           # (seq, ok, map name, x, y) not yet handled by Game
+        self.remotes = {}        # id → RemotePlayer
+        self.seq = 0
+        self.connected = True
+
+        self._send(proto.HELLO, name.encode("utf-8")[:32])
+        self._flush()
+
+    def wait_welcome(self, map_names):
+        """Block until WELCOME arrives; map_names indexes the server's map ids."""
+        self.map_names = map_names
+        while self.spawn is None and self.connected:
+            self._handle(self.sock.recv(65536) or self._closed())
+        self.sock.setblocking(False)
+        return self.spawn
+
+    # --------------------------------------------------------
+    # Outgoing
+    # --------------------------------------------------------
+    def _send(self, msg_type, payload):
+        self.out += proto.frame(msg_type, payload)
+
+    def _flush(self):
+        if not self.out or not self.connected:
+            return
+        try:
+            sent = self.sock.send(self.out)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._closed()
+            return
+        del self.out[:sent]
+
+    def send_move(self, dx, dy):
+        """Report a started tile step (Player.on_step)."""
+        facing = FACINGS.index(_facing_of(dx, dy))
+        self.seq = (self.seq + 1) & 0xFFFF
+        self._send(proto.MOVE, proto.MOVE_MSG.pack(self.seq, facing))
+        self._flush()
+
+    # --------------------------------------------------------
+    # Incoming
+    # --------------------------------------------------------
+    def _closed(self):
+        if self.connected:
+            print("net_client: disconnected from server")
+        self.connected = False
+        return b""
+
+    def poll(self, dt):
+        """Read everything available and advance remote interpolation."""
+        if self.connected:
+            self._flush()
+            while True:
+                try:
+                    data = self.sock.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    data = b""
+                if not data:
+                    self._closed()
+                    break
+                self._handle(data)
+
+        step = dt / MOVE_TIME
+        for r in self.remotes.values():
+            if r.t < 1.0:
+                r.t = min(1.0, r.t + step)
+
+    def _handle(self, data):
+        names = self.map_names
+        for msg_type, payload in self.reader.feed(data):
+            if msg_type == proto.STATE:
+                self._apply_state(payload)
+            elif msg_type == proto.ACK:
+                seq, ok, map_id, x, y = proto.ACK_MSG.unpack(payload)
+                self.acks.append((seq, bool(ok), names[map_id], x, y))
+            elif msg_type == proto.WELCOME:
+                pid, map_id, x, y, facing = proto.WELCOME_MSG.unpack(payload)
+                self.player_id = pid
+                self.spawn = (names[map_id], x, y, facing)
+
+    def _apply_state(self, payload):
+        _, records = proto.iter_records(payload)
+        names = self.map_names
+        remotes = self.remotes
+        for rec in records:
+            kind, pid = rec[0], rec[1]
+            if kind == proto.REC_DELTA:
+                r = remotes.get(pid)
+                if r is not None:
+                    r.facing = rec[4]
+                    if rec[2] or rec[3]:
+                        r.move_to(r.x + rec[2], r.y + rec[3])
+            elif kind == proto.REC_FULL:
+                map_name, x, y, facing = names[rec[2]], rec[3], rec[4], rec[5]
+                r = remotes.get(pid)
+                if r is None:
+                    remotes[pid] = RemotePlayer(pid, map_name, x, y, facing)
+                else:
+                    r.facing = facing
+                    if r.map != map_name or abs(r.x - x) + abs(r.y - y) > 2:
+                        r.map, r.x, r.y = map_name, x, y
+                        r.snap()
+                    else:
+                        r.move_to(x, y)
+            else:
+                remotes.pop(pid, None)
+
+    # --------------------------------------------------------
+    # Drawing
+    # --------------------------------------------------------
+    def draw(self, surface, camera, frames, maps, min_y=None, max_y=None):
+        """
+        Blit remote players standing on one of `maps` (the loaded map
+        names). frames: facing name → Surface (Player.frames).
+        """
+        seq = []
+        for r in self.remotes.values():
+            if r.id == self.player_id or r.map not in maps:
+                continue
+            x, y = r.position()
+            if (min_y is not None and y < min_y) or (max_y is not None and y >= max_y):
+                continue
+            image = frames[FACINGS[r.facing]]
+            rect = camera.apply(pygame.Rect(x, y - (image.get_height() - TILESIZE), TILESIZE, image.get_height()))
+            seq.append((y, image, rect.topleft))
+        seq.sort(key=lambda s: s[0])
+        surface.blits([(image, pos) for _, image, pos in seq], False)
+
+    def close(self):
+        self.connected = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _facing_of(dx, dy):
+    if dx > 0:
+        return "right"
+    if dx < 0:
+        return "left"
+    if dy < 0:
+        return "up"
+    return "down"
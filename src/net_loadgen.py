@@ -0,0 +1,137 @@
+# net_loadgen.py
+"""
+Load generator for net_server.py: N bot clients on one event loop.
+
+    python src/net_loadgen.py -n 300 --seconds 20 [--spawn-server]
+
+Each bot walks in random directions at walking speed (one MOVE per
+MOVE_TIME) and decodes every STATE message it gets. At the end it prints
+moves/s, ACK round-trip percentiles, accepted moves and received
+state traffic. --spawn-server starts a server subprocess on the given
+port first, and stops it again at the end.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from settings import MOVE_TIME, NET_HOST, NET_PORT
+import net_protocol as proto
+
+
+class Stats:
+    def __init__(self):
+        self.moves = 0
+        self.accepted = 0
+        self.rtts = []
+        self.states = 0
+        self.records = 0
+        self.bytes_in = 0
+        self.errors = 0
+
+
+async def bot(host, port, stats, stop_at, rng):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.errors += 1
+        return
+    writer.write(proto.frame(proto.HELLO, b"bot"))
+    sent = {}        # seq → send time
+    facing = rng.randrange(4)
+
+    async def receive():
+        while True:
+            head = await reader.readexactly(proto.FRAME.size)
+            length, msg_type = proto.FRAME.unpack(head)
+            payload = await reader.readexactly(length - 1) if length > 1 else b""
+            stats.bytes_in += proto.FRAME.size + len(payload)
+            if msg_type == proto.ACK:
+                seq, ok = proto.ACK_MSG.unpack(payload)[:2]
+                t = sent.pop(seq, None)
+                if t is not None:
+                    stats.rtts.append(time.perf_counter() - t)
+                stats.accepted += ok
+            elif msg_type == proto.STATE:
+                stats.states += 1
+                stats.records += len(proto.iter_records(payload)[1])
+
+    recv_task = asyncio.create_task(receive())
+    seq = 0
+    try:
+        await asyncio.sleep(rng.random() * MOVE_TIME)
+        while time.perf_counter() < stop_at and not recv_task.done():
+            # mostly keep walking the same way, sometimes turn
+            if rng.random() < 0.3:
+                facing = rng.randrange(4)
+            seq = (seq + 1) & 0xFFFF
+            sent[seq] = time.perf_counter()
+            writer.write(proto.frame(proto.MOVE, proto.MOVE_MSG.pack(seq, facing)))
+            stats.moves += 1
+            await asyncio.sleep(MOVE_TIME)
+    finally:
+        recv_task.cancel()
+        writer.close()
+    if recv_task.done() and not recv_task.cancelled() and recv_task.exception() is not None:
+        stats.errors += 1
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(args):
+    stats = Stats()
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    stop_at = start + args.seconds
+    bots = []
+    for _ in range(args.clients):
+        bots.append(asyncio.create_task(bot(args.host, args.port, stats, stop_at, random.Random(rng.random()))))
+        await asyncio.sleep(args.ramp / max(1, args.clients))
+    await asyncio.gather(*bots)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.clients} clients for {elapsed:.1f}s")
+    print(f"  moves     {stats.moves / elapsed:.0f}/s ({stats.accepted / max(1, stats.moves):.0%} accepted)")
+    print(f"  ack rtt   p50 {percentile(stats.rtts, 0.5) * 1000:.2f} ms  p99 {percentile(stats.rtts, 0.99) * 1000:.2f} ms")
+    print(f"  state     {stats.states / elapsed:.0f} msgs/s, {stats.records / elapsed:.0f} records/s")
+    print(f"  received  {stats.bytes_in / elapsed / 1024:.1f} KiB/s")
+    if stats.errors:
+        print(f"  errors    {stats.errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which bots connect")
+    parser.add_argument("--host", default=NET_HOST)
+    parser.add_argument("--port", type=int, default=NET_PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--spawn-server", action="store_true")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        server = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "net_server.py"),
+            "--host", args.host, "--port", str(args.port)
+        ])
+        time.sleep(2.0)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
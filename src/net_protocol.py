@@ -0,0 +1,117 @@
+# net_protocol.py
+"""
+Binary messages shared by net_server.py, net_client.py and net_loadgen.py.
+
+Every message is framed as  u16 length | u8 type | payload  (little
+endian, length counts type + payload).
+
+client → server
+  HELLO   name (utf-8)
+  MOVE    u16 seq, u8 facing (entities.FACINGS index)
+
+server → client
+  WELCOME u32 player id, u16 map id, i32 x, i32 y, u8 facing
+  ACK     u16 seq, u8 ok, u16 map id, i32 x, i32 y   (authoritative position)
+  STATE   u32 tick, then records until the end of the message:
+            DELTA   u32 id, u8 kind, i8 dx, i8 dy, u8 facing
+            FULL    u32 id, u8 kind, u16 map id, i32 x, i32 y, u8 facing
+            REMOVE  u32 id, u8 kind
+
+Positions are world tiles of the world the map belongs to (the stitched
+overworld, or the interior on its own). Map ids index the sorted map
+names of the manifest.
+"""
+import struct
+
+HELLO, MOVE, WELCOME, ACK, STATE = 1, 2, 3, 4, 5
+REC_DELTA, REC_FULL, REC_REMOVE = 1, 2, 3
+
+FRAME = struct.Struct("<HB")
+MOVE_MSG = struct.Struct("<HB")
+WELCOME_MSG = struct.Struct("<IHiiB")
+ACK_MSG = struct.Struct("<HBHii")
+STATE_HEAD = struct.Struct("<I")
+REC_HEAD = struct.Struct("<IB")
+DELTA_REC = struct.Struct("<IBbbB")
+FULL_REC = struct.Struct("<IBHiiB")
+REMOVE_REC = struct.Struct("<IB")
+
+MAX_PAYLOAD = 0xFFFF - 1
+
+
+def frame(msg_type, payload=b""):
+    return FRAME.pack(len(payload) + 1, msg_type) + payload
+
+
+def pack_delta(pid, dx, dy, facing):
+    return DELTA_REC.pack(pid, REC_DELTA, dx, dy, facing)
+
+
+def pack_full(pid, map_id, x, y, facing):
+    return FULL_REC.pack(pid, REC_FULL, map_id, x, y, facing)
+
+
+def pack_remove(pid):
+    return REMOVE_REC.pack(pid, REC_REMOVE)
+
+
+def state_frames(tick, records):
+    """Split a STATE update into frames that fit the u16 length field."""
+    head = STATE_HEAD.pack(tick)
+    frames = []
+    chunk, size = [], len(head)
+    for rec in records:
+        if size + len(rec) > MAX_PAYLOAD and chunk:
+            frames.append(frame(STATE, head + b"".join(chunk)))
+            chunk, size = [], len(head)
+        chunk.append(rec)
+        size += len(rec)
+    if chunk:
+        frames.append(frame(STATE, head + b"".join(chunk)))
+    return frames
+
+
+def iter_records(payload):
+    """Decode a STATE payload → (tick, [(kind, id, fields...)])."""
+    (tick,) = STATE_HEAD.unpack_from(payload, 0)
+    pos = STATE_HEAD.size
+    out = []
+    n = len(payload)
+    while pos < n:
+        pid, kind = REC_HEAD.unpack_from(payload, pos)
+        if kind == REC_DELTA:
+            _, _, dx, dy, facing = DELTA_REC.unpack_from(payload, pos)
+            out.append((kind, pid, dx, dy, facing))
+            pos += DELTA_REC.size
+        elif kind == REC_FULL:
+            _, _, map_id, x, y, facing = FULL_REC.unpack_from(payload, pos)
+            out.append((kind, pid, map_id, x, y, facing))
+            pos += FULL_REC.size
+        elif kind == REC_REMOVE:
+            out.append((kind, pid))
+            pos += REMOVE_REC.size
+        else:
+            raise ValueError(f"bad record kind {kind}")
+    return tick, out
+
+
+class FrameReader:
+    """Incremental frame splitter for non-blocking sockets."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def feed(self, data):
+        self.buf += data
+        frames = []
+        buf = self.buf
+        pos = 0
+        while len(buf) - pos >= FRAME.size:
+            length, msg_type = FRAME.unpack_from(buf, pos)
+            end = pos + 2 + length
+            if end > len(buf):
+                break
+            frames.append((msg_type, bytes(buf[pos + FRAME.size:end])))
+            pos = end
+        del buf[:pos]
+        return frames
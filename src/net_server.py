@@ -0,0 +1,368 @@
+# net_server.py
+"""
+Authoritative multiplayer server for the stitched overworld.
+
+    python src/net_server.py [--host 127.0.0.1] [--port 7777] [--tick 20]
+
+Clients send one MOVE per tile step. The server checks it with the same
+MapManager.can_step rules as Player.can_move, executes warps itself and
+answers with an ACK carrying the authoritative position.
+
+Every tick, players see the others in their area of interest: the same
+map plus the maps adjacent to it in the world manifest (interiors: the
+same map only). Updates are binary records (net_protocol.py). A player
+that moved within the same map is sent as a small DELTA, and anything
+else as FULL. The records of everyone who changed in a tick are encoded
+once per map, so each client's message is just those per-map blobs
+joined together.
+"""
+import argparse
+import asyncio
+import os
+import struct
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from settings import (
+    MAPS_FOLDER, MOVE_TIME, WORLD_ROOT, NET_HOST, NET_PORT, NET_TICK_RATE,
+    NET_SPAWN_MAP, NET_SPAWN_TILE
+)
+from world_manager import MapManager
+from entities import FACING_DELTA
+import net_protocol as proto
+
+# a step may arrive this much earlier than the sprint speed allows (jitter)
+MOVE_TOLERANCE = 0.03
+# clients that fall this far behind on reading are dropped
+MAX_WRITE_BUFFER = 256 * 1024
+
+
+class ServerWorlds:
+    """Collision-only MapManagers: the overworld, plus each visited interior."""
+
+    def __init__(self, maps_folder=MAPS_FOLDER, world_root=WORLD_ROOT):
+        self.maps_folder = maps_folder
+        self.overworld = MapManager(maps_folder, load_tiles=False)
+        self.overworld.build_world(world_root, load_connected=True, streaming=False)
+        self.manifest = self.overworld.manifest
+        self.interiors = {}
+        self.map_names = sorted(self.manifest.maps)
+        self.map_ids = {name: i for i, name in enumerate(self.map_names)}
+        self._aoi = {}
+
+    def world(self, map_name):
+        """MapManager holding map_name, or None if it doesn't exist."""
+        if map_name not in self.manifest:
+            return None
+        if self.manifest.is_overworld(map_name):
+            return self.overworld
+        mm = self.interiors.get(map_name)
+        if mm is None:
+            mm = MapManager(self.maps_folder, load_tiles=False)
+            try:
+                mm.load_single_map(map_name)
+            except Exception as e:
+                print("net_server: failed to load", map_name, e)
+                return None
+            self.interiors[map_name] = mm
+        return mm
+
+    def land(self, map_name, tx, ty):
+        """World tile of map-local tile (tx, ty), or None."""
+        mm = self.world(map_name)
+        inst = mm.instances.get(map_name) if mm is not None else None
+        if inst is None:
+            return None
+        return inst.world_x + tx, inst.world_y + ty
+
+    def map_at(self, mm, tx, ty):
+        hit = mm.locate_tile(tx, ty)
+        return hit[0].name if hit else None
+
+    def aoi(self, map_name):
+        maps = self._aoi.get(map_name)
+        if maps is None:
+            maps = frozenset([map_name] + list(self.manifest.neighbors(map_name)))
+            self._aoi[map_name] = maps
+        return maps
+
+
+class ClientState:
+    __slots__ = ("id", "name", "writer", "world", "map", "x", "y", "facing", "ready_at", "aoi", "sent_aoi")
+
+    def __init__(self, pid, name, writer):
+        self.id = pid
+        self.name = name
+        self.writer = writer
+        self.world = None
+        self.map = None
+        self.x = self.y = 0
+        self.facing = 0
+        self.ready_at = 0.0
+        self.aoi = frozenset()
+        self.sent_aoi = None   # AOI the client was last synced for (None = needs a snapshot)
+
+
+class GameServer:
+    def __init__(self, maps_folder=MAPS_FOLDER, tick_rate=NET_TICK_RATE):
+        self.worlds = ServerWorlds(maps_folder)
+        self.tick_rate = tick_rate
+        self.tick = 0
+        self.clients = {}        # id → ClientState
+        self.by_map = {}         # map name → set of ids
+        self.next_id = 1
+
+        self.dirty = {}          # id → (map, x, y) at its first change this tick
+        self.left = []           # (id, map) disconnected this tick
+
+        # stats since the last report
+        self.stat_moves = 0
+        self.stat_bytes = 0
+        self.stat_tick_time = 0.0
+        self.stat_tick_max = 0.0
+        self.stat_ticks = 0
+
+    # --------------------------------------------------------
+    # Membership
+    # --------------------------------------------------------
+    def _place(self, c, mm, map_name, x, y):
+        if c.id not in self.dirty and c.map is not None:
+            self.dirty[c.id] = (c.map, c.x, c.y)
+        elif c.map is None:
+            self.dirty[c.id] = (None, x, y)
+        if map_name != c.map:
+            if c.map is not None:
+                self.by_map[c.map].discard(c.id)
+            self.by_map.setdefault(map_name, set()).add(c.id)
+            c.aoi = self.worlds.aoi(map_name)
+        c.world, c.map, c.x, c.y = mm, map_name, x, y
+
+    def join(self, name, writer):
+        c = ClientState(self.next_id, name, writer)
+        self.next_id += 1
+        mm = self.worlds.world(NET_SPAWN_MAP)
+        x, y = self.worlds.land(NET_SPAWN_MAP, *NET_SPAWN_TILE)
+        self._place(c, mm, NET_SPAWN_MAP, x, y)
+        self.clients[c.id] = c
+        writer.write(proto.frame(proto.WELCOME, proto.WELCOME_MSG.pack(
+            c.id, self.worlds.map_ids[c.map], c.x, c.y, c.facing
+        )))
+        return c
+
+    def leave(self, c):
+        if self.clients.pop(c.id, None) is None:
+            return
+        self.by_map.get(c.map, set()).discard(c.id)
+        self.dirty.pop(c.id, None)
+        self.left.append((c.id, c.map))
+
+    # --------------------------------------------------------
+    # Moves
+    # --------------------------------------------------------
+    def on_move(self, c, seq, facing, now):
+        self.stat_moves += 1
+        ok = False
+        if now >= c.ready_at - MOVE_TOLERANCE:
+            if facing != c.facing:
+                self.dirty.setdefault(c.id, (c.map, c.x, c.y))
+                c.facing = facing
+            dx, dy = FACING_DELTA[facing]
+            tx, ty = c.x + dx, c.y + dy
+            mm = c.world
+            # same test as Player.can_move, and no walking off the maps
+            if mm.locate_tile(tx, ty) is not None and mm.can_step(tx, ty, dx, dy):
+                ok = True
+                c.ready_at = now + MOVE_TIME * 0.5   # sprint speed
+                self._place(c, mm, self.worlds.map_at(mm, tx, ty) or c.map, tx, ty)
+                warp = mm.warp_at(tx, ty)
+                if warp is not None:
+                    self._warp(c, warp)
+
+        c.writer.write(proto.frame(proto.ACK, proto.ACK_MSG.pack(
+            seq, ok, self.worlds.map_ids.get(c.map, 0), c.x, c.y
+        )))
+
+    def _warp(self, c, warp):
+        dest = warp.get("dest_map")
+        try:
+            dx, dy = int(warp.get("dest_x", 0)), int(warp.get("dest_y", 0))
+        except (TypeError, ValueError):
+            dx, dy = 0, 0
+        mm = self.worlds.world(dest)
+        pos = self.worlds.land(dest, dx, dy) if mm is not None else None
+        if pos is not None:
+            self._place(c, mm, dest, pos[0], pos[1])
+
+    # --------------------------------------------------------
+    # Broadcast
+    # --------------------------------------------------------
+    def _full(self, pid):
+        c = self.clients[pid]
+        return proto.pack_full(pid, self.worlds.map_ids[c.map], c.x, c.y, c.facing)
+
+    def broadcast(self):
+        self.tick += 1
+        blobs = {}           # map → [records of players that changed there]
+        moved = []           # (id, old map, new map)
+        for pid, (old_map, ox, oy) in self.dirty.items():
+            c = self.clients.get(pid)
+            if c is None:
+                continue
+            dx, dy = c.x - ox, c.y - oy
+            if old_map == c.map and -128 <= dx < 128 and -128 <= dy < 128:
+                rec = proto.pack_delta(pid, dx, dy, c.facing)
+            else:
+                rec = self._full(pid)
+                if old_map != c.map:
+                    moved.append((pid, old_map, c.map))
+            blobs.setdefault(c.map, []).append(rec)
+        blobs = {m: b"".join(recs) for m, recs in blobs.items()}
+
+        head = proto.STATE_HEAD.pack(self.tick)
+        snapshots = {}       # map → FULL records of everyone there (joins / AOI changes)
+        for c in list(self.clients.values()):
+            parts = []
+            if c.sent_aoi != c.aoi:
+                old = c.sent_aoi or frozenset()
+                for m in old - c.aoi:
+                    parts.extend(proto.pack_remove(pid) for pid in self.by_map.get(m, ()))
+                for m in c.aoi:
+                    snap = snapshots.get(m)
+                    if snap is None:
+                        snap = snapshots[m] = b"".join(self._full(pid) for pid in self.by_map.get(m, ()))
+                    parts.append(snap)
+                prev_aoi = old
+                c.sent_aoi = c.aoi
+            else:
+                prev_aoi = c.aoi
+                for m in c.aoi:
+                    blob = blobs.get(m)
+                    if blob:
+                        parts.append(blob)
+
+            for pid, old_map, new_map in moved:
+                if old_map in prev_aoi and new_map not in c.aoi:
+                    parts.append(proto.pack_remove(pid))
+            for pid, m in self.left:
+                if m in prev_aoi:
+                    parts.append(proto.pack_remove(pid))
+
+            if not parts:
+                continue
+            transport = c.writer.transport
+            if transport.is_closing() or transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                transport.abort()
+                continue
+            body = b"".join(parts)
+            if len(body) <= proto.MAX_PAYLOAD - proto.STATE_HEAD.size:
+                data = proto.frame(proto.STATE, head + body)
+            else:
+                data = b"".join(proto.state_frames(self.tick, self._split(parts)))
+            c.writer.write(data)
+            self.stat_bytes += len(data)
+
+        self.dirty.clear()
+        self.left.clear()
+
+    @staticmethod
+    def _split(parts):
+        # blobs → individual records so frames can be split on record boundaries
+        for part in parts:
+            pos = 0
+            while pos < len(part):
+                kind = part[pos + 4]
+                size = {proto.REC_DELTA: proto.DELTA_REC.size, proto.REC_FULL: proto.FULL_REC.size}.get(
+                    kind, proto.REMOVE_REC.size)
+                yield part[pos:pos + size]
+                pos += size
+
+    # --------------------------------------------------------
+    # asyncio plumbing
+    # --------------------------------------------------------
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        c = None
+        try:
+            while True:
+                head = await reader.readexactly(proto.FRAME.size)
+                length, msg_type = proto.FRAME.unpack(head)
+                payload = await reader.readexactly(length - 1) if length > 1 else b""
+                if c is None:
+                    if msg_type != proto.HELLO:
+                        break
+                    c = self.join(payload.decode("utf-8", "replace")[:32], writer)
+                elif msg_type == proto.MOVE:
+                    seq, facing = proto.MOVE_MSG.unpack(payload)
+                    if facing < len(FACING_DELTA):
+                        self.on_move(c, seq, facing, loop.time())
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            pass
+        finally:
+            if c is not None:
+                self.leave(c)
+            writer.close()
+
+    async def tick_loop(self):
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self.tick_rate
+        next_t = loop.time()
+        while True:
+            t0 = time.perf_counter()
+            self.broadcast()
+            spent = time.perf_counter() - t0
+            self.stat_tick_time += spent
+            self.stat_tick_max = max(self.stat_tick_max, spent)
+            self.stat_ticks += 1
+            next_t += period
+            delay = next_t - loop.time()
+            if delay < 0:
+                next_t = loop.time()   # overloaded: don't try to catch up
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def report_loop(self, interval=5.0):
+        while True:
+            await asyncio.sleep(interval)
+            ticks = max(1, self.stat_ticks)
+            print(
+                f"net_server: {len(self.clients)} clients | {self.stat_moves / interval:.0f} moves/s | "
+                f"{self.stat_bytes / interval / 1024:.1f} KiB/s out | tick avg "
+                f"{self.stat_tick_time / ticks * 1000:.2f} ms max {self.stat_tick_max * 1000:.2f} ms",
+                flush=True
+            )
+            self.stat_moves = self.stat_bytes = self.stat_ticks = 0
+            self.stat_tick_time = self.stat_tick_max = 0.0
+
+    async def serve(self, host=NET_HOST, port=NET_PORT, report=True):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        tasks = [asyncio.create_task(self.tick_loop())]
+        if report:
+            tasks.append(asyncio.create_task(self.report_loop()))
+        print(f"net_server: listening on {host}:{port}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=NET_HOST)
+    parser.add_argument("--port", type=int, default=NET_PORT)
+    parser.add_argument("--tick", type=int, default=NET_TICK_RATE, help="broadcasts per second")
+    parser.add_argument("--maps", default=MAPS_FOLDER)
+    args = parser.parse_args()
+
+    server = GameServer(args.maps, args.tick)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# observation.py
+"""
+Symbolic observation of the tiles around a point, read straight from the
+loaded maps' arrays (no rendering).
+
+ObservationBuilder fills an int32 array of shape (channels, height,
+width) covering a window of world tiles:
+
+  passable   1 if walkable (inside a map, no wall), else 0
+  ledges     TileMap.ledge_mask bits (bit d = ledge passable in direction d)
+  triggers   TRIGGER_WARP | TRIGGER_SIGN | TRIGGER_NPC
+  map_id     id of the map owning the tile, -1 outside every map
+  gid:<layer> one channel per tile layer, GID without flip bits
+
+The output buffer and scratch grids are allocated once; fill() only
+writes into them.
+"""
+import numpy as np
+
+from tilemap import TRIGGER_WARP, TRIGGER_SIGN
+
+TRIGGER_NPC = 4
+
+DEFAULT_LAYERS = ("floor", "grass", "grass2", "walls", "above")
+
+PASSABLE, LEDGES, TRIGGERS, MAP_ID = range(4)
+
+
+class ObservationBuilder:
+    dtype = np.int32
+
+    def __init__(self, width=15, height=15, layers=DEFAULT_LAYERS, map_ids=None):
+        self.width = width
+        self.height = height
+        self.layers = tuple(l.lower() for l in layers)
+        self.channels = ("passable", "ledges", "triggers", "map_id") + tuple("gid:" + l for l in self.layers)
+        self.shape = (len(self.channels), height, width)
+        self.map_ids = map_ids
+
+        self._covered = np.zeros((height, width), dtype=bool)
+        self._blocked = np.zeros((height, width), dtype=bool)
+        self._out = None
+
+    def channel(self, name):
+        return self.channels.index(name)
+
+    def window(self, center):
+        """(left, top) world tile of the window centred on a world tile."""
+        return center[0] - self.width // 2, center[1] - self.height // 2
+
+    def build(self, env, out):
+        """HeadlessEnv observation hook: window around the player."""
+        player = env.player
+        return self.fill(env.map_manager, (player.tile_x, player.tile_y), out, env.map_ids)
+
+    def fill(self, map_manager, center, out=None, map_ids=None):
+        """
+        Write the window around world tile `center` into out (allocated
+        once and reused when None). map_ids: map name → id; defaults to
+        the order of the manifest's map names.
+        """
+        if out is None:
+            if self._out is None:
+                self._out = np.zeros(self.shape, dtype=self.dtype)
+            out = self._out
+        if map_ids is None:
+            if self.map_ids is None:
+                self.map_ids = {n: i for i, n in enumerate(sorted(map_manager.manifest.maps))}
+            map_ids = self.map_ids
+
+        w, h = self.width, self.height
+        left, top = self.window(center)
+        covered, blocked = self._covered, self._blocked
+        out.fill(0)
+        out[MAP_ID].fill(-1)
+        covered.fill(False)
+        blocked.fill(False)
+
+        for name, inst in map_manager.instances.items():
+            tm = inst.map
+            mx = inst.world_x + tm.origin_tx
+            my = inst.world_y + tm.origin_ty
+            x0, x1 = max(left, mx), min(left + w, mx + tm.width)
+            y0, y1 = max(top, my), min(top + h, my + tm.height)
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            dst = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+            src = (slice(y0 - my, y1 - my), slice(x0 - mx, x1 - mx))
+
+            covered[dst] = True
+            np.logical_or(blocked[dst], tm.blocked[src], out=blocked[dst])
+            np.bitwise_or(out[LEDGES][dst], tm.ledge_mask[src], out=out[LEDGES][dst])
+            np.bitwise_or(out[TRIGGERS][dst], tm.trigger_mask[src], out=out[TRIGGERS][dst])
+            out[MAP_ID][dst] = map_ids.get(name, -1)
+
+            for k, layer in enumerate(self.layers):
+                idx = tm.layer_map.get(layer)
+                if idx is not None:
+                    view = out[4 + k][dst]
+                    np.maximum(view, tm.layer_gids[idx][src], out=view)
+
+        # passable = covered and not blocked by any map sharing the tile
+        np.greater(covered, blocked, out=out[PASSABLE])
+
+        triggers = out[TRIGGERS]
+        for tx, ty in map_manager.occupancy:
+            x, y = tx - left, ty - top
+            if 0 <= x < w and 0 <= y < h:
+                triggers[y, x] |= TRIGGER_NPC
+
+        return out
@@ -0,0 +1,230 @@
+# particles.py
+"""
+Per-map weather (rain, falling leaves, snow) as NumPy particle arrays.
+
+Maps pick their weather with custom properties, like world_x / world_y:
+
+  weather          "rain", "leaves" or "snow" (see WEATHER)
+  weather_density  particle count multiplier (default 1.0)
+
+Particles live in a box the size of the view plus a margin, in world
+space modulo the box. They drift with the world when the camera moves
+and wrap around instead of being respawned. One update is a single
+array expression for all particles. Streaks and dots are blended
+straight into the surface's pixels (surfarray); sprites (leaves) go
+through one Surface.blits call.
+
+Game draws the weather after the "above" layer and before the day/night
+overlay, so night darkens it and lamp light still shows through.
+"""
+import math
+
+import numpy as np
+import pygame
+
+from settings import WEATHER_MAX_PARTICLES, WEATHER_FADE_TIME
+
+# style: "streak" (line along the velocity), "dot", or "sprite"
+# vel: ((vx min, vx max), (vy min, vy max)) pixels/s
+# sway: (amplitude px, min Hz, max Hz) sideways sine drift
+# overcast: (colour, alpha) blended over the scene under the particles
+WEATHER = {
+    "rain": {
+        "count": 1600, "style": "streak", "vel": ((-90, -60), (560, 700)),
+        "length": 12, "color": (175, 195, 235), "alpha": 0.55, "overcast": ((30, 35, 60), 80),
+    },
+    "snow": {
+        "count": 900, "style": "dot", "vel": ((-20, 20), (35, 70)), "sway": (8, 0.3, 0.9),
+        "length": 2, "color": (250, 250, 255), "alpha": 0.9, "overcast": ((200, 205, 225), 40),
+    },
+    "leaves": {
+        "count": 140, "style": "sprite", "vel": ((-45, -15), (35, 65)), "sway": (16, 0.4, 1.2),
+        "colors": ((201, 112, 38), (222, 161, 52), (163, 72, 33), (120, 150, 50)), "size": 6,
+    },
+}
+
+MARGIN = 32
+_ROTATIONS = 8
+
+
+def _leaf_sprites(colors, size):
+    """colors × rotations small leaf surfaces, indexed [color * _ROTATIONS + rotation]."""
+    sprites = []
+    for color in colors:
+        base = pygame.Surface((size * 2, size), pygame.SRCALPHA)
+        pygame.draw.ellipse(base, color, base.get_rect())
+        pygame.draw.line(base, tuple(max(0, c - 60) for c in color), (1, size // 2), (size * 2 - 2, size // 2))
+        for r in range(_ROTATIONS):
+            sprites.append(pygame.transform.rotate(base, r * 180.0 / _ROTATIONS))
+    return sprites
+
+
+class WeatherSystem:
+    def __init__(self, view_w, view_h, seed=None, max_particles=WEATHER_MAX_PARTICLES):
+        self.view_w = view_w
+        self.view_h = view_h
+        self.box = np.array([view_w + 2 * MARGIN, view_h + 2 * MARGIN], dtype=np.float32)
+        self.max_particles = max_particles
+        self.rng = np.random.default_rng(seed)
+
+        self.name = None          # current preset
+        self.wanted = None        # (preset, density) the current map asks for
+        self.density = 1.0
+        self.intensity = 0.0      # 0..1, fades over WEATHER_FADE_TIME
+        self.time = 0.0
+        self.count = 0
+
+        self.pos = np.zeros((0, 2), dtype=np.float32)
+        self.vel = np.zeros((0, 2), dtype=np.float32)
+        self.phase = np.zeros(0, dtype=np.float32)
+        self.freq = np.zeros(0, dtype=np.float32)
+        self.kind = np.zeros(0, dtype=np.int32)
+        self._sprite_cache = {}
+        self._followed = None
+        self._overcast = pygame.Surface((view_w, view_h))
+
+    # --------------------------------------------------------
+    # Configuration
+    # --------------------------------------------------------
+    @staticmethod
+    def weather_of(tm):
+        """(preset, density) from a TileMap's properties, or (None, 0)."""
+        if tm is None:
+            return None, 0.0
+        name = tm.properties.get("weather")
+        if name not in WEATHER:
+            if name:
+                print("weather: unknown preset", name)
+            return None, 0.0
+        try:
+            density = float(tm.properties.get("weather_density", 1.0))
+        except (TypeError, ValueError):
+            density = 1.0
+        return name, density
+
+    def follow(self, tm):
+        """Use the weather of TileMap tm (the map the player is on)."""
+        if tm is not self._followed:
+            self._followed = tm
+            self.set_weather(*self.weather_of(tm))
+
+    def set_weather(self, name, density=1.0):
+        """Fade to preset `name` (None = clear sky)."""
+        self.wanted = (name, density)
+
+    def _spawn(self, name, density):
+        self.name = name
+        self.density = density
+        if name is None:
+            self.count = 0
+            return
+        preset = WEATHER[name]
+        n = max(0, min(self.max_particles, int(preset["count"] * density)))
+        rng = self.rng
+        (vx0, vx1), (vy0, vy1) = preset["vel"]
+        self.pos = (rng.random((n, 2), dtype=np.float32) * self.box).astype(np.float32)
+        self.vel = np.stack([rng.uniform(vx0, vx1, n), rng.uniform(vy0, vy1, n)], axis=1).astype(np.float32)
+        self.phase = rng.uniform(0, 2 * math.pi, n).astype(np.float32)
+        amp, f0, f1 = preset.get("sway", (0, 0, 0))
+        self.freq = (rng.uniform(f0, f1, n) * 2 * math.pi).astype(np.float32)
+        ncolors = len(preset.get("colors", ())) or 1
+        self.kind = rng.integers(0, ncolors, n).astype(np.int32)
+        self.count = n
+
+    # --------------------------------------------------------
+    # Update
+    # --------------------------------------------------------
+    def update(self, dt):
+        self.time += dt
+        fade = dt / WEATHER_FADE_TIME if WEATHER_FADE_TIME > 0 else 1.0
+        if self.wanted is not None and self.wanted != (self.name, self.density):
+            # fade the old weather out, then switch
+            self.intensity = max(0.0, self.intensity - fade)
+            if self.intensity == 0.0 or self.name is None:
+                self._spawn(*self.wanted)
+        elif self.name is not None:
+            self.intensity = min(1.0, self.intensity + fade)
+
+        if self.count:
+            self.pos += self.vel * dt
+            np.mod(self.pos, self.box, out=self.pos)
+
+    # --------------------------------------------------------
+    # Drawing
+    # --------------------------------------------------------
+    def _screen_positions(self, camera, n):
+        pos = self.pos[:n]
+        x = np.mod(pos[:, 0] - camera.x, self.box[0]) - MARGIN
+        y = np.mod(pos[:, 1] - camera.y, self.box[1]) - MARGIN
+        preset = WEATHER[self.name]
+        if "sway" in preset:
+            x += preset["sway"][0] * np.sin(self.phase[:n] + self.freq[:n] * self.time)
+        return x, y
+
+    def draw(self, surface, camera):
+        if self.name is None or self.intensity <= 0.0 or not self.count:
+            return
+        preset = WEATHER[self.name]
+        n = int(self.count * self.intensity)
+        if preset.get("overcast"):
+            # a per-surface-alpha blit: much cheaper than a BLEND_MULT fill
+            color, alpha = preset["overcast"]
+            self._overcast.fill(color)
+            self._overcast.set_alpha(int(alpha * self.intensity))
+            surface.blit(self._overcast, (0, 0))
+        if not n:
+            return
+        x, y = self._screen_positions(camera, n)
+        if preset["style"] == "sprite":
+            self._draw_sprites(surface, preset, x, y, n)
+        else:
+            self._draw_pixels(surface, preset, x, y, n)
+
+    def _draw_pixels(self, surface, preset, x, y, n):
+        w, h = surface.get_size()
+        length = preset["length"]
+        if preset["style"] == "streak":
+            # unit vector back along the velocity
+            vel = self.vel[:n]
+            speed = np.maximum(np.hypot(vel[:, 0], vel[:, 1]), 1e-3)
+            ux, uy = vel[:, 0] / speed, vel[:, 1] / speed
+        else:
+            # dots: a small vertical run
+            ux, uy = np.zeros(n, dtype=np.float32), np.ones(n, dtype=np.float32)
+        k = np.arange(length, dtype=np.float32)
+        xs = (x[:, None] - ux[:, None] * k).astype(np.int32).ravel()
+        ys = (y[:, None] - uy[:, None] * k).astype(np.int32).ravel()
+        keep = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        xs, ys = xs[keep], ys[keep]
+        if not len(xs):
+            return
+
+        a = int(preset["alpha"] * 256)
+        if surface.get_bytesize() == 4:
+            # blend packed pixels: two 8-bit lanes at a time (bytes 0+2,
+            # then byte 1), byte 3 (alpha / unused) kept as is
+            c = np.uint32(surface.map_rgb(preset["color"]))
+            px = pygame.surfarray.pixels2d(surface)
+            under = px[xs, ys].astype(np.uint32)
+            ia, a = np.uint32(256 - a), np.uint32(a)
+            rb = (((under & 0xFF00FF) * ia + (c & 0xFF00FF) * a) >> 8) & 0xFF00FF
+            g = (((under & 0x00FF00) * ia + (c & 0x00FF00) * a) >> 8) & 0x00FF00
+            px[xs, ys] = (under & 0xFF000000) | rb | g
+        else:
+            color = np.array(preset["color"], dtype=np.int32)
+            px = pygame.surfarray.pixels3d(surface)
+            under = px[xs, ys].astype(np.int32)
+            px[xs, ys] = (under + (((color - under) * a) >> 8)).astype(np.uint8)
+        del px
+
+    def _draw_sprites(self, surface, preset, x, y, n):
+        key = (self.name, preset["size"])
+        sprites = self._sprite_cache.get(key)
+        if sprites is None:
+            sprites = self._sprite_cache[key] = _leaf_sprites(preset["colors"], preset["size"])
+        # tumble: rotation follows the sway phase
+        rot = (((self.phase[:n] + self.freq[:n] * self.time) * (_ROTATIONS / math.pi)).astype(np.int32)) % _ROTATIONS
+        idx = (self.kind[:n] * _ROTATIONS + rot).tolist()
+        xs = x.astype(np.int32).tolist()
+        ys = y.astype(np.int32).tolist()
+        surface.blits([(sprites[i], (sx, sy)) for i, sx, sy in zip(idx, xs, ys)], False)
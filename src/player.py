@@ -1,4 +1,6 @@
 # player.py
+from collections import deque
+
 import pygame
 from settings import PLAYER_IMAGE, TILESIZE, MOVE_TIME
 from utils import resource_path
@@ -41,12 +43,20 @@ class Player:
         self.target_pos = self.start_pos.copy()
         self.move_timer = 0
 
+        # tiles queued by follow_path (click-to-move / scripted walkers)
+        self.path = deque()
+
         self.debug = debug
 
         # interaction flags (read by Game)
         self.pending_sign_text = None
         self.pending_warp = None
 
+        # callable(dx, dy) after each started tile step (net client)
+        self.on_step = None
+        # callable(tx, ty) after each completed step that didn't warp (encounters)
+        self.on_step_done = None
+
     # ----------------------------------------------------------
 
     def set_direction(self, dx, dy):
@@ -73,18 +83,9 @@ class Player:
     # ----------------------------------------------------------
 
     def can_move(self, tx, ty, dx, dy):
-        test_rect = pygame.Rect(tx * TILESIZE, ty * TILESIZE, TILESIZE, FEET_HEIGHT)
-
-        for ledge in self.map_manager.get_all_ledges():
-            if test_rect.colliderect(ledge["rect"]):
-                if not self._ledge_allows(ledge["dir"], dx, dy):
-                    return False
-
-        for wall in self.map_manager.get_all_collisions():
-            if test_rect.colliderect(wall):
-                return False
-
-        return True
+        # per-tile lookups in the maps' blocked/ledge grids, same rules as
+        # testing the feet rect against every wall and ledge rect
+        return self.map_manager.can_step(tx, ty, dx, dy)
 
     # ----------------------------------------------------------
 
@@ -102,6 +103,25 @@ class Player:
             self.tile_y = next_ty
             self.move_timer = 0
             self.moving = True
+            if self.on_step is not None:
+                self.on_step(dx, dy)
+
+    # ----------------------------------------------------------
+
+    def follow_path(self, path):
+        """Walk a NavGraph.find_path result one tile per step; None/[] stops."""
+        self.path = deque(path or ())
+
+    def _next_path_step(self):
+        if not self.path:
+            return 0, 0
+        tx, ty = self.path[0]
+        dx, dy = tx - self.tile_x, ty - self.tile_y
+        if abs(dx) + abs(dy) != 1:
+            # path no longer starts next to us (warped, rebuilt world...)
+            self.path.clear()
+            return 0, 0
+        return dx, dy
 
     # ----------------------------------------------------------
 
@@ -117,6 +137,13 @@ class Player:
         elif controls.actions["down"]:
             dy = 1
 
+        following = False
+        if dx or dy:
+            self.path.clear()  # manual input cancels click-to-move
+        elif not self.moving and self.path:
+            dx, dy = self._next_path_step()
+            following = bool(dx or dy)
+
         # update facing even if blocked
         if dx or dy:
             self.set_direction(dx, dy)
@@ -132,6 +159,11 @@ class Player:
 
         if not self.moving and (dx or dy):
             self.start_move(dx, dy)
+            if following:
+                if self.moving:
+                    self.path.popleft()
+                else:
+                    self.path.clear()  # blocked since the path was planned
 
         if self.moving:
             self.move_timer += dt * speed_mult
@@ -147,15 +179,13 @@ class Player:
                 warp = self.check_for_warp()
                 if warp:
                     self.pending_warp = warp
+                elif self.on_step_done is not None:
+                    self.on_step_done(self.tile_x, self.tile_y)
 
     # ----------------------------------------------------------
 
     def check_for_warp(self):
-        feet = pygame.Rect(self.rect.x, self.rect.y, TILESIZE, FEET_HEIGHT)
-        for warp in self.map_manager.get_all_warps():
-            if feet.colliderect(warp["rect"]):
-                return warp
-        return None
+        return self.map_manager.warp_at(self.rect.x // TILESIZE, self.rect.y // TILESIZE)
 
     # ----------------------------------------------------------
 
@@ -173,10 +203,7 @@ class Player:
             FEET_HEIGHT
         )
 
-        for sign in self.map_manager.get_all_signs():
-            if rect.colliderect(sign["rect"]):
-                return sign["text"]
-        return None
+        return self.map_manager.sign_at_rect(rect)
 
     # ----------------------------------------------------------
 
@@ -0,0 +1,266 @@
+# profiler.py
+"""
+In-game profiling that writes collapsed stacks ("a;b;c 42" per line),
+the input format of flamegraph.pl, speedscope and inferno.
+
+  F9   start / stop the sampler: a daemon thread that reads the main
+       thread's stack through sys._current_frames() every
+       PROFILE_INTERVAL seconds. Overhead is one stack walk per sample,
+       and nothing at all in the game's own code.
+  F10  deterministic cProfile capture of the next PROFILE_FRAMES frames.
+       Also saved as a .prof file for pstats / snakeviz.
+
+POKEMON_PROFILE=sample or POKEMON_PROFILE=cprofile[:frames] starts one
+at launch.
+
+Every sampled stack is rooted at "<region>;<time of day>", so one
+flamegraph splits e.g. night viridian_city from day pallet_town. A
+cProfile capture uses the region and phase at its start.
+Files land in PROFILE_DIR (under the project root, see
+utils.user_data_path) with a .json sidecar holding the tags.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from settings import PROFILE_DIR, PROFILE_INTERVAL, PROFILE_FRAMES
+from utils import user_data_path
+
+
+def _frame_label(code):
+    # flamegraph tools split on ";" and the count on the last space
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _pstats_label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ":")                 # built-ins: "<method 'blit' ...>"
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def write_collapsed(path, counts):
+    """counts: {(frame, ..., leaf): count} → collapsed-stack file, heaviest first."""
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+            if n > 0:
+                f.write(";".join(stack) + " " + str(int(n)) + "\n")
+
+
+# --------------------------------------------------------
+# Statistical sampler
+# --------------------------------------------------------
+class StackSampler:
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.interval = interval
+        self.tags = ()                 # root frames, replaced (not mutated) by the game thread
+        self.counts = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self._labels = {}              # code object → label
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        self.counts.clear()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        labels = self._labels
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            del frame
+            stack.reverse()
+            self.counts[self.tags + tuple(stack)] += 1
+            self.samples += 1
+
+
+# --------------------------------------------------------
+# cProfile → collapsed stacks
+# --------------------------------------------------------
+def pstats_to_collapsed(stats, min_us=1.0, max_depth=96):
+    """
+    cProfile only records caller → callee edges, not whole stacks, so
+    stacks are rebuilt top-down from the roots: a function's time on a
+    path is split between its callees by their share of the edge times.
+    Counts are microseconds.
+    """
+    table = stats.stats        # func → (cc, nc, tottime, cumtime, callers)
+    callees = {}
+    for func, (_, _, _, _, callers) in table.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [f for f, v in table.items() if not any(c in table for c in v[4])]
+    out = Counter()
+    labels = {}
+
+    def label(func):
+        lab = labels.get(func)
+        if lab is None:
+            lab = labels[func] = _pstats_label(func)
+        return lab
+
+    # explicit stack: (func, time on this path in seconds, path labels, funcs on path)
+    todo = [(f, table[f][3], (label(f),), frozenset([f])) for f in roots]
+    while todo:
+        func, weight, path, on_path = todo.pop()
+        _, _, tottime, cumtime, _ = table[func]
+        if cumtime <= 0 or weight * 1e6 < min_us:
+            continue
+        share = weight / cumtime
+        out[path] += tottime * share * 1e6
+        if len(path) >= max_depth:
+            continue
+        for callee, edge_cum in callees.get(func, ()):
+            if callee in on_path:
+                continue              # recursion: already counted in the callee's own time
+            todo.append((callee, edge_cum * share, path + (label(callee),), on_path | {callee}))
+    return out
+
+
+class FrameCapture:
+    """cProfile over the next `frames` calls to frame_done()."""
+
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.frames = frames
+        self.seen = 0
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profile.enable()
+
+    def frame_done(self):
+        """Count a frame; True once the capture is complete (profiling stopped)."""
+        self.seen += 1
+        if self.seen >= self.frames:
+            self.profile.disable()
+            return True
+        return False
+
+
+# --------------------------------------------------------
+# Game-facing controller
+# --------------------------------------------------------
+class Profiler:
+    def __init__(self, out_dir=None):
+        # project root (per-user data folder when frozen), not the cwd
+        self.out_dir = out_dir or user_data_path(PROFILE_DIR)
+        self.sampler = None
+        self.capture = None
+        self.capture_tags = ()
+        self.last_output = None
+
+    @property
+    def active(self):
+        return self.sampler is not None or self.capture is not None
+
+    def start_from_env(self, spec, tags=()):
+        """POKEMON_PROFILE value: "sample" or "cprofile[:frames]"."""
+        if not spec:
+            return
+        kind, _, arg = spec.partition(":")
+        if kind == "sample":
+            self.toggle_sampling(tags)
+        elif kind == "cprofile":
+            self.capture_frames(int(arg) if arg.isdigit() else PROFILE_FRAMES, tags)
+        else:
+            print("profiler: unknown POKEMON_PROFILE", spec)
+
+    def set_tags(self, tags):
+        """Root frames for the next samples (called once per frame)."""
+        if self.sampler is not None and self.sampler.tags != tags:
+            self.sampler.tags = tags
+
+    def toggle_sampling(self, tags=()):
+        if self.sampler is None:
+            self.sampler = StackSampler()
+            self.sampler.tags = tuple(tags)
+            self.sampler.start()
+            print("profiler: sampling every", self.sampler.interval * 1000, "ms")
+            return
+        sampler, self.sampler = self.sampler, None
+        sampler.stop()
+        duration = time.perf_counter() - sampler.started
+        self._write("sample", tags, sampler.counts, {
+            "samples": sampler.samples,
+            "interval": sampler.interval,
+            "seconds": round(duration, 3),
+            "tags": sorted({stack[:len(sampler.tags)] for stack in sampler.counts}),
+        })
+
+    def capture_frames(self, frames=PROFILE_FRAMES, tags=()):
+        if self.capture is not None:
+            return
+        self.capture_tags = tuple(tags)
+        self.capture = FrameCapture(frames)
+        print("profiler: cProfile for", frames, "frames")
+
+    def frame_done(self):
+        """Call once per frame, after the frame is presented."""
+        if self.capture is None or not self.capture.frame_done():
+            return
+        capture, self.capture = self.capture, None
+        stats = pstats.Stats(capture.profile)
+        tags = self.capture_tags
+        counts = {tags + stack: n for stack, n in pstats_to_collapsed(stats).items()}
+        base = self._write("cprofile", tags, counts, {
+            "frames": capture.frames,
+            "seconds": round(time.perf_counter() - capture.started, 3),
+            "count_unit": "us",
+        })
+        if base:
+            stats.dump_stats(base + ".prof")
+
+    def _write(self, kind, tags, counts, meta):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        name = "_".join([stamp, kind] + [str(t) for t in tags])
+        base = os.path.join(self.out_dir, name)
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            write_collapsed(base + ".collapsed", counts)
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(dict(meta, kind=kind, region_phase=list(tags)), f, indent=1)
+        except OSError as e:
+            print("profiler: could not write", base, e)
+            return None
+        self.last_output = base + ".collapsed"
+        print("profiler: wrote", self.last_output)
+        return base
+
+    def shutdown(self):
+        if self.sampler is not None:
+            self.toggle_sampling(self.sampler.tags)
+        if self.capture is not None:
+            self.capture.frames = self.capture.seen
+            self.frame_done()
@@ -0,0 +1,95 @@
+# records.py
+"""
+Slotted records for map objects: warps, signs, ledges and lights.
+
+TileMap keeps them in map-local coordinates as parsed from the file.
+MapInstance keeps a second set in world coordinates, built once when it
+is first asked for and again only after the map is swapped, moved or has
+its warps edited (see MapInstance.invalidate). MapManager.get_all_*
+returns tuples of these world records, cached until the set of resident
+maps changes. Nothing is allocated per frame or per step.
+
+A record is about a third of the dict it replaces (see
+TileMap.memory_usage). For older callers that treat warps as dicts,
+record["dest_map"] and record.get("dest_map") still work.
+"""
+import pygame
+
+from settings import TILESIZE
+
+
+class Record:
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Warp(Record):
+    """A door on tile (x, y); rect is that tile in pixels, in the same space."""
+    __slots__ = ("x", "y", "dest_map", "dest_x", "dest_y", "rect")
+
+    def __init__(self, x, y, dest_map, dest_x, dest_y):
+        self.x = x
+        self.y = y
+        self.dest_map = dest_map
+        self.dest_x = dest_x
+        self.dest_y = dest_y
+        self.rect = pygame.Rect(x * TILESIZE, y * TILESIZE, TILESIZE, TILESIZE)
+
+    @classmethod
+    def coerce(cls, warp, x, y):
+        """A Warp on tile (x, y) from a Warp or a {"dest_map", "dest_x", "dest_y"} dict."""
+        return cls(x, y, warp.get("dest_map"), warp.get("dest_x"), warp.get("dest_y"))
+
+    def moved(self, tx, ty):
+        """Copy shifted by (tx, ty) tiles."""
+        return Warp(self.x + tx, self.y + ty, self.dest_map, self.dest_x, self.dest_y)
+
+
+class Sign(Record):
+    __slots__ = ("rect", "text")
+
+    def __init__(self, rect, text):
+        self.rect = rect
+        self.text = text
+
+    def moved(self, dx, dy):
+        return Sign(self.rect.move(dx, dy), self.text)
+
+
+class Ledge(Record):
+    """dir: the one move direction (ledge_dir_for_move) it lets through, -1 if invalid."""
+    __slots__ = ("rect", "dir")
+
+    def __init__(self, rect, direction):
+        self.rect = rect
+        self.dir = direction
+
+    def moved(self, dx, dy):
+        return Ledge(self.rect.move(dx, dy), self.dir)
+
+
+class Light(Record):
+    """Light source rectangle (x, y, w, h) in pixels and its glow radius r."""
+    __slots__ = ("x", "y", "w", "h", "r")
+
+    def __init__(self, x, y, w, h, r):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.r = r
+
+    def moved(self, dx, dy):
+        return Light(self.x + dx, self.y + dy, self.w, self.h, self.r)
@@ -0,0 +1,229 @@
+# renderer.py
+"""
+Interchangeable tile layer renderers, selectable at runtime through
+MapManager.set_render_backend():
+
+  "tiles"   - TileMap.draw_layer: one blit per visible tile
+  "batched" - per-layer (tile surface, position) rows built once per map,
+              submitted each frame with a single Surface.fblits/blits call
+  "baked"   - each layer pre-rendered to one map-sized surface, drawn
+              with a single area blit
+
+Cached data lives in TileMap.render_cache so it is dropped with the map.
+"""
+from bisect import bisect_left
+
+import numpy as np
+import pygame
+
+from tilemap import FLAG_SHIFT, GID_MASK
+
+
+class TileRenderer:
+    name = "tiles"
+
+    def draw_layer(self, surface, camera, inst, layer_name):
+        inst.map.draw_layer(surface, camera, layer_name, offset_x=inst.pixel_x, offset_y=inst.pixel_y)
+
+    def invalidate(self, tm, layer_name=None, cells=None):
+        pass
+
+
+class BatchedRenderer:
+    name = "batched"
+
+    def _rows(self, tm, layer_name):
+        """
+        Per array row: (sorted column list, [(tile surface, local x px)]).
+        Tile surfaces are subsurfaces of the atlas pages (no pixel copies).
+        """
+        key = ("batched", layer_name)
+        cached = tm.render_cache.get(key)
+        if cached is not None and cached[0] == tm.atlas.generation:
+            return cached[1]
+
+        idx = tm.layer_map.get(layer_name)
+        if idx is None:
+            tm.render_cache[key] = (tm.atlas.generation, None)
+            return None
+
+        gids = tm.layer_gids[idx]
+        raw = gids | (tm.layer_flags[idx].astype(np.uint32) << np.uint32(FLAG_SHIFT))
+        subsurfaces = {}
+        rows = []
+        for y in range(tm.height):
+            xs = np.nonzero(gids[y])[0].tolist()
+            cols, entries = [], []
+            for x, r in zip(xs, raw[y, xs].tolist()):
+                tile = subsurfaces.get(r)
+                if tile is None:
+                    ref = tm.get_tile(r & GID_MASK, r >> FLAG_SHIFT)
+                    if ref is None:
+                        continue
+                    tile = ref[0].subsurface(ref[1])
+                    subsurfaces[r] = tile
+                cols.append(x)
+                entries.append((tile, x * tm.tile_w))
+            rows.append((cols, entries))
+
+        tm.render_cache[key] = (tm.atlas.generation, rows)
+        return rows
+
+    def draw_layer(self, surface, camera, inst, layer_name):
+        tm = inst.map
+        rows = self._rows(tm, layer_name.lower())
+        if not rows:
+            return
+
+        offset_x = inst.pixel_x + tm.origin_x
+        offset_y = inst.pixel_y + tm.origin_y
+        x0, y0, x1, y1 = tm.visible_range(camera, offset_x, offset_y)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        bx, by = camera.apply((offset_x, offset_y))
+        th = tm.tile_h
+        seq = []
+        for y in range(y0, y1):
+            cols, entries = rows[y]
+            if not cols:
+                continue
+            i0 = bisect_left(cols, x0)
+            i1 = bisect_left(cols, x1, i0)
+            py = by + y * th
+            seq.extend([(tile, (bx + lx, py)) for tile, lx in entries[i0:i1]])
+
+        if not seq:
+            return
+        fblits = getattr(surface, "fblits", None)  # pygame-ce
+        if fblits is not None:
+            fblits(seq)
+        else:
+            surface.blits(seq, False)
+
+    @staticmethod
+    def _cell_tile(tm, idx, x, y):
+        gid = int(tm.layer_gids[idx][y, x])
+        if not gid:
+            return None
+        ref = tm.get_tile(gid, int(tm.layer_flags[idx][y, x]))
+        return ref[0].subsurface(ref[1]) if ref is not None else None
+
+    def invalidate(self, tm, layer_name=None, cells=None):
+        """cells: iterable of (x, y) array cells to patch in place; None drops the layer."""
+        if layer_name is None:
+            for key in [k for k in tm.render_cache if k[0] == "batched"]:
+                del tm.render_cache[key]
+            return
+
+        layer_name = layer_name.lower()
+        key = ("batched", layer_name)
+        cached = tm.render_cache.get(key)
+        idx = tm.layer_map.get(layer_name)
+        if cells is None or cached is None or cached[1] is None or idx is None \
+                or cached[0] != tm.atlas.generation:
+            tm.render_cache.pop(key, None)
+            return
+
+        generation, rows = cached
+        tw = tm.tile_w
+        for x, y in cells:
+            cols, entries = rows[y]
+            i = bisect_left(cols, x)
+            present = i < len(cols) and cols[i] == x
+            tile = self._cell_tile(tm, idx, x, y)
+            if tile is None:
+                if present:
+                    del cols[i]
+                    del entries[i]
+            elif present:
+                entries[i] = (tile, x * tw)
+            else:
+                cols.insert(i, x)
+                entries.insert(i, (tile, x * tw))
+
+        # a new tile can grow the atlas; older subsurfaces are then stale
+        if tm.atlas.generation != generation:
+            tm.render_cache.pop(key, None)
+
+
+class BakedRenderer:
+    name = "baked"
+
+    def _bake_cells(self, tm, idx, surf, xs, ys):
+        gids = tm.layer_gids[idx]
+        flags = tm.layer_flags[idx]
+        tw, th = tm.tile_w, tm.tile_h
+        for x, y in zip(xs, ys):
+            dest = pygame.Rect(x * tw, y * th, tw, th)
+            surf.fill((0, 0, 0, 0), dest)
+            gid = int(gids[y, x])
+            if not gid:
+                continue
+            ref = tm.get_tile(gid, int(flags[y, x]))
+            if ref is None:
+                continue
+            # exact copy: a normal alpha blit onto a transparent surface
+            # would darken semi-transparent pixels
+            surf.blit(ref[0], dest.topleft, ref[1], special_flags=pygame.BLEND_RGBA_MAX)
+
+    def _baked(self, tm, layer_name):
+        key = ("baked", layer_name)
+        if key in tm.render_cache:
+            return tm.render_cache[key]
+
+        idx = tm.layer_map.get(layer_name)
+        surf = None
+        if idx is not None and tm.width and tm.height:
+            ys, xs = np.nonzero(tm.layer_gids[idx])
+            if len(xs):
+                surf = pygame.Surface((tm.pixel_width, tm.pixel_height), pygame.SRCALPHA)
+                self._bake_cells(tm, idx, surf, xs.tolist(), ys.tolist())
+
+        tm.render_cache[key] = surf
+        return surf
+
+    def draw_layer(self, surface, camera, inst, layer_name):
+        tm = inst.map
+        baked = self._baked(tm, layer_name.lower())
+        if baked is None:
+            return
+
+        offset_x = inst.pixel_x + tm.origin_x
+        offset_y = inst.pixel_y + tm.origin_y
+        area = pygame.Rect(camera.x - offset_x, camera.y - offset_y, camera.w, camera.h)
+        area = area.clip(baked.get_rect())
+        if area.width <= 0 or area.height <= 0:
+            return
+        surface.blit(baked, camera.apply((offset_x + area.x, offset_y + area.y)), area)
+
+    def invalidate(self, tm, layer_name=None, cells=None):
+        """cells: iterable of (x, y) array cells to re-bake; None drops the layer."""
+        if layer_name is None:
+            for key in [k for k in tm.render_cache if k[0] == "baked"]:
+                del tm.render_cache[key]
+            return
+
+        key = ("baked", layer_name.lower())
+        surf = tm.render_cache.get(key)
+        if surf is None or cells is None:
+            tm.render_cache.pop(key, None)
+            return
+
+        idx = tm.layer_map.get(layer_name.lower())
+        cells = list(cells)
+        self._bake_cells(tm, idx, surf, [c[0] for c in cells], [c[1] for c in cells])
+
+
+RENDERERS = {
+    TileRenderer.name: TileRenderer,
+    BatchedRenderer.name: BatchedRenderer,
+    BakedRenderer.name: BakedRenderer,
+}
+
+
+def make_renderer(name):
+    cls = RENDERERS.get(name)
+    if cls is None:
+        raise ValueError(f"unknown render backend '{name}' (expected one of {', '.join(RENDERERS)})")
+    return cls()
@@ -0,0 +1,362 @@
+# save_system.py
+"""
+Save games: snapshot on the main thread, write on a background thread.
+
+capture() copies only what is cheap: the player's map, tile and facing,
+the region, the world root, the game flags (a small dict), and the
+MapManager mutation journal, which is handed over copy-on-write
+(MapManager.snapshot_mutations), so a snapshot takes microseconds however
+many tiles have been changed. SaveSystem.save() queues it; one worker
+thread encodes and writes it, always the newest queued snapshot, and
+replaces the file atomically (write to .tmp, fsync, os.replace), so a
+crash mid-write leaves the previous save intact.
+
+File format, little-endian:
+
+  header   "PKSV"  u16 version  u16 flags (bit 0: body is zlib)  u32 crc32(body)
+  body     str map  i32 tx  i32 ty  u8 facing  str region  str world_root  f64 time
+           u32 maps, each: str name, u32 entries, each entry one of
+             u8 0  str layer  i32 tx  i32 ty  u32 gid      tile
+             u8 1  i32 tx  i32 ty  i8 flag (-1 = None)     passable
+             u8 2  i32 tx  i32 ty  u8 present              warp
+                   [str dest_map  i32 dest_x  i32 dest_y]  if present
+           u32 flags, each: str name, u8 type (0 int, 1 float, 2 str, 3 bool), value
+  str      u16 byte length + UTF-8
+
+Tile coordinates are map-local, as in the journal. Loading (apply) goes
+through MapManager.enter_map, which reuses the loaded world when the
+saved map is already part of it.
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from settings import SAVE_PATH
+from utils import user_data_path
+
+MAGIC = b"PKSV"
+VERSION = 1
+FLAG_ZLIB = 1
+FACINGS = ("down", "up", "left", "right")
+
+_HEADER = struct.Struct("<4sHHI")
+_U32 = struct.Struct("<I")
+_TILE = struct.Struct("<iiI")
+_CELL = struct.Struct("<ii")
+_POS = struct.Struct("<iiB")
+
+Snapshot = namedtuple("Snapshot", "map tx ty facing region world_root time mutations flags")
+
+
+class SaveError(Exception):
+    pass
+
+
+# --------------------------------------------------------
+# Capture / apply (main thread)
+# --------------------------------------------------------
+def capture(game):
+    """Immutable Snapshot of a Game (or anything with the same attributes)."""
+    player, mm = game.player, game.map_manager
+    hit = mm.locate_tile(player.tile_x, player.tile_y)
+    if hit is not None:
+        name, wx, wy = hit[0].name, hit[0].world_x, hit[0].world_y
+    else:
+        inst = mm.instances.get(game.current_region)
+        name = game.current_region
+        wx, wy = (inst.world_x, inst.world_y) if inst is not None else (0, 0)
+    return Snapshot(
+        name, player.tile_x - wx, player.tile_y - wy, player.direction,
+        game.current_region, game.world_root, time.time(),
+        mm.snapshot_mutations(), tuple(getattr(game, "flags", {}).items()),
+    )
+
+
+def apply(game, snap):
+    """Restore a Snapshot into a running Game; False if its map can't be entered."""
+    mm = game.map_manager
+    mm.restore_mutations(snap.mutations)
+    game.world_root = snap.world_root or game.world_root
+    dest = mm.enter_map(snap.map, snap.tx, snap.ty, game.world_root)
+    if dest is None:
+        return False
+    player = game.player
+    player.path.clear()
+    game.place_player(dest, snap.map)
+    if snap.region:
+        game.current_region = snap.region
+    player.direction = snap.facing if snap.facing in player.frames else "down"
+    player.image = player.frames[player.direction]
+    game.flags = dict(snap.flags)
+    return True
+
+
+# --------------------------------------------------------
+# Encoding
+# --------------------------------------------------------
+def _pack_str(out, s):
+    data = (s or "").encode("utf-8")
+    if len(data) > 0xFFFF:
+        raise SaveError("string too long")
+    out += struct.pack("<H", len(data))
+    out += data
+
+
+def _int_or(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+_INT64 = (-(1 << 63), 1 << 63)
+
+
+def encode(snap, compress=True):
+    """Save file bytes for a Snapshot; SaveError if something in it can't be stored."""
+    try:
+        body = _encode_body(snap)
+    except (struct.error, TypeError, ValueError, AttributeError) as e:
+        raise SaveError(f"cannot encode save: {e}") from e
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 6)
+        flags |= FLAG_ZLIB
+    return _HEADER.pack(MAGIC, VERSION, flags, zlib.crc32(body)) + body
+
+
+def _encode_body(snap):
+    body = bytearray()
+    _pack_str(body, snap.map)
+    facing = FACINGS.index(snap.facing) if snap.facing in FACINGS else 0
+    body += _POS.pack(snap.tx, snap.ty, facing)
+    _pack_str(body, snap.region)
+    _pack_str(body, snap.world_root)
+    body += struct.pack("<d", snap.time)
+
+    body += _U32.pack(len(snap.mutations))
+    for name, entries in snap.mutations.items():
+        _pack_str(body, name)
+        body += _U32.pack(len(entries))
+        for key, value in entries.items():
+            kind = key[0]
+            if kind == "tile":
+                body.append(0)
+                _pack_str(body, key[1])
+                body += _TILE.pack(key[2], key[3], int(value) & 0xFFFFFFFF)
+            elif kind == "passable":
+                body.append(1)
+                body += _CELL.pack(key[1], key[2])
+                body += struct.pack("<b", -1 if value is None else int(bool(value)))
+            elif kind == "warp":
+                body.append(2)
+                body += _CELL.pack(key[1], key[2])
+                body.append(value is not None)
+                if value is not None:
+                    _pack_str(body, value.get("dest_map"))
+                    body += _CELL.pack(_int_or(value.get("dest_x")), _int_or(value.get("dest_y")))
+            else:
+                raise SaveError(f"unknown mutation {key!r}")
+
+    body += _U32.pack(len(snap.flags))
+    for name, value in snap.flags:
+        _pack_str(body, name)
+        if isinstance(value, bool):
+            body += struct.pack("<B?", 3, value)
+        elif isinstance(value, int):
+            if not _INT64[0] <= value < _INT64[1]:
+                raise SaveError(f"flag {name!r} is out of range: {value}")
+            body += struct.pack("<Bq", 0, value)
+        elif isinstance(value, float):
+            body += struct.pack("<Bd", 1, value)
+        else:
+            body.append(2)
+            _pack_str(body, str(value))
+    return bytes(body)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def take(self, st):
+        try:
+            values = st.unpack_from(self.data, self.pos)
+        except struct.error:
+            raise SaveError("truncated save") from None
+        self.pos += st.size
+        return values
+
+    def fmt(self, fmt):
+        return self.take(struct.Struct(fmt))
+
+    def str(self):
+        (n,) = self.fmt("<H")
+        if self.pos + n > len(self.data):
+            raise SaveError("truncated save")
+        s = self.data[self.pos:self.pos + n].decode("utf-8")
+        self.pos += n
+        return s
+
+
+def decode(data):
+    if len(data) < _HEADER.size:
+        raise SaveError("not a save file")
+    magic, version, flags, crc = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveError("not a save file")
+    if version > VERSION:
+        raise SaveError(f"save version {version} is newer than this game ({VERSION})")
+    body = data[_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise SaveError("save file is corrupt (checksum)")
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    r = _Reader(body)
+    map_name = r.str()
+    tx, ty, facing = r.take(_POS)
+    region = r.str()
+    world_root = r.str()
+    (saved_at,) = r.fmt("<d")
+
+    mutations = {}
+    for _ in range(r.take(_U32)[0]):
+        name = r.str()
+        entries = mutations[name] = {}
+        for _ in range(r.take(_U32)[0]):
+            (kind,) = r.fmt("<B")
+            if kind == 0:
+                layer = r.str()
+                etx, ety, gid = r.take(_TILE)
+                entries[("tile", layer, etx, ety)] = gid
+            elif kind == 1:
+                etx, ety = r.take(_CELL)
+                (flag,) = r.fmt("<b")
+                entries[("passable", etx, ety)] = None if flag < 0 else bool(flag)
+            elif kind == 2:
+                etx, ety = r.take(_CELL)
+                (present,) = r.fmt("<B")
+                warp = None
+                if present:
+                    dest_map = r.str()
+                    dest_x, dest_y = r.take(_CELL)
+                    warp = {"dest_map": dest_map, "dest_x": dest_x, "dest_y": dest_y}
+                entries[("warp", etx, ety)] = warp
+            else:
+                raise SaveError(f"unknown mutation kind {kind}")
+
+    flags_out = []
+    for _ in range(r.take(_U32)[0]):
+        name = r.str()
+        (kind,) = r.fmt("<B")
+        if kind == 0:
+            value = r.fmt("<q")[0]
+        elif kind == 1:
+            value = r.fmt("<d")[0]
+        elif kind == 2:
+            value = r.str()
+        elif kind == 3:
+            value = r.fmt("<?")[0]
+        else:
+            raise SaveError(f"unknown flag type {kind}")
+        flags_out.append((name, value))
+
+    return Snapshot(map_name, tx, ty, FACINGS[facing] if facing < len(FACINGS) else "down",
+                    region or None, world_root or None, saved_at, mutations, tuple(flags_out))
+
+
+def write_atomic(path, data):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# --------------------------------------------------------
+# Background writer
+# --------------------------------------------------------
+class SaveSystem:
+    def __init__(self, path=None):
+        # SAVE_PATH is relative to the project root (a per-user folder in
+        # frozen builds), not to the cwd the game was started from
+        self.path = path or user_data_path(SAVE_PATH)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self._lock = threading.Lock()
+        self._queued = None        # newest snapshot not yet picked up by the worker
+        self._busy = False
+        self.saves = 0
+        self.last_error = None
+        self.last_save_time = None   # seconds the last encode + write took
+
+    def save(self, snap):
+        """Queue a snapshot for writing; returns at once."""
+        with self._lock:
+            self._queued = snap
+            if self._busy:
+                return           # the running job picks it up when done
+            self._busy = True
+        self._executor.submit(self._drain)
+
+    def _drain(self):
+        idle = False
+        try:
+            while True:
+                with self._lock:
+                    snap, self._queued = self._queued, None
+                    if snap is None:
+                        self._busy = False
+                        idle = True
+                        return
+                self._write(snap)
+        finally:
+            if not idle:
+                # something escaped _write: without this every later save()
+                # would see _busy and never be written
+                with self._lock:
+                    self._busy = False
+
+    def _write(self, snap):
+        t0 = time.perf_counter()
+        try:
+            write_atomic(self.path, encode(snap))
+            self.saves += 1
+            self.last_error = None
+        except (OSError, SaveError) as e:
+            self.last_error = e
+            print("save: could not write", self.path, e)
+        except Exception as e:
+            self.last_error = e
+            print("save: failed to write", self.path, repr(e))
+        self.last_save_time = time.perf_counter() - t0
+
+    def load(self, path=None):
+        """Snapshot from a save file, or None (missing / unreadable)."""
+        path = path or self.path
+        try:
+            with open(path, "rb") as f:
+                return decode(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, SaveError, UnicodeDecodeError, zlib.error) as e:
+            print("save: could not load", path, e)
+            return None
+
+    def flush(self):
+        """Wait until every queued snapshot is written."""
+        # one worker: this runs after the current _drain, which empties the queue
+        self._executor.submit(lambda: None).result()
+
+    def shutdown(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
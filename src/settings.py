@@ -1,3 +1,4 @@
+import os
 from datetime import datetime
 
 # settings.py
@@ -10,9 +11,43 @@ TITLE = "Pokemon Clone"
 MAP_PATH = "assets/maps/route_1.json"       # export from Tiled (JSON)
 TILESET_FOLDER = "assets/tilesets"       # where outdoor.png, buildings.png live
 MAPS_FOLDER = "assets/maps"
+
+# The stitched overworld root (maps that form the world)
+WORLD_ROOT = "pallet_town"
+
+# The map we start in (standalone interior) and the tile we start on
+START_MAP = "pallet_house1_f2"
+START_TILE_X = 9
+START_TILE_Y = 10
+
 # Default tile size (will be replaced by map's tile size if available)
 TILESIZE = 32
 
+# Overworld streaming: maps are loaded in the background once they come
+# within LOAD_RADIUS pixels of the camera view and dropped again beyond
+# UNLOAD_RADIUS (hysteresis). Resident maps are capped by a byte budget.
+WORLD_STREAMING = True
+STREAM_LOAD_RADIUS = 12 * TILESIZE
+STREAM_UNLOAD_RADIUS = 24 * TILESIZE
+STREAM_MAX_RESIDENT_BYTES = 256 * 1024 * 1024
+
+# Tile layer renderer: "tiles" (per-tile blits), "batched" (one
+# Surface.blits call per layer) or "baked" (pre-rendered layer surfaces).
+# F5 cycles through them at runtime.
+RENDER_BACKEND = "batched"
+
+# Dev mode (POKEMON_DEV=1): hot reload maps/tilesets edited in Tiled
+DEV_MODE = os.environ.get("POKEMON_DEV", "") not in ("", "0")
+
+# Multiplayer (net_server.py). POKEMON_SERVER=host:port starts Game in
+# client mode against a running server.
+NET_HOST = "127.0.0.1"
+NET_PORT = 7777
+NET_TICK_RATE = 20                  # state broadcasts per second
+NET_SPAWN_MAP = "pallet_town"
+NET_SPAWN_TILE = (10, 12)
+NET_SERVER = os.environ.get("POKEMON_SERVER") or None
+
 NATIVE_WIDTH = 640
 NATIVE_HEIGHT = 480
 
@@ -22,6 +57,60 @@ PLAYER_SIZE = 32    # width/height in pixels (square placeholder)
 MOVE_TIME = 0.15
 PLAYER_IMAGE = "assets/entities/player.png"
 
+# NPCs (entities.py)
+NPC_IMAGE = "assets/entities/npc.png"
+NPC_MOVE_TIME = 0.3         # seconds per tile (player walks at MOVE_TIME)
+NPC_IDLE_TIME = (1.0, 4.0)  # random pause between wander / look-around actions
+
+# Wild encounters (encounters.py). Maps opt in with an "encounters"
+# property / object layer; "encounter_rate" overrides the chance per step.
+ENCOUNTER_LAYER = "grass"
+ENCOUNTER_RATE = 0.1
+
+# Weather particles (particles.py), picked by the "weather" map property
+WEATHER_MAX_PARTICLES = 4000
+WEATHER_FADE_TIME = 1.0     # seconds to fade between maps' weather
+
+# World minimap (minimap.py): generated from the overworld maps, cached on disk
+MINIMAP_TILE_PX = 4                         # minimap pixels per map tile
+MINIMAP_CACHE = "assets/maps/minimap_cache"
+MINIMAP_LAYERS = ("floor", "grass", "grass2", "walls", "above")
+
+# Profiler (profiler.py): F9 sampler, F10 cProfile capture.
+# POKEMON_PROFILE=sample / cprofile[:frames] starts one at launch.
+PROFILE_DIR = "profiles"
+PROFILE_INTERVAL = 0.005    # seconds between stack samples
+PROFILE_FRAMES = 120        # frames per cProfile capture
+PROFILE_ON_START = os.environ.get("POKEMON_PROFILE") or None
+
+# Input-to-photon latency histogram (instrumentation.InputLatency), shown
+# in the F3 HUD. POKEMON_INPUT_LATENCY=1 also prints it at exit.
+INPUT_LATENCY_REPORT = bool(os.environ.get("POKEMON_INPUT_LATENCY"))
+
+# Sign / dialogue text reveal speed in glyphs per second (0 = whole page at once)
+SIGN_TEXT_CPS = 0
+
+# Save games (save_system.py): F6 saves, F7 loads; autosave on warps and
+# region changes. POKEMON_CONTINUE=1 loads SAVE_PATH at startup.
+# Relative to the project root; frozen builds use a per-user data folder
+# (utils.user_data_path).
+SAVE_PATH = "saves/autosave.sav"
+AUTOSAVE = True
+SAVE_LOAD_ON_START = bool(os.environ.get("POKEMON_CONTINUE"))
+
+# Generated stress worlds (stress_maps.py) and bench_world.py results
+STRESS_MAPS_FOLDER = "stress_maps"
+
+# Frame pacing (frame_pacer.py): "precise", "vsync" or "powersave".
+FRAME_PACING = os.environ.get("POKEMON_PACING", "precise")
+POWERSAVE_FPS = 30
+BACKGROUND_FPS = 10         # window unfocused
+HIDDEN_FPS = 4              # minimized / hidden: simulation only, no rendering
+IDLE_TIMEOUT = 120.0        # seconds without input before dropping to POWERSAVE_FPS (0 = never)
+MAX_FRAME_DT = 0.25         # longer frames (hitches, dragging the window) are clamped
+MAX_SIM_STEP = 1 / 30       # update() never advances more than this at once
+PACER_SPIN = 0.002          # precise mode spins for the last 2 ms before a deadline
+
 # MUCH BETTER LIGHTING COLORS (Pokémon-like)
 
 LIGHT_MORNING = (255, 180, 90)     # deep warm orange sunrise
@@ -0,0 +1,305 @@
+# stress_maps.py
+"""
+Procedural stress worlds for scaling benchmarks (see bench_world.py).
+
+    python src/stress_maps.py --size 1024 --maps 9
+    python src/stress_maps.py --size 2048x512 --maps 4 --walls 0.3 --lights 500 --out stress_maps/wide
+
+Writes `--maps` Tiled JSON maps laid out in a grid (as square as
+possible) and stitched edge to edge through world_x / world_y, plus the
+folder's region_connections.json and world_manifest.json, so MapManager,
+validate_maps.py and memory_report.py take the folder as it is. Maps use
+the Outside tileset and the layers and object groups of the real maps:
+floor, grass, walls, above, doors, signs, ledge and lights.
+
+Object counts are per map. Walls are scattered at random at --walls
+density but never on the outer ring of a map, so neighbouring maps
+always join up. Warps, signs, ledges and lights go on free tiles; every
+warp leads to a free tile of another map of the grid (of the same map
+when there is only one). The same arguments and --seed give the same
+files.
+
+Layer data is base64 + zlib by default (as Tiled writes it with that
+option set); --encoding csv writes plain JSON arrays like the hand-made
+maps, which is far larger and slower to parse at these sizes.
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import time
+import zlib
+
+import numpy as np
+
+from settings import STRESS_MAPS_FOLDER, TILESIZE
+from utils import resource_path
+import map_connections
+import world_manifest
+
+PREFIX = "stress_"
+
+# the two Outside.png entries every hand-made map carries
+TILESETS = [
+    {"columns": 8, "firstgid": firstgid, "image": "../tilesets/Outside.png",
+     "imageheight": 16064, "imagewidth": 256, "margin": 0, "name": "Outside",
+     "spacing": 0, "tilecount": 4016, "tileheight": TILESIZE, "tilewidth": TILESIZE}
+    for firstgid in (1, 4017)
+]
+
+# gids as used on route_1
+FLOOR_GID = 4018
+GRASS_GID = 7
+WALL_GIDS = (4435, 4436, 4441, 4443, 4444)
+ABOVE_GIDS = (421, 422, 4437, 4438)
+
+ENCODINGS = ("zlib", "csv")
+
+
+def parse_size(text):
+    """"512" → (512, 512), "2048x512" → (2048, 512)."""
+    w, _, h = text.lower().partition("x")
+    w = int(w)
+    h = int(h) if h else w
+    if w < 3 or h < 3:
+        raise ValueError(f"map size {text} is below 3x3 tiles")
+    return w, h
+
+
+def grid_shape(count):
+    """(cols, rows) of the squarest grid holding `count` maps."""
+    cols = math.ceil(math.sqrt(count))
+    return cols, math.ceil(count / cols)
+
+
+def map_name(index):
+    return f"{PREFIX}{index:03d}"
+
+
+# --------------------------------------------------------
+# Tiled JSON pieces
+# --------------------------------------------------------
+def _prop(name, value):
+    kind = {bool: "bool", int: "int", float: "float"}.get(type(value), "string")
+    return {"name": name, "type": kind, "value": value}
+
+
+def _tile_layer(layer_id, name, array, encoding):
+    h, w = array.shape
+    layer = {"height": h, "id": layer_id, "name": name, "opacity": 1, "type": "tilelayer",
+             "visible": True, "width": w, "x": 0, "y": 0}
+    flat = np.ascontiguousarray(array, dtype="<u4").ravel()
+    if encoding == "zlib":
+        layer["compression"] = "zlib"
+        layer["encoding"] = "base64"
+        layer["data"] = base64.b64encode(zlib.compress(flat.tobytes(), 6)).decode("ascii")
+    else:
+        layer["data"] = flat.tolist()
+    return layer
+
+
+def _object(obj_id, x, y, w, h, props):
+    return {"height": h, "id": obj_id, "name": "", "properties": props, "rotation": 0,
+            "type": "", "visible": True, "width": w, "x": x, "y": y}
+
+
+def _object_group(layer_id, name, objects):
+    return {"draworder": "topdown", "id": layer_id, "name": name, "objects": objects,
+            "opacity": 1, "type": "objectgroup", "visible": True, "x": 0, "y": 0}
+
+
+# --------------------------------------------------------
+# Generation
+# --------------------------------------------------------
+def scatter_walls(rng, w, h, density):
+    """Bool array of blocked tiles; the outer ring is always free."""
+    blocked = rng.random((h, w)) < density
+    blocked[0, :] = blocked[-1, :] = False
+    blocked[:, 0] = blocked[:, -1] = False
+    return blocked
+
+
+def _free_cells(rng, blocked, count):
+    """`count` distinct free (tx, ty) tiles, fewer if the map has fewer."""
+    free = np.flatnonzero(~blocked.ravel())
+    count = min(count, len(free))
+    picked = rng.choice(free, size=count, replace=False) if count else free[:0]
+    w = blocked.shape[1]
+    return [(int(i % w), int(i // w)) for i in picked]
+
+
+def build_map(rng, name, blocked, world_x, world_y, counts, landing, grass=0.1, encoding="zlib"):
+    """
+    Tiled JSON dict for one map. counts: {"warps", "signs", "ledges", "lights"};
+    landing: map name → flat indices of its free tiles, where warps may lead.
+    All maps are assumed to be as wide as this one.
+    """
+    h, w = blocked.shape
+
+    floor = np.full((h, w), FLOOR_GID, dtype=np.uint32)
+    grass_layer = np.where((rng.random((h, w)) < grass) & ~blocked, GRASS_GID, 0).astype(np.uint32)
+    walls = np.where(blocked, rng.choice(WALL_GIDS, size=(h, w)), 0).astype(np.uint32)
+    above = np.where(rng.random((h, w)) < 0.01, rng.choice(ABOVE_GIDS, size=(h, w)), 0).astype(np.uint32)
+
+    total = counts["warps"] + counts["signs"] + counts["ledges"] + counts["lights"]
+    cells = iter(_free_cells(rng, blocked, total))
+    next_id = 1
+    groups = {"doors": [], "signs": [], "ledge": [], "lights": []}
+
+    others = [n for n in landing if n != name] or [name]
+    for _ in range(counts["warps"]):
+        tx, ty = next(cells, (None, None))
+        if tx is None:
+            break
+        dest = others[int(rng.integers(len(others)))]
+        free = landing[dest]
+        dy, dx = divmod(int(free[int(rng.integers(len(free)))]), w)
+        groups["doors"].append(_object(next_id, tx * TILESIZE, ty * TILESIZE, TILESIZE, TILESIZE, [
+            _prop("dest_map", dest), _prop("dest_x", dx), _prop("dest_y", dy),
+        ]))
+        next_id += 1
+
+    for i in range(counts["signs"]):
+        tx, ty = next(cells, (None, None))
+        if tx is None:
+            break
+        groups["signs"].append(_object(next_id, tx * TILESIZE + 4, ty * TILESIZE + 4, 24, 24, [
+            _prop("text", f"{name.upper()} sign {i}\n\nWorld tile {world_x + tx}, {world_y + ty}"),
+        ]))
+        next_id += 1
+
+    for _ in range(counts["ledges"]):
+        tx, ty = next(cells, (None, None))
+        if tx is None:
+            break
+        groups["ledge"].append(_object(next_id, tx * TILESIZE, ty * TILESIZE + 12, TILESIZE, 20, [
+            _prop("direction", int(rng.integers(4))),
+        ]))
+        next_id += 1
+
+    for _ in range(counts["lights"]):
+        tx, ty = next(cells, (None, None))
+        if tx is None:
+            break
+        size = int(rng.integers(1, 4)) * TILESIZE
+        groups["lights"].append(_object(next_id, tx * TILESIZE, ty * TILESIZE, size, size, [
+            _prop("intensity", 1.0), _prop("light", True), _prop("radius", int(size * 0.8)),
+        ]))
+        next_id += 1
+
+    layers = [
+        _tile_layer(1, "floor", floor, encoding),
+        _tile_layer(2, "grass", grass_layer, encoding),
+        _tile_layer(3, "walls", walls, encoding),
+        _tile_layer(4, "above", above, encoding),
+    ]
+    for layer_id, group in enumerate(("doors", "signs", "ledge", "lights"), start=5):
+        layers.append(_object_group(layer_id, group, groups[group]))
+
+    return {
+        "compressionlevel": -1, "height": h, "infinite": False, "layers": layers,
+        "nextlayerid": len(layers) + 1, "nextobjectid": next_id, "orientation": "orthogonal",
+        "properties": [
+            _prop("region", name), _prop("world_x", world_x), _prop("world_y", world_y),
+        ],
+        "renderorder": "right-down", "tiledversion": "1.11.2", "tileheight": TILESIZE,
+        "tilesets": TILESETS, "tilewidth": TILESIZE, "type": "map", "version": "1.10", "width": w,
+    }
+
+
+def _clear(folder):
+    """Drop an earlier stress world from the folder (other maps are left alone)."""
+    for f in os.listdir(folder):
+        if f.startswith(PREFIX) and f.endswith(".json") or \
+           f in (world_manifest.MANIFEST_FILENAME, map_connections.CONNECTIONS_FILENAME):
+            os.remove(os.path.join(folder, f))
+
+
+def generate(out_folder=STRESS_MAPS_FOLDER, size=(256, 256), maps=1, walls=0.15, grass=0.1,
+             warps=4, signs=4, ledges=8, lights=8, seed=0, encoding="zlib"):
+    """
+    Write a stress world into out_folder (relative to the project root, or
+    absolute). Returns {"names", "tiles", "bytes", "seconds"}.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"unknown encoding {encoding!r} (expected one of {ENCODINGS})")
+    started = time.perf_counter()
+    folder = resource_path(out_folder)
+    os.makedirs(folder, exist_ok=True)
+    _clear(folder)
+
+    w, h = size
+    cols, _ = grid_shape(maps)
+    names = [map_name(i) for i in range(maps)]
+    rng = np.random.default_rng(seed)
+
+    # walls first: warps need free landing tiles on every map
+    blocked = [scatter_walls(rng, w, h, walls) for _ in names]
+    landing = {name: np.flatnonzero(~b.ravel()) for name, b in zip(names, blocked)}
+    counts = {"warps": warps, "signs": signs, "ledges": ledges, "lights": lights}
+
+    connections = {}
+    written = 0
+    for i, name in enumerate(names):
+        col, row = i % cols, i // cols
+        data = build_map(rng, name, blocked[i], col * w, row * h, counts, landing, grass, encoding)
+        path = os.path.join(folder, name + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        written += os.path.getsize(path)
+        blocked[i] = data = None
+
+        linked = [name]
+        for dc, dr in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            c, r = col + dc, row + dr
+            j = r * cols + c
+            if 0 <= c < cols and r >= 0 and j < maps:
+                linked.append(names[j])
+        connections[name] = linked
+
+    with open(map_connections.connections_path_for(folder), "w", encoding="utf-8") as f:
+        json.dump(connections, f, indent=1, sort_keys=True)
+    manifest = world_manifest.build_manifest(folder)
+    world_manifest.save_manifest(manifest, world_manifest.manifest_path_for(folder))
+
+    return {
+        "names": names,
+        "tiles": w * h * maps,
+        "bytes": written,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default=STRESS_MAPS_FOLDER, help="output maps folder")
+    parser.add_argument("--size", default="256", help="tiles per map side, N or WxH (default 256)")
+    parser.add_argument("--maps", type=int, default=1, help="maps stitched in a grid (default 1)")
+    parser.add_argument("--walls", type=float, default=0.15, help="wall density 0..1 (default 0.15)")
+    parser.add_argument("--grass", type=float, default=0.1, help="tall grass density 0..1 (default 0.1)")
+    parser.add_argument("--warps", type=int, default=4, help="warps per map")
+    parser.add_argument("--signs", type=int, default=4, help="signs per map")
+    parser.add_argument("--ledges", type=int, default=8, help="ledges per map")
+    parser.add_argument("--lights", type=int, default=8, help="lights per map")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--encoding", choices=ENCODINGS, default="zlib", help="tile layer data format")
+    args = parser.parse_args()
+
+    try:
+        size = parse_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.maps < 1:
+        parser.error("--maps must be at least 1")
+
+    result = generate(args.out, size, args.maps, args.walls, args.grass, args.warps, args.signs,
+                      args.ledges, args.lights, args.seed, args.encoding)
+    cols, rows = grid_shape(args.maps)
+    print(f"stress_maps: {args.maps} maps of {size[0]}x{size[1]} ({cols}x{rows} grid, "
+          f"{result['tiles']:,} tiles) → {args.out}: {result['bytes'] / 1e6:.1f} MB "
+          f"in {result['seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# text_layout.py
+"""
+Word wrap, pagination and cached page rendering for dialogue boxes.
+
+  layout = cache.get(text, font, width)       wrapped + paginated once
+  layout.draw(surface, page, (x, y))          one blit per frame
+  layout.draw(surface, page, (x, y), chars)   first `chars` characters (Typewriter)
+
+Wrapping measures every distinct word once with font.size (widths are
+cached per font) and adds them up, so a text costs O(len) instead of one
+font.size() per word on an ever longer trial string. Each page is
+rendered the first time it is drawn and kept as a surface, so a page
+open on screen costs one blit and no font.render at all. A partly
+revealed page is clipped from that same surface, which makes the
+typewriter pixel-identical to the finished page.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class WordWidths:
+    """font.size()[0] of words, cached, plus the width of a space."""
+
+    def __init__(self, font):
+        self.font = font
+        self.space = font.size(" ")[0]
+        self._widths = {}
+
+    def __call__(self, word):
+        w = self._widths.get(word)
+        if w is None:
+            w = self._widths[word] = self.font.size(word)[0]
+        return w
+
+
+def wrap(text, widths, width):
+    """
+    Greedy word wrap to `width` pixels, keeping explicit '\\n'. A word wider
+    than the line gets a line of its own (it is not broken).
+    """
+    space = widths.space
+    lines = []
+    for raw in text.split("\n"):
+        current = []
+        used = 0
+        for word in raw.split(" "):
+            w = widths(word)
+            if not current:
+                current, used = [word], w
+            elif used + space + w <= width:
+                current.append(word)
+                used += space + w
+            else:
+                lines.append(" ".join(current))
+                current, used = [word], w
+        # leftover, even if empty → blank line
+        lines.append(" ".join(current))
+    return lines
+
+
+class TextLayout:
+    def __init__(self, text, font, width, lines_per_page=2, line_height=None,
+                 color=(0, 0, 0), background=None, widths=None):
+        self.text = text
+        self.font = font
+        self.color = color
+        self.background = background     # opaque pages (a plain copy to draw) when known
+        self.line_height = line_height or font.get_linesize()
+        lines = wrap(text, widths or WordWidths(font), width)
+        self.pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+        self._surfaces = [None] * len(self.pages)
+        self._prefixes = [None] * len(self.pages)
+
+    def page_length(self, page):
+        """Characters on a page (what a typewriter counts)."""
+        return sum(len(line) for line in self.pages[page])
+
+    def page_surface(self, page):
+        surf = self._surfaces[page]
+        if surf is None:
+            lines = self.pages[page]
+            w = max(1, max(self.font.size(line)[0] for line in lines))
+            h = self.line_height * (len(lines) - 1) + self.font.get_height()
+            surf = pygame.Surface((w, h), pygame.SRCALPHA)
+            for row, line in enumerate(lines):
+                if line:
+                    surf.blit(self.font.render(line, True, self.color), (0, row * self.line_height))
+            if self.background is not None:
+                flat = pygame.Surface((w, h))
+                flat.fill(self.background)
+                flat.blit(surf, (0, 0))
+                surf = flat
+            self._surfaces[page] = surf
+        return surf
+
+    def _prefix_widths(self, page):
+        # per line: pixel width of its first k characters, k = 0..len
+        prefixes = self._prefixes[page]
+        if prefixes is None:
+            size = self.font.size
+            prefixes = self._prefixes[page] = [
+                [size(line[:k])[0] for k in range(len(line) + 1)] for line in self.pages[page]
+            ]
+        return prefixes
+
+    def draw(self, surface, page, pos, chars=None):
+        src = self.page_surface(page)
+        if chars is None or chars >= self.page_length(page):
+            surface.blit(src, pos)
+            return
+        x, y = pos
+        lh = self.line_height
+        for row, widths in enumerate(self._prefix_widths(page)):
+            if chars <= 0:
+                break
+            k = min(chars, len(widths) - 1)
+            area = pygame.Rect(0, row * lh, widths[k], min(lh, src.get_height() - row * lh))
+            surface.blit(src, (x, y + row * lh), area)
+            chars -= k
+
+
+class LayoutCache:
+    """TextLayouts by their arguments, least recently used dropped."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._widths = {}           # font → WordWidths
+        self._layouts = OrderedDict()
+
+    def get(self, text, font, width, lines_per_page=2, line_height=None, color=(0, 0, 0), background=None):
+        key = (text, font, color, background, width, lines_per_page, line_height)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            return layout
+        widths = self._widths.get(font)
+        if widths is None:
+            widths = self._widths[font] = WordWidths(font)
+        layout = TextLayout(text, font, width, lines_per_page, line_height, color, background, widths)
+        self._layouts[key] = layout
+        if len(self._layouts) > self.max_entries:
+            self._layouts.popitem(last=False)
+        return layout
+
+
+# --------------------------------------------------------
+# Typewriter
+# --------------------------------------------------------
+class Typewriter:
+    """Reveals a TextLayout page by page at `cps` characters per second (0 = instantly)."""
+
+    def __init__(self, layout, cps=0):
+        self.layout = layout
+        self.cps = cps
+        self.page = 0
+        self.shown = 0.0
+
+    @property
+    def chars(self):
+        """Characters to draw on the current page (None = all)."""
+        return None if self.page_done else int(self.shown)
+
+    @property
+    def page_done(self):
+        return self.cps <= 0 or self.shown >= self.layout.page_length(self.page)
+
+    @property
+    def has_more(self):
+        return self.page < len(self.layout.pages) - 1
+
+    def update(self, dt):
+        if not self.page_done:
+            self.shown += self.cps * dt
+
+    def skip(self):
+        """Show the rest of the current page."""
+        self.shown = self.layout.page_length(self.page)
+
+    def set_page(self, page):
+        self.page = page
+        self.shown = 0.0
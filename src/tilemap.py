@@ -1,10 +1,119 @@
 # tilemap.py
 import pygame
+import base64
+import gzip
 import json
 import os
-from typing import Dict
-from settings import TILESIZE, TILESET_FOLDER
-from utils import resource_path
+import sys
+import zlib
+from typing import Dict, Tuple
+import numpy as np
+from settings import TILESIZE, TILESET_FOLDER, ENCOUNTER_LAYER, ENCOUNTER_RATE
+from utils import resource_path, deep_sizeof
+import atlas as atlas_mod
+from records import Warp, Sign, Ledge, Light
+
+# Tiled stores flip/rotation state in the top bits of every GID
+FLIPPED_HORIZONTALLY_FLAG = 0x80000000
+FLIPPED_VERTICALLY_FLAG = 0x40000000
+FLIPPED_DIAGONALLY_FLAG = 0x20000000
+ROTATED_HEXAGONAL_120_FLAG = 0x10000000
+GID_MASK = 0x0FFFFFFF
+FLAG_SHIFT = 28
+
+# flag values as stored in the per-layer flag arrays (GID >> FLAG_SHIFT)
+FLIP_H = FLIPPED_HORIZONTALLY_FLAG >> FLAG_SHIFT
+FLIP_V = FLIPPED_VERTICALLY_FLAG >> FLAG_SHIFT
+FLIP_D = FLIPPED_DIAGONALLY_FLAG >> FLAG_SHIFT
+
+# TileMap.trigger_mask bits
+TRIGGER_WARP = 1
+TRIGGER_SIGN = 2
+
+
+def split_gids(raw):
+    """
+    Split raw Tiled GIDs into (gids, flags) arrays.
+    gids is uint32 with the flip bits cleared, flags is uint8 (H=8, V=4, D=2).
+    """
+    raw = np.asarray(raw, dtype=np.uint32)
+    gids = raw & np.uint32(GID_MASK)
+    flags = (raw >> np.uint32(FLAG_SHIFT)).astype(np.uint8)
+    return gids, flags
+
+
+def _zstd_decompress(raw: bytes) -> bytes:
+    try:
+        import zstandard
+    except ImportError:
+        try:
+            from compression import zstd  # Python 3.14+
+        except ImportError:
+            raise ValueError("zstd-compressed layer but no zstd module (pip install zstandard)")
+        return zstd.decompress(raw)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+
+
+def decode_tile_data(data, encoding=None, compression=None):
+    """
+    Decode a Tiled layer/chunk "data" field straight into a flat uint32 array.
+    Supports CSV arrays, CSV strings and base64 with zlib/gzip/zstd compression.
+    """
+    if isinstance(data, list):
+        return np.asarray(data, dtype=np.uint32)
+
+    if encoding == "base64":
+        raw = base64.b64decode(data)
+        if compression == "zlib":
+            raw = zlib.decompress(raw)
+        elif compression == "gzip":
+            raw = gzip.decompress(raw)
+        elif compression == "zstd":
+            raw = _zstd_decompress(raw)
+        elif compression:
+            raise ValueError(f"unsupported layer compression: {compression}")
+        # Tiled writes little-endian uint32 GIDs
+        return np.frombuffer(raw, dtype="<u4").astype(np.uint32)
+
+    # "csv" as a string (or missing encoding with string data)
+    if not data.strip():
+        return np.zeros(0, dtype=np.uint32)
+    return np.array(data.split(","), dtype=np.int64).astype(np.uint32)
+
+
+# converted tileset images, shared by every map that uses them
+_tileset_images: Dict[str, pygame.Surface] = {}
+
+
+def _load_tileset_image(image_name):
+    tileset_path = resource_path(os.path.join(TILESET_FOLDER, image_name))
+    key = os.path.normpath(tileset_path)
+    image = _tileset_images.get(key)
+    if image is None:
+        image = pygame.image.load(tileset_path).convert_alpha()
+        _tileset_images[key] = image
+    return image
+
+
+def forget_tileset_image(image_name):
+    """Drop a cached tileset image so the next use reloads it from disk."""
+    tileset_path = resource_path(os.path.join(TILESET_FOLDER, image_name))
+    _tileset_images.pop(os.path.normpath(tileset_path), None)
+
+
+def transform_tile(surf, flags):
+    """
+    Apply Tiled flip flags to a tile surface.
+    Tiled applies the diagonal flip (transpose) first, then H, then V.
+    """
+    if flags & FLIP_D:
+        # transpose = rotate 90 CCW + vertical flip
+        surf = pygame.transform.flip(pygame.transform.rotate(surf, 90), False, True)
+    flip_h = bool(flags & FLIP_H)
+    flip_v = bool(flags & FLIP_V)
+    if flip_h or flip_v:
+        surf = pygame.transform.flip(surf, flip_h, flip_v)
+    return surf
 
 
 class TileMap:
@@ -12,13 +121,16 @@ class TileMap:
     Loads a Tiled .json map including:
       - properties (world_x, world_y, region)
       - multiple tilesets
-      - tile layers
+      - tile layers (2D uint32 GID arrays + flip flag arrays)
+        CSV, base64 (zlib/gzip/zstd) and infinite (chunked) layouts
       - collision walls layer
       - object layer (lights)
     """
 
-    def __init__(self, map_json_path: str):
+    def __init__(self, map_json_path: str, load_tiles: bool = True, atlas=None, keep_json: bool = False):
         map_path = resource_path(map_json_path)
+        self.path = map_json_path
+        self.atlas = atlas or atlas_mod.get_atlas()
 
         with open(map_path, "r", encoding="utf-8") as f:
             self.data = json.load(f)
@@ -29,6 +141,40 @@ class TileMap:
         self.tile_w = self.data.get("tilewidth", TILESIZE)
         self.tile_h = self.data.get("tileheight", TILESIZE)
 
+        # ---------------------------------------------------
+        # INFINITE MAPS: layers are split into chunks that can sit at
+        # negative tile coords. Everything is stored densely over the
+        # union of all chunks; (origin_tx, origin_ty) is the Tiled tile
+        # coordinate of array cell [0, 0].
+        # ---------------------------------------------------
+        self.infinite = bool(self.data.get("infinite", False))
+        self.origin_tx = 0
+        self.origin_ty = 0
+
+        if self.infinite:
+            x0 = y0 = None
+            x1 = y1 = 0
+            for layer in self.data.get("layers", []):
+                if layer.get("type") != "tilelayer":
+                    continue
+                for ch in layer.get("chunks", []):
+                    cx, cy = ch["x"], ch["y"]
+                    x0 = cx if x0 is None else min(x0, cx)
+                    y0 = cy if y0 is None else min(y0, cy)
+                    x1 = max(x1, cx + ch["width"])
+                    y1 = max(y1, cy + ch["height"])
+
+            if x0 is None:
+                x0 = y0 = 0
+            self.origin_tx = x0
+            self.origin_ty = y0
+            self.width = max(0, x1 - x0)
+            self.height = max(0, y1 - y0)
+
+        # pixel offset of array cell [0, 0] inside the map (0 for finite maps)
+        self.origin_x = self.origin_tx * self.tile_w
+        self.origin_y = self.origin_ty * self.tile_h
+
         self.pixel_width = self.width * self.tile_w
         self.pixel_height = self.height * self.tile_h
 
@@ -49,38 +195,22 @@ class TileMap:
         self.world_y = int(self.properties.get("world_y", 0))
 
         # ---------------------------------------------------
-        # TILESET PROCESSING
+        # TILESETS (tiles are uploaded to the shared atlas in load_tiles(),
+        # which must run on the main thread; the rest of the map can be
+        # parsed anywhere)
         # ---------------------------------------------------
-        self.tiles: Dict[int, pygame.Surface] = {}
-
-        for ts in self.data.get("tilesets", []):
-            firstgid = ts["firstgid"]
-            image_name = ts.get("image")
-
-            if not image_name:
-                continue
-
-            tileset_path = resource_path(os.path.join(TILESET_FOLDER, image_name))
-            image = pygame.image.load(tileset_path).convert_alpha()
-
-            tw = ts.get("tilewidth", self.tile_w)
-            th = ts.get("tileheight", self.tile_h)
-            margin = ts.get("margin", 0)
-            spacing = ts.get("spacing", 0)
-
-            columns = (image.get_width() - margin + spacing) // (tw + spacing)
-            rows = (image.get_height() - margin + spacing) // (th + spacing)
-
-            gid = firstgid
-            for ry in range(rows):
-                for rx in range(columns):
-                    x = margin + rx * (tw + spacing)
-                    y = margin + ry * (th + spacing)
-                    rect = pygame.Rect(x, y, tw, th)
-
-                    surf = image.subsurface(rect).copy()
-                    self.tiles[gid] = surf
-                    gid += 1
+        self.tilesets = sorted(
+            (ts for ts in self.data.get("tilesets", []) if ts.get("image")),
+            key=lambda ts: ts["firstgid"]
+        )
+        # raw GID (gid | flags << 28) → (atlas surface, area rect) / None
+        self.tile_refs: Dict[int, Tuple[pygame.Surface, pygame.Rect]] = {}
+        self._tile_keys: Dict[int, tuple] = {}   # raw GID → atlas key
+        self._atlas_generation = self.atlas.generation
+        self.tiles_loaded = False
+
+        # per-backend derived render data (see renderer.py)
+        self.render_cache = {}
 
         # -------------------------------
         # LAYERS
@@ -92,21 +222,33 @@ class TileMap:
             name = layer.get("name", "").lower()
             self.layer_map[name] = i
 
+        # one (height, width) uint32 array of GIDs per layer, flip bits
+        # split out into a parallel uint8 array (0 = not flipped)
+        self.layer_gids = []
+        self.layer_flags = []
+        for layer in self.layers:
+            raw = self._decode_layer(layer)
+            gids, flags = split_gids(raw)
+            self.layer_gids.append(gids)
+            self.layer_flags.append(flags)
+
+        # keep layer metadata only; tile data now lives in the arrays
+        self.layers = [
+            {k: v for k, v in layer.items() if k not in ("data", "chunks")}
+            for layer in self.layers
+        ]
+
         # -------------------------------
         # COLLISION LAYER (walls)
         # -------------------------------
-        self.collisions = []
-        walls_idx = self.layer_map.get("walls")
-
-        if walls_idx is not None:
-            walls_layer = self.layers[walls_idx]
-            data = walls_layer.get("data", [])
-            for i, gid in enumerate(data):
-                if gid == 0:
-                    continue
-                tx = (i % self.width) * self.tile_w
-                ty = (i // self.width) * self.tile_h
-                self.collisions.append(pygame.Rect(tx, ty, self.tile_w, self.tile_h))
+        # blocked[cy, cx]: wall tile present, or a set_passable() override
+        walls = self.layer_array("walls")
+        if walls is not None:
+            self.blocked = walls != 0
+        else:
+            self.blocked = np.zeros((self.height, self.width), dtype=bool)
+        self.passable_overrides = {}   # (cx, cy) → passable flag
+        self._collisions = None        # Rect list, built on demand
 
         # --- Load directional ledges ---
         self.ledges = []
@@ -124,10 +266,7 @@ class TileMap:
 
                     direction = int(props.get("direction", -1))
 
-                    self.ledges.append({
-                        "rect": pygame.Rect(x, y, w, h),
-                        "dir": direction
-                    })
+                    self.ledges.append(Ledge(pygame.Rect(x, y, w, h), direction))
 
         # -------------------------------
         # LIGHT OBJECTS
@@ -141,7 +280,7 @@ class TileMap:
                     w = obj["width"]
                     h = obj["height"]
                     r = int(max(w, h) * 0.8)
-                    self.lights.append((x, y, w, h, r))
+                    self.lights.append(Light(x, y, w, h, r))
 
         # -------------------------------
         # WARPS (correct syntax)
@@ -153,13 +292,14 @@ class TileMap:
                     raw_props = obj.get("properties", [])
                     props = {p["name"]: p["value"] for p in raw_props}
 
-                    warp = {
-                        "x": obj["x"] // TILESIZE,
-                        "y": obj["y"] // TILESIZE,
-                        "dest_map": props.get("dest_map"),
-                        "dest_x": props.get("dest_x"),
-                        "dest_y": props.get("dest_y"),
-                    }
+                    dest_map = props.get("dest_map")
+                    warp = Warp(
+                        int(obj["x"] // TILESIZE),
+                        int(obj["y"] // TILESIZE),
+                        sys.intern(dest_map) if isinstance(dest_map, str) else dest_map,
+                        props.get("dest_x"),
+                        props.get("dest_y"),
+                    )
 
                     self.warps.append(warp)
         
@@ -180,7 +320,494 @@ class TileMap:
                     text = props.get("text", "")
                     r = pygame.Rect(obj["x"], obj["y"], obj.get("width", 0), obj.get("height", 0))
 
-                    self.signs.append({"rect": r, "text": text})
+                    self.signs.append(Sign(r, text))
+
+        # -------------------------------
+        # NPC SPAWNS (spawned by entities.EntityManager)
+        # -------------------------------
+        self.npcs = []
+        for layer in self.data.get("layers", []):
+            if layer.get("type") == "objectgroup" and layer.get("name", "").lower() == "npcs":
+                for obj in layer.get("objects", []):
+                    props = {p["name"]: p["value"] for p in obj.get("properties", [])}
+                    self.npcs.append({
+                        "x": int(obj["x"] // self.tile_w),
+                        "y": int(obj["y"] // self.tile_h),
+                        "sprite": int(props.get("sprite", 0)),
+                        "facing": props.get("facing", "down"),
+                        "behaviour": props.get("behaviour", "stand"),
+                        "radius": int(props.get("radius", 3)),
+                        "text": props.get("text", ""),
+                    })
+
+        # -------------------------------
+        # WILD ENCOUNTERS (rolled by encounters.EncounterSystem)
+        # -------------------------------
+        # zone k (1-based) = encounter_tables[k - 1]; the map's own
+        # "encounters" property covers the whole map, zones from the
+        # "encounters" object layer override it where they overlap
+        # (encounter_area / encounter_zone are uint8: at most 255 zones)
+        self.encounter_tables = []     # (rate, table text)
+        self.encounter_zones = []      # (local pixel Rect, zone index)
+        dropped = 0
+        default_rate = self.properties.get("encounter_rate", ENCOUNTER_RATE)
+        try:
+            default_rate = float(default_rate)
+        except (TypeError, ValueError):
+            print("TileMap: bad encounter_rate", repr(default_rate), "in", self.path)
+            default_rate = ENCOUNTER_RATE
+        if self.properties.get("encounters"):
+            self.encounter_tables.append((default_rate, self.properties["encounters"]))
+        for layer in self.data.get("layers", []):
+            if layer.get("type") == "objectgroup" and layer.get("name", "").lower() == "encounters":
+                for obj in layer.get("objects", []):
+                    props = {p["name"]: p["value"] for p in obj.get("properties", [])}
+                    table = props.get("table") or self.properties.get("encounters")
+                    if not table:
+                        continue
+                    try:
+                        rate = float(props.get("rate", default_rate))
+                    except (TypeError, ValueError):
+                        print("TileMap: bad encounter rate", repr(props.get("rate")), "in", self.path,
+                              "- zone skipped")
+                        continue
+                    if len(self.encounter_tables) >= 255:
+                        dropped += 1
+                        continue
+                    self.encounter_tables.append((rate, table))
+                    r = pygame.Rect(obj["x"], obj["y"], obj.get("width", 0), obj.get("height", 0))
+                    self.encounter_zones.append((r, len(self.encounter_tables)))
+        if dropped:
+            print("TileMap:", dropped, "encounter zones past the 255th skipped in", self.path)
+        # GIDs of the encounter layer that count as tall grass ("" = any tile)
+        tiles = str(self.properties.get("encounter_tiles", ""))
+        self.encounter_gids = [int(g) for g in tiles.replace(",", " ").split()]
+
+        self._build_trigger_index()
+        self._build_encounter_index()
+
+        # runtime mutations (see set_tile / set_passable / set_warp)
+        self.mutation_listeners = []   # callables(tilemap, changes)
+        self._batch_depth = 0
+        self._pending_changes = {}     # layer name / "passable" / "warps" → set of cells
+
+        # everything is extracted: drop the parsed JSON unless asked to keep it
+        if not keep_json:
+            self.data = None
+
+        if load_tiles:
+            self.load_tiles()
+
+    # --------------------------------------------------------
+    # TILESET PROCESSING
+    # --------------------------------------------------------
+    def load_tiles(self):
+        """Upload every tile (and flip variant) the layers use to the atlas."""
+        if self.tiles_loaded:
+            return
+
+        used = set()
+        for gids, flags in zip(self.layer_gids, self.layer_flags):
+            raw = gids | (flags.astype(np.uint32) << np.uint32(FLAG_SHIFT))
+            used.update(np.unique(raw[gids != 0]).tolist())
+
+        for raw in sorted(used):
+            self._acquire_tile(raw)
+
+        self.tiles_loaded = True
+
+    def _tile_source(self, gid):
+        """(tileset image name, source rect) of a GID, or None."""
+        ts = None
+        for candidate in self.tilesets:
+            if candidate["firstgid"] <= gid:
+                ts = candidate
+            else:
+                break
+        if ts is None:
+            return None
+
+        image = _load_tileset_image(ts["image"])
+        tw = ts.get("tilewidth", self.tile_w)
+        th = ts.get("tileheight", self.tile_h)
+        margin = ts.get("margin", 0)
+        spacing = ts.get("spacing", 0)
+
+        columns = (image.get_width() - margin + spacing) // (tw + spacing)
+        rows = (image.get_height() - margin + spacing) // (th + spacing)
+
+        local = gid - ts["firstgid"]
+        if columns <= 0 or local >= columns * rows:
+            return None
+
+        x = margin + (local % columns) * (tw + spacing)
+        y = margin + (local // columns) * (th + spacing)
+        return ts["image"], pygame.Rect(x, y, tw, th)
+
+    def uses_tileset(self, file_name):
+        return any(os.path.basename(ts["image"]) == file_name for ts in self.tilesets)
+
+    def _acquire_tile(self, raw):
+        gid = raw & GID_MASK
+        flags = raw >> FLAG_SHIFT
+        source = self._tile_source(gid)
+        if source is None:
+            self.tile_refs[raw] = None
+            return None
+
+        image_name, rect = source
+        key = (os.path.normpath(image_name), rect.x, rect.y, rect.w, rect.h, flags)
+
+        def make_surface():
+            return transform_tile(_load_tileset_image(image_name).subsurface(rect), flags)
+
+        ref = self.atlas.acquire(key, make_surface)
+        self._tile_keys[raw] = key
+        self.tile_refs[raw] = ref
+        return ref
+
+    def _refresh_tile_refs(self):
+        # the atlas was compacted: slots moved
+        for raw, key in self._tile_keys.items():
+            self.tile_refs[raw] = self.atlas.lookup(key)
+        self._atlas_generation = self.atlas.generation
+
+    def release(self):
+        """Drop this map's atlas references (call when the map is unloaded)."""
+        for key in self._tile_keys.values():
+            self.atlas.release(key)
+        self._tile_keys.clear()
+        self.tile_refs.clear()
+        self.render_cache.clear()
+        self.tiles_loaded = False
+
+    # --------------------------------------------------------
+    # MEMORY ACCOUNTING
+    # --------------------------------------------------------
+    def memory_usage(self):
+        """
+        Approximate bytes held by this map, by category. Atlas slots are
+        shared between maps, so tile_surfaces counts this map's slots
+        even if another map references them too.
+        """
+        tile_surfaces = 0
+        for ref in self.tile_refs.values():
+            if ref is not None:
+                surf, area = ref
+                tile_surfaces += area.w * area.h * surf.get_bytesize()
+
+        layer_data = sum(a.nbytes for a in self.layer_gids) + sum(a.nbytes for a in self.layer_flags)
+
+        layer_data += self.blocked.nbytes + self.ledge_mask.nbytes + self.trigger_mask.nbytes
+        layer_data += self.encounter_area.nbytes + self.encounter_zone.nbytes
+
+        objects = deep_sizeof(self._collisions) + deep_sizeof(self.ledges) + \
+            deep_sizeof(self.lights) + deep_sizeof(self.warps) + deep_sizeof(self.signs) + \
+            deep_sizeof(self.npcs) + \
+            deep_sizeof(self.warp_cells) + deep_sizeof(self.sign_cells)
+
+        render_cache = 0
+        for value in self.render_cache.values():
+            if isinstance(value, pygame.Surface):
+                render_cache += value.get_width() * value.get_height() * value.get_bytesize()
+            else:
+                render_cache += deep_sizeof(value)
+
+        return {
+            "tile_surfaces": tile_surfaces,
+            "layer_data": layer_data,
+            "objects": objects,
+            "render_cache": render_cache,
+            "retained_json": deep_sizeof(self.data) if self.data is not None else 0,
+        }
+
+    # --------------------------------------------------------
+    # COLLISION / TRIGGER LOOKUP (array cells)
+    # --------------------------------------------------------
+    def _rect_cells(self, rect):
+        """Array cells a local pixel rect overlaps (same rule as Rect.colliderect)."""
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        x0 = (rect.left - self.origin_x) // self.tile_w
+        y0 = (rect.top - self.origin_y) // self.tile_h
+        x1 = -((self.origin_x - rect.right) // self.tile_w)   # ceil
+        y1 = -((self.origin_y - rect.bottom) // self.tile_h)
+        return [
+            (cx, cy)
+            for cy in range(max(y0, 0), min(y1, self.height))
+            for cx in range(max(x0, 0), min(x1, self.width))
+        ]
+
+    def _build_trigger_index(self):
+        # ledge_mask[cy, cx]: bit d set for every ledge with direction d
+        # covering the cell (bit 4 = ledge without a valid direction)
+        self.ledge_mask = np.zeros((self.height, self.width), dtype=np.uint8)
+        for ledge in self.ledges:
+            d = ledge.dir
+            bit = 1 << d if 0 <= d <= 3 else 1 << 4
+            for cx, cy in self._rect_cells(ledge.rect):
+                self.ledge_mask[cy, cx] |= bit
+
+        self.warp_cells = {}
+        for warp in self.warps:
+            cell = (warp.x - self.origin_tx, warp.y - self.origin_ty)
+            self.warp_cells.setdefault(cell, warp)
+
+        # cell → indices into self.signs, in file order
+        self.sign_cells = {}
+        for i, sign in enumerate(self.signs):
+            for cell in self._rect_cells(sign.rect):
+                self.sign_cells.setdefault(cell, []).append(i)
+
+        # trigger_mask[cy, cx]: TRIGGER_WARP / TRIGGER_SIGN bits, the grid
+        # form of warp_cells / sign_cells
+        self.trigger_mask = np.zeros((self.height, self.width), dtype=np.uint8)
+        for cx, cy in self.warp_cells:
+            self.trigger_mask[cy, cx] |= TRIGGER_WARP
+        for cx, cy in self.sign_cells:
+            self.trigger_mask[cy, cx] |= TRIGGER_SIGN
+
+    def _build_encounter_index(self):
+        # encounter_area[cy, cx]: zone covering the cell (0 = none);
+        # encounter_zone: the same, limited to tall grass cells, so a
+        # step needs a single lookup
+        self.encounter_area = np.zeros((self.height, self.width), dtype=np.uint8)
+        if self.properties.get("encounters"):
+            self.encounter_area.fill(1)
+        for rect, zone in self.encounter_zones:
+            for cx, cy in self._rect_cells(rect):
+                self.encounter_area[cy, cx] = zone
+        self.encounter_zone = np.where(self._encounter_grass(), self.encounter_area, 0).astype(np.uint8)
+
+    def _encounter_grass(self, cells=None):
+        grass = self.layer_array(ENCOUNTER_LAYER)
+        if grass is None:
+            return np.zeros((self.height, self.width), dtype=bool)
+        if cells is not None:
+            grass = grass[cells]
+        if self.encounter_gids:
+            return np.isin(grass, self.encounter_gids)
+        return grass != 0
+
+    @property
+    def collisions(self):
+        """Wall Rects in local pixels (derived from `blocked`, cached)."""
+        if self._collisions is None:
+            rows, cols = np.nonzero(self.blocked)
+            self._collisions = [
+                pygame.Rect(self.origin_x + cx * self.tile_w, self.origin_y + cy * self.tile_h,
+                            self.tile_w, self.tile_h)
+                for cy, cx in zip(rows.tolist(), cols.tolist())
+            ]
+        return self._collisions
+
+    def in_bounds(self, cx, cy):
+        return 0 <= cx < self.width and 0 <= cy < self.height
+
+    # --------------------------------------------------------
+    # RUNTIME MUTATION (map-local Tiled tile coords)
+    # --------------------------------------------------------
+    def set_tile(self, layer_name, tx, ty, gid):
+        """Change one tile; gid may carry Tiled flip bits. Editing "walls" updates collision."""
+        idx = self.layer_map.get(layer_name.lower())
+        cx, cy = tx - self.origin_tx, ty - self.origin_ty
+        if idx is None or not self.in_bounds(cx, cy):
+            return False
+
+        gid = int(gid)
+        new_gid = gid & GID_MASK
+        new_flags = gid >> FLAG_SHIFT
+        if self.layer_gids[idx][cy, cx] == new_gid and self.layer_flags[idx][cy, cx] == new_flags:
+            return False
+
+        self.layer_gids[idx][cy, cx] = new_gid
+        self.layer_flags[idx][cy, cx] = new_flags
+        self._mark(layer_name.lower(), cx, cy)
+        return True
+
+    def set_passable(self, tx, ty, flag):
+        """Force a cell passable (True) / blocked (False); None restores the walls layer."""
+        cx, cy = tx - self.origin_tx, ty - self.origin_ty
+        if not self.in_bounds(cx, cy):
+            return False
+        if flag is None:
+            self.passable_overrides.pop((cx, cy), None)
+        else:
+            self.passable_overrides[(cx, cy)] = bool(flag)
+        self._mark("passable", cx, cy)
+        return True
+
+    def set_warp(self, tx, ty, warp):
+        """Add/replace (Warp or dict with dest_map/dest_x/dest_y) or remove (None) the warp on a tile."""
+        cx, cy = tx - self.origin_tx, ty - self.origin_ty
+        if not self.in_bounds(cx, cy):
+            return False
+        old = self.warp_cells.pop((cx, cy), None)
+        if old is not None and old in self.warps:
+            self.warps.remove(old)
+        if warp is not None:
+            warp = Warp.coerce(warp, tx, ty)
+            self.warps.append(warp)
+            self.warp_cells[(cx, cy)] = warp
+            self.trigger_mask[cy, cx] |= TRIGGER_WARP
+        else:
+            self.trigger_mask[cy, cx] &= 0xFF ^ TRIGGER_WARP
+        self._mark("warps", cx, cy)
+        return True
+
+    def begin_batch(self):
+        self._batch_depth += 1
+
+    def end_batch(self):
+        self._batch_depth -= 1
+        if self._batch_depth <= 0:
+            self._batch_depth = 0
+            self._flush_changes()
+
+    def _mark(self, kind, cx, cy):
+        self._pending_changes.setdefault(kind, set()).add((cx, cy))
+        if not self._batch_depth:
+            self._flush_changes()
+
+    def _flush_changes(self):
+        """One invalidation pass over every cell touched since the last flush."""
+        changes = self._pending_changes
+        if not changes:
+            return
+        self._pending_changes = {}
+
+        cells = changes.get("walls", set()) | changes.get("passable", set())
+        if cells:
+            walls = self.layer_array("walls")
+            for cx, cy in cells:
+                override = self.passable_overrides.get((cx, cy))
+                if override is not None:
+                    self.blocked[cy, cx] = not override
+                else:
+                    self.blocked[cy, cx] = walls is not None and walls[cy, cx] != 0
+            self._collisions = None
+
+        cells = changes.get(ENCOUNTER_LAYER)
+        if cells and self.encounter_tables:
+            idx = tuple(np.array(sorted(cells)).T[::-1])   # (rows, cols)
+            self.encounter_zone[idx] = np.where(self._encounter_grass(idx), self.encounter_area[idx], 0)
+
+        for fn in self.mutation_listeners:
+            fn(self, changes)
+
+    # --------------------------------------------------------
+    # LAYER DECODING
+    # --------------------------------------------------------
+    def _decode_layer(self, layer):
+        """Return a (height, width) uint32 array of raw GIDs for one layer."""
+        encoding = layer.get("encoding")
+        compression = layer.get("compression")
+        out = np.zeros((self.height, self.width), dtype=np.uint32)
+
+        if self.infinite:
+            for ch in layer.get("chunks", []):
+                cw, chh = ch["width"], ch["height"]
+                flat = decode_tile_data(ch.get("data", []), encoding, compression)
+                if flat.size != cw * chh:
+                    print("TileMap: bad chunk size in layer", layer.get("name"))
+                    continue
+                x = ch["x"] - self.origin_tx
+                y = ch["y"] - self.origin_ty
+                out[y:y + chh, x:x + cw] = flat.reshape(chh, cw)
+            return out
+
+        flat = decode_tile_data(layer.get("data", []), encoding, compression)
+        if flat.size != self.width * self.height:
+            print("TileMap: bad data size in layer", layer.get("name"))
+            return out
+        return flat.reshape(self.height, self.width)
+
+    @property
+    def bounds(self):
+        """Local pixel bounds (x, y, w, h); x/y are negative for infinite maps with chunks left/above 0."""
+        return (self.origin_x, self.origin_y, self.pixel_width, self.pixel_height)
+
+    # --------------------------------------------------------
+    # LAYER QUERIES
+    # --------------------------------------------------------
+    def layer_array(self, layer_name):
+        """(height, width) uint32 GID array of a layer, or None."""
+        idx = self.layer_map.get(layer_name.lower())
+        if idx is None:
+            return None
+        return self.layer_gids[idx]
+
+    def layer_flag_array(self, layer_name):
+        idx = self.layer_map.get(layer_name.lower())
+        if idx is None:
+            return None
+        return self.layer_flags[idx]
+
+    def cells_in_rect(self, layer_name, tx, ty, tw, th):
+        """
+        Non-empty cells of a layer inside a tile rect (map-local tiles).
+        Returns (xs, ys, gids) arrays; empty arrays if nothing matches.
+        """
+        gids = self.layer_array(layer_name)
+        if gids is None:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty, np.zeros(0, dtype=np.uint32)
+
+        # tile coords -> array cells
+        tx -= self.origin_tx
+        ty -= self.origin_ty
+        x0, y0 = max(tx, 0), max(ty, 0)
+        x1, y1 = min(tx + tw, self.width), min(ty + th, self.height)
+        if x1 <= x0 or y1 <= y0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty, np.zeros(0, dtype=np.uint32)
+
+        sub = gids[y0:y1, x0:x1]
+        ys, xs = np.nonzero(sub)
+        return xs + (x0 + self.origin_tx), ys + (y0 + self.origin_ty), sub[ys, xs]
+
+    def cells_with_gids(self, layer_name, gid_set):
+        """
+        Cells of a layer whose (unflipped) GID is in gid_set.
+        Returns (xs, ys) arrays in map-local tiles.
+        """
+        gids = self.layer_array(layer_name)
+        if gids is None or not gid_set:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+
+        wanted = np.fromiter(gid_set, dtype=np.uint32, count=len(gid_set))
+        ys, xs = np.nonzero(np.isin(gids, wanted))
+        return xs + self.origin_tx, ys + self.origin_ty
+
+    # --------------------------------------------------------
+    # TILE LOOKUP (with flip variants)
+    # --------------------------------------------------------
+    def get_tile(self, gid, flags=0):
+        """(atlas surface, area rect) for a GID + flip flags, or None."""
+        if self._atlas_generation != self.atlas.generation:
+            self._refresh_tile_refs()
+        raw = gid | (flags << FLAG_SHIFT)
+        if raw in self.tile_refs:
+            return self.tile_refs[raw]
+        return self._acquire_tile(raw)
+
+    # --------------------------------------------------------
+    # VISIBLE TILE RANGE (camera culling)
+    # --------------------------------------------------------
+    def visible_range(self, camera, offset_x=0, offset_y=0):
+        """
+        Array cell range (x0, y0, x1, y1) covered by the camera.
+        offset_x/offset_y is the pixel position of cell [0, 0].
+        """
+        left = camera.x - offset_x
+        top = camera.y - offset_y
+
+        x0 = max(0, int(left // self.tile_w))
+        y0 = max(0, int(top // self.tile_h))
+        x1 = min(self.width, int((left + camera.w) // self.tile_w) + 1)
+        y1 = min(self.height, int((top + camera.h) // self.tile_h) + 1)
+        return x0, y0, x1, y1
 
     # --------------------------------------------------------
     # DRAW ONE LAYER
@@ -190,19 +817,29 @@ class TileMap:
         if idx is None:
             return
 
-        layer = self.layers[idx]
-        data = layer.get("data", [])
+        offset_x += self.origin_x
+        offset_y += self.origin_y
+        x0, y0, x1, y1 = self.visible_range(camera, offset_x, offset_y)
+        if x1 <= x0 or y1 <= y0:
+            return
 
-        for i, gid in enumerate(data):
-            if gid == 0:
-                continue
+        sub = self.layer_gids[idx][y0:y1, x0:x1]
+        ys, xs = np.nonzero(sub)
+        if len(xs) == 0:
+            return
 
-            tile = self.tiles.get(gid)
-            if tile is None:
-                continue
+        raw = sub[ys, xs] | (self.layer_flags[idx][y0:y1, x0:x1][ys, xs].astype(np.uint32) << np.uint32(FLAG_SHIFT))
 
-            x = (i % self.width) * self.tile_w + offset_x
-            y = (i // self.width) * self.tile_h + offset_y
+        if self._atlas_generation != self.atlas.generation:
+            self._refresh_tile_refs()
+        refs = self.tile_refs
 
-            dest = camera.apply(pygame.Rect(x, y, self.tile_w, self.tile_h))
-            surface.blit(tile, dest.topleft)
+        # camera.apply() done once for the layer origin instead of per tile
+        base_x, base_y = camera.apply((offset_x + x0 * self.tile_w, offset_y + y0 * self.tile_h))
+        tw, th = self.tile_w, self.tile_h
+
+        for x, y, r in zip(xs.tolist(), ys.tolist(), raw.tolist()):
+            ref = refs[r] if r in refs else self._acquire_tile(r)
+            if ref is None:
+                continue
+            surface.blit(ref[0], (base_x + x * tw, base_y + y * th), ref[1])
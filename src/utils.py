@@ -17,9 +17,53 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base, relative_path)
 
 
+def user_data_path(relative_path: str) -> str:
+    """
+    Writable location for files the game creates (saves, profiles).
+    Dev: the project root, like resource_path, whatever the cwd.
+    Frozen builds (_MEIPASS is read-only): a per-user data folder,
+    %APPDATA%, ~/Library/Application Support or $XDG_DATA_HOME.
+    """
+    if not hasattr(sys, "_MEIPASS"):
+        return resource_path(relative_path)
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, "PokemonClone", relative_path)
+
+
 def lerp_color(c1, c2, t):
     return (
         int(c1[0] + (c2[0] - c1[0]) * t),
         int(c1[1] + (c2[1] - c1[1]) * t),
         int(c1[2] + (c2[2] - c1[2]) * t)
     )
+
+
+def deep_sizeof(obj, _seen=None):
+    """
+    Approximate memory footprint of a container tree (dicts, lists,
+    tuples, sets, strings, numbers, Rects). Shared objects count once.
+    NumPy arrays and Surfaces are not followed into their buffers.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += deep_sizeof(k, _seen) + deep_sizeof(v, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, _seen)
+    elif hasattr(obj, "__slots__"):
+        for name in obj.__slots__:
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name), _seen)
+    return size
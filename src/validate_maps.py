@@ -0,0 +1,375 @@
+# validate_maps.py
+"""
+Check every map in a maps folder without opening a game window.
+
+    python src/validate_maps.py                       # report to stdout
+    python src/validate_maps.py --out report.json -j 8
+
+Maps are parsed in parallel worker processes (TileMap without tiles,
+SDL dummy driver). Cross-map checks then run on the small per-map
+summaries the workers send back:
+
+  gid_unresolved    a layer uses a GID no image tileset of the map covers
+  tileset_missing   a tileset image is missing or unreadable
+  warp_dest_missing a warp points at a map that doesn't exist
+  warp_dest_blocked a warp lands outside its destination map or on a wall
+  world_overlap     two overworld maps cover the same world tiles
+  sign_unreachable  no walkable tile next to a sign can be reached from
+                    an entry point (start tile or a warp landing tile)
+  no_entry          (warning) nothing leads into the map
+
+Exits 1 if any error was found (--strict: any warning too).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from settings import MAPS_FOLDER, TILESET_FOLDER, START_MAP, START_TILE_X, START_TILE_Y
+from tilemap import TileMap
+from utils import resource_path
+from world_manager import ledge_dir_for_move
+from world_manifest import list_map_names
+
+_STEPS = [(dx, dy, 1 << ledge_dir_for_move(dx, dy)) for dx, dy in ((0, 1), (0, -1), (-1, 0), (1, 0))]
+
+_tileset_sizes = {}   # per worker process: image name → tile count (None = unreadable)
+
+
+def _issue(map_name, kind, message, x=None, y=None, severity="error"):
+    issue = {"map": map_name, "kind": kind, "severity": severity, "message": message}
+    if x is not None:
+        issue["x"], issue["y"] = int(x), int(y)
+    return issue
+
+
+# --------------------------------------------------------
+# Per-map pass (worker processes)
+# --------------------------------------------------------
+def _tile_count(ts, tile_w, tile_h):
+    if ts.get("tilecount"):
+        return int(ts["tilecount"])
+
+    image = ts["image"]
+    if image not in _tileset_sizes:
+        try:
+            w, h = pygame.image.load(resource_path(os.path.join(TILESET_FOLDER, image))).get_size()
+            tw, th = ts.get("tilewidth", tile_w), ts.get("tileheight", tile_h)
+            margin, spacing = ts.get("margin", 0), ts.get("spacing", 0)
+            cols = (w - margin + spacing) // (tw + spacing)
+            rows = (h - margin + spacing) // (th + spacing)
+            _tileset_sizes[image] = max(0, cols * rows)
+        except Exception:
+            _tileset_sizes[image] = None
+    return _tileset_sizes[image]
+
+
+def _tileset_exists(image):
+    return os.path.exists(resource_path(os.path.join(TILESET_FOLDER, image)))
+
+
+def scan_map(maps_folder, name):
+    """Parse one map and run the checks that need only this map."""
+    path = resource_path(os.path.join(maps_folder, name + ".json"))
+    try:
+        tm = TileMap(path, load_tiles=False)
+    except Exception as e:
+        return {"name": name, "error": f"{type(e).__name__}: {e}", "issues": []}
+
+    issues = []
+
+    # every used GID must fall inside an image tileset
+    firstgids, counts = [], []
+    for ts in tm.tilesets:
+        if not _tileset_exists(ts["image"]):
+            issues.append(_issue(name, "tileset_missing", f"tileset image '{ts['image']}' not found"))
+        count = _tile_count(ts, tm.tile_w, tm.tile_h)
+        firstgids.append(ts["firstgid"])
+        counts.append(count or 0)
+    firstgids = np.array(firstgids, dtype=np.int64)
+    counts = np.array(counts, dtype=np.int64)
+
+    for layer, gids in zip(tm.layers, tm.layer_gids):
+        used = np.unique(gids)
+        used = used[used != 0].astype(np.int64)
+        if not len(used):
+            continue
+        owner = np.searchsorted(firstgids, used, side="right") - 1
+        ok = owner >= 0
+        ok[ok] &= used[ok] < firstgids[owner[ok]] + counts[owner[ok]]
+        for gid in used[~ok].tolist():
+            cy, cx = np.argwhere(gids == gid)[0].tolist()
+            issues.append(_issue(
+                name, "gid_unresolved",
+                f"layer '{layer.get('name')}' uses GID {gid} not covered by any image tileset",
+                cx + tm.origin_tx, cy + tm.origin_ty
+            ))
+
+    return {
+        "name": name,
+        "issues": issues,
+        "overworld": "world_x" in tm.properties and "world_y" in tm.properties,
+        "world_x": tm.world_x,
+        "world_y": tm.world_y,
+        "origin": (tm.origin_tx, tm.origin_ty),
+        "size": (tm.width, tm.height),
+        "blocked": tm.blocked,
+        "ledge_mask": tm.ledge_mask,
+        "warps": [(w.x, w.y, w.dest_map, w.dest_x, w.dest_y) for w in tm.warps],
+        "signs": [
+            (s.text, [(cx + tm.origin_tx, cy + tm.origin_ty) for cx, cy in tm._rect_cells(s.rect)])
+            for s in tm.signs
+        ],
+    }
+
+
+def _scan_star(args):
+    return scan_map(*args)
+
+
+# --------------------------------------------------------
+# Cross-map checks
+# --------------------------------------------------------
+class _Group:
+    """A walkable grid: one interior, or all overworld maps stitched."""
+
+    def __init__(self, maps):
+        self.maps = maps
+        rects = [self.rect(m) for m in maps]
+        self.left = min(r[0] for r in rects)
+        self.top = min(r[1] for r in rects)
+        self.width = max(r[0] + r[2] for r in rects) - self.left
+        self.height = max(r[1] + r[3] for r in rects) - self.top
+
+        covered = np.zeros((self.height, self.width), dtype=bool)
+        blocked = np.zeros((self.height, self.width), dtype=bool)
+        ledges = np.zeros((self.height, self.width), dtype=np.uint8)
+        for m, (x, y, w, h) in zip(maps, rects):
+            x -= self.left
+            y -= self.top
+            covered[y:y + h, x:x + w] = True
+            blocked[y:y + h, x:x + w] |= m["blocked"]
+            ledges[y:y + h, x:x + w] |= m["ledge_mask"]
+        self.passable = (covered & ~blocked).ravel().tolist()
+        self.ledges = ledges.ravel().tolist()
+
+        # stepping onto a warp leaves the grid
+        self.stops = set()
+        for m in maps:
+            for wx, wy, *_ in m["warps"]:
+                idx = self.index(*self.to_group(m, wx, wy))
+                if idx is not None:
+                    self.stops.add(idx)
+
+    @staticmethod
+    def rect(m):
+        ox, oy = m["origin"]
+        w, h = m["size"]
+        if m["overworld"]:
+            return (m["world_x"] + ox, m["world_y"] + oy, w, h)
+        return (ox, oy, w, h)
+
+    @staticmethod
+    def to_group(m, tx, ty):
+        """Map-local Tiled tile → group tile."""
+        if m["overworld"]:
+            return tx + m["world_x"], ty + m["world_y"]
+        return tx, ty
+
+    def index(self, gx, gy):
+        x, y = gx - self.left, gy - self.top
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def flood(self, seeds):
+        w, h = self.width, self.height
+        passable, ledges, stops = self.passable, self.ledges, self.stops
+        seen = bytearray(w * h)
+        queue = deque()
+        for s in seeds:
+            if s is not None and not seen[s]:
+                seen[s] = 1
+                queue.append(s)
+        while queue:
+            v = queue.popleft()
+            if v in stops and v not in seeds:
+                continue
+            x, y = v % w, v // w
+            for dx, dy, bit in _STEPS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < w and 0 <= ny < h):
+                    continue
+                n = ny * w + nx
+                if seen[n] or not passable[n]:
+                    continue
+                mask = ledges[n]
+                if mask and mask & ~bit:
+                    continue
+                seen[n] = 1
+                queue.append(n)
+        return seen
+
+
+def _tile_ok(m, tx, ty):
+    ox, oy = m["origin"]
+    w, h = m["size"]
+    cx, cy = tx - ox, ty - oy
+    return 0 <= cx < w and 0 <= cy < h and not m["blocked"][cy, cx]
+
+
+def check_world(maps, start=(START_MAP, START_TILE_X, START_TILE_Y)):
+    issues = []
+
+    # warps land on a passable tile of an existing map; collect entry points
+    entries = {name: [] for name in maps}
+    if start[0] in maps:
+        entries[start[0]].append((start[1], start[2]))
+    for name, m in maps.items():
+        for wx, wy, dest, dx, dy in m["warps"]:
+            target = maps.get(dest)
+            if target is None:
+                issues.append(_issue(name, "warp_dest_missing", f"warp to unknown map '{dest}'", wx, wy))
+                continue
+            try:
+                dx, dy = int(dx), int(dy)
+            except (TypeError, ValueError):
+                issues.append(_issue(name, "warp_dest_blocked", f"warp to '{dest}' has no dest_x/dest_y", wx, wy))
+                continue
+            if not _tile_ok(target, dx, dy):
+                issues.append(_issue(
+                    name, "warp_dest_blocked",
+                    f"warp lands on {dest} ({dx}, {dy}), which is a wall or outside the map", wx, wy
+                ))
+                continue
+            entries[dest].append((dx, dy))
+
+    # overworld maps must not cover the same world tiles
+    overworld = sorted(n for n, m in maps.items() if m["overworld"])
+    rects = {n: _Group.rect(maps[n]) for n in overworld}
+    for i, a in enumerate(overworld):
+        ax, ay, aw, ah = rects[a]
+        for b in overworld[i + 1:]:
+            bx, by, bw, bh = rects[b]
+            ow = min(ax + aw, bx + bw) - max(ax, bx)
+            oh = min(ay + ah, by + bh) - max(ay, by)
+            if ow > 0 and oh > 0:
+                issues.append(_issue(
+                    a, "world_overlap", f"overlaps '{b}' by {ow}x{oh} tiles at world tile "
+                    f"({max(ax, bx)}, {max(ay, by)})", severity="error"
+                ))
+
+    # signs reachable from an entry point
+    groups = [[n] for n, m in maps.items() if not m["overworld"]]
+    if overworld:
+        groups.append(overworld)
+    for names in groups:
+        members = [maps[n] for n in names]
+        seeds_local = [(maps[n], t) for n in names for t in entries[n]]
+        if not seeds_local:
+            for n in names:
+                issues.append(_issue(n, "no_entry", "no start tile or warp leads into this map", severity="warning"))
+            continue
+        if not any(m["signs"] for m in members):
+            continue
+
+        group = _Group(members)
+        seeds = {group.index(*group.to_group(m, tx, ty)) for m, (tx, ty) in seeds_local}
+        seen = group.flood(seeds)
+        for m in members:
+            for text, cells in m["signs"]:
+                reachable = False
+                for tx, ty in cells:
+                    gx, gy = group.to_group(m, tx, ty)
+                    for dx, dy, _ in _STEPS:
+                        idx = group.index(gx + dx, gy + dy)
+                        if idx is not None and seen[idx]:
+                            reachable = True
+                            break
+                    if reachable:
+                        break
+                if not reachable and cells:
+                    snippet = (text[:40] + "...") if len(text) > 40 else text
+                    issues.append(_issue(
+                        m["name"], "sign_unreachable", f"sign '{snippet}' can't be reached",
+                        cells[0][0], cells[0][1]
+                    ))
+
+    return issues
+
+
+# --------------------------------------------------------
+# Driver
+# --------------------------------------------------------
+def validate(maps_folder=MAPS_FOLDER, jobs=None):
+    names = list_map_names(maps_folder)
+    started = time.perf_counter()
+    tasks = [(maps_folder, n) for n in names]
+
+    if jobs == 1 or len(tasks) <= 1:
+        pygame.init()
+        results = [scan_map(*t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunk = max(1, len(tasks) // ((jobs or os.cpu_count() or 1) * 4))
+            results = list(pool.map(_scan_star, tasks, chunksize=chunk))
+
+    issues = []
+    maps = {}
+    for r in results:
+        issues.extend(r["issues"])
+        if "error" in r:
+            issues.append(_issue(r["name"], "parse_error", r["error"]))
+        else:
+            maps[r["name"]] = r
+
+    issues.extend(check_world(maps))
+    issues.sort(key=lambda i: (i["map"], i["kind"], i.get("y", 0), i.get("x", 0)))
+
+    errors = sum(1 for i in issues if i["severity"] == "error")
+    return {
+        "maps_folder": maps_folder,
+        "maps": len(names),
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "seconds": round(time.perf_counter() - started, 3),
+        "issues": issues,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("maps_folder", nargs="?", default=MAPS_FOLDER)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-o", "--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args()
+
+    report = validate(args.maps_folder, args.jobs)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    print(
+        f"validate_maps: {report['maps']} maps, {report['errors']} errors, "
+        f"{report['warnings']} warnings in {report['seconds']}s",
+        file=sys.stderr
+    )
+    failed = report["errors"] or (args.strict and report["warnings"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 import pygame
 
+# pointer id of the (non-touch) mouse in VirtualControls._pointers;
+# fingers use (touch_id, finger_id)
+MOUSE = "mouse"
+
+
 class VirtualControls:
     def __init__(self):
         self.actions = {
@@ -19,9 +24,18 @@ class VirtualControls:
         # just pressed (edge)
         self.just_pressed = {k: False for k in self.actions}
 
+        # pointers currently down: MOUSE or (touch_id, finger_id) → window pos
+        self._pointers = {}
+        # keys that went down this frame, so a tap shorter than a frame
+        # still counts as held for one frame
+        self._keys_down = set()
+        self._keys = None        # pygame.key.get_pressed() of the last update
+        self._fonts = {}
+
     def update(self, events, win_size):
         """
-        Update keyboard + virtual buttons
+        Update keyboard + virtual buttons from this frame's events
+        (the ones Game.handle_events pumped).
         """
         # save previous state
         self.prev_actions = self.actions.copy()
@@ -30,36 +44,64 @@ class VirtualControls:
         for key in self.actions:
             self.actions[key] = False
 
+        # ---------------------------
+        # EVENTS (mouse + multi-touch)
+        # ---------------------------
+        w, h = win_size
+        self._keys_down.clear()
+        taps = []        # presses this frame, even if already released
+        for e in events:
+            if e.type == pygame.KEYDOWN:
+                self._keys_down.add(e.key)
+            elif e.type == pygame.FINGERDOWN:
+                pos = (e.x * w, e.y * h)
+                self._pointers[(e.touch_id, e.finger_id)] = pos
+                taps.append(pos)
+            elif e.type == pygame.FINGERMOTION:
+                if (e.touch_id, e.finger_id) in self._pointers:
+                    self._pointers[(e.touch_id, e.finger_id)] = (e.x * w, e.y * h)
+            elif e.type == pygame.FINGERUP:
+                self._pointers.pop((e.touch_id, e.finger_id), None)
+            elif getattr(e, "touch", False):
+                continue     # mouse events SDL synthesizes from touches
+            elif e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                self._pointers[MOUSE] = e.pos
+                taps.append(e.pos)
+            elif e.type == pygame.MOUSEMOTION and MOUSE in self._pointers:
+                self._pointers[MOUSE] = e.pos
+            elif e.type == pygame.MOUSEBUTTONUP and e.button == 1:
+                self._pointers.pop(MOUSE, None)
+            elif e.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWLEAVE):
+                self._pointers.clear()
+
         # ---------------------------
         # KEYBOARD INPUT (IMPORTANT)
         # ---------------------------
-        keys = pygame.key.get_pressed()
+        self._keys = pygame.key.get_pressed()
+        key = self.key_held
 
-        self.actions["up"]    |= keys[pygame.K_UP] or keys[pygame.K_w]
-        self.actions["down"]  |= keys[pygame.K_DOWN] or keys[pygame.K_s]
-        self.actions["left"]  |= keys[pygame.K_LEFT] or keys[pygame.K_a]
-        self.actions["right"] |= keys[pygame.K_RIGHT] or keys[pygame.K_d]
+        self.actions["up"]    |= key(pygame.K_UP) or key(pygame.K_w)
+        self.actions["down"]  |= key(pygame.K_DOWN) or key(pygame.K_s)
+        self.actions["left"]  |= key(pygame.K_LEFT) or key(pygame.K_a)
+        self.actions["right"] |= key(pygame.K_RIGHT) or key(pygame.K_d)
 
         self.actions["A"] |= (
-            keys[pygame.K_e] or
-            keys[pygame.K_RETURN] or
-            keys[pygame.K_KP_ENTER]
+            key(pygame.K_e) or
+            key(pygame.K_RETURN) or
+            key(pygame.K_KP_ENTER)
         )
 
-        self.actions["B"] |= keys[pygame.K_SPACE] or keys[pygame.K_LSHIFT]
+        self.actions["B"] |= key(pygame.K_SPACE) or key(pygame.K_LSHIFT)
 
         # ---------------------------
-        # VIRTUAL BUTTONS (MOUSE)
+        # VIRTUAL BUTTONS (MOUSE / TOUCH)
         # ---------------------------
-        mouse = pygame.mouse.get_pos()
-        pressed = pygame.mouse.get_pressed()[0]
-
         buttons = self.get_buttons(win_size)
 
-        if pressed:
-            for key, rect in buttons.items():
-                if rect.collidepoint(mouse):
-                    self.actions[key] = True
+        for pos in list(self._pointers.values()) + taps:
+            for name, rect in buttons.items():
+                if rect.collidepoint(pos):
+                    self.actions[name] = True
 
         # ---------------------------
         # EDGE DETECTION
@@ -69,6 +111,18 @@ class VirtualControls:
                 self.actions[key] and not self.prev_actions[key]
             )
 
+    def key_held(self, key):
+        """Key is down now, or went down since the last update."""
+        keys = self._keys if self._keys is not None else pygame.key.get_pressed()
+        return bool(keys[key]) or key in self._keys_down
+
+    def _font(self, size):
+        # SysFont looks the font up on disk: far too slow to call per frame
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.SysFont("Arial", size, bold=True)
+        return font
+
     # ------------------------------------------------------------------
 
     def get_buttons(self, win_size):
@@ -136,7 +190,7 @@ class VirtualControls:
             pygame.draw.polygon(surf, ARROW_COLOR, pts)
 
         # Draw A & B
-        font = pygame.font.SysFont("Arial", max(10,int(w*0.03)), bold=True)
+        font = self._font(max(10,int(w*0.03)))
         for key in ["A","B"]:
             rect = buttons[key]
             pressed = self.actions[key]
@@ -148,7 +202,7 @@ class VirtualControls:
                                    rect.centery - text_surf.get_height()//2))
 
         # Start & Select
-        small_font = pygame.font.SysFont("Arial", max(8,int(w*0.02)), bold=True)
+        small_font = self._font(max(8,int(w*0.02)))
         for key,label in [("start","START"),("select","SELECT")]:
             rect = buttons[key]
             pressed = self.actions[key]
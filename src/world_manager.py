@@ -1,29 +1,94 @@
 # world_manager.py
 import os
-from collections import deque
+import sys
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pygame
-from settings import TILESIZE, MAPS_FOLDER
+from settings import (
+    TILESIZE, MAPS_FOLDER, WORLD_STREAMING, STREAM_LOAD_RADIUS,
+    STREAM_UNLOAD_RADIUS, STREAM_MAX_RESIDENT_BYTES, RENDER_BACKEND
+)
 import tilemap
-import map_connections
+import renderer
+import world_manifest
 from utils import resource_path
 
 
+# kind is "in" or "out"; resident_bytes is the total after the event
+StreamEvent = namedtuple("StreamEvent", "kind name time bytes resident_bytes")
+
+
+def estimate_map_bytes(tm):
+    """Resident size of a TileMap (sum of TileMap.memory_usage())."""
+    return sum(tm.memory_usage().values())
+
+
+def ledge_dir_for_move(dx, dy):
+    """Ledge direction that lets a (dx, dy) step through (Player._ledge_allows)."""
+    if dy > 0:
+        return 0
+    if dy < 0:
+        return 1
+    if dx < 0:
+        return 2
+    return 3
+
+
+def _rect_distance(a, b):
+    """Gap in pixels between two rects (0 when they touch or overlap)."""
+    dx = max(b.left - a.right, a.left - b.right, 0)
+    dy = max(b.top - a.bottom, a.top - b.bottom, 0)
+    return max(dx, dy)
+
+
 class MapInstance:
+    """
+    A TileMap placed in the world. Pixel offsets and world_rect are plain
+    attributes (set by move_to / set_map), and the map's warps / signs / ledges / lights /
+    collisions are kept as world-space records, built on first use and
+    rebuilt only after invalidate() (see records.py).
+    """
+
     def __init__(self, name: str, tilemap_obj: tilemap.TileMap, world_x: int, world_y: int):
         self.name = name
         self.map = tilemap_obj
+        self._world = {}          # kind → tuple of world-space records
+        self._warp_cells = None   # local (cx, cy) → world Warp
 
         # world_x & world_y come DIRECTLY from the map’s custom properties
+        self.move_to(world_x, world_y)
+
+    def move_to(self, world_x, world_y):
         self.world_x = int(world_x)
         self.world_y = int(world_y)
+        self.pixel_x = self.world_x * TILESIZE
+        self.pixel_y = self.world_y * TILESIZE
+        self._place()
 
-    @property
-    def pixel_x(self):
-        return self.world_x * TILESIZE
-
-    @property
-    def pixel_y(self):
-        return self.world_y * TILESIZE
+    def set_map(self, tilemap_obj):
+        self.map = tilemap_obj
+        self._place()
+
+    def _place(self):
+        # world pixel bounds, including chunks of infinite maps left/above
+        # the origin; shared, so callers must not modify it
+        ox, oy, w, h = self.map.bounds
+        self.world_rect = pygame.Rect(self.pixel_x + ox, self.pixel_y + oy, w, h)
+        self.invalidate()
+
+    def invalidate(self, kinds=None):
+        """Drop cached world records (all, or just the given kinds)."""
+        if kinds is None:
+            self._world.clear()
+            self._warp_cells = None
+            return
+        for kind in kinds:
+            self._world.pop(kind, None)
+        if "warps" in kinds:
+            self._warp_cells = None
 
     @property
     def pixel_width(self):
@@ -33,11 +98,100 @@ class MapInstance:
     def pixel_height(self):
         return self.map.pixel_height
 
+    # --------------------------------------------------------
+    # World-space records
+    # --------------------------------------------------------
+    def _records(self, kind):
+        out = self._world.get(kind)
+        if out is None:
+            tm, ox, oy = self.map, self.pixel_x, self.pixel_y
+            if kind == "warps":
+                out = tuple(w.moved(self.world_x, self.world_y) for w in tm.warps)
+            elif kind == "collisions":
+                out = tuple(r.move(ox, oy) for r in tm.collisions)
+            else:
+                out = tuple(r.moved(ox, oy) for r in getattr(tm, kind))
+            self._world[kind] = out
+        return out
+
+    @property
+    def warps(self):
+        return self._records("warps")
+
+    @property
+    def signs(self):
+        return self._records("signs")
+
+    @property
+    def ledges(self):
+        return self._records("ledges")
+
+    @property
+    def lights(self):
+        return self._records("lights")
+
+    @property
+    def collisions(self):
+        return self._records("collisions")
+
+    def warp_at_cell(self, cx, cy):
+        """World Warp on array cell (cx, cy), or None."""
+        if self._warp_cells is None:
+            world = dict(zip(map(id, self.map.warps), self.warps))
+            self._warp_cells = {cell: world[id(w)] for cell, w in self.map.warp_cells.items() if id(w) in world}
+        return self._warp_cells.get((cx, cy))
+
 
 class MapManager:
-    def __init__(self, maps_folder=MAPS_FOLDER):
+    def __init__(self, maps_folder=MAPS_FOLDER, load_tiles=True):
         self.maps_folder = maps_folder
         self.instances = {}  # name → MapInstance
+        self._world_records = {}   # kind → tuple over all instances (get_all_*, draw order)
+
+        # False: collision/trigger data only, no tile surfaces (headless)
+        self.load_tiles = load_tiles
+
+        self.renderer = renderer.make_renderer(RENDER_BACKEND)
+
+        # bounds / offsets / adjacency of every map, read once at startup
+        self.manifest = world_manifest.load_manifest(maps_folder)
+
+        # --- streaming state (see update_streaming) ---
+        self.streaming = False
+        self.stream_candidates = []          # maps of the streamed world
+        self.load_radius = STREAM_LOAD_RADIUS
+        self.unload_radius = STREAM_UNLOAD_RADIUS
+        self.max_resident_bytes = STREAM_MAX_RESIDENT_BYTES
+        self.resident_bytes = {}             # name → estimated bytes
+        self.stream_events = deque(maxlen=256)
+        self.stream_listeners = []           # callables(StreamEvent)
+        self._executor = None
+        self._pending = {}                   # name → Future[TileMap]
+        self._over_budget = set()            # evicted for max_resident_bytes, not reloaded
+                                             # until visible or past unload_radius
+        self._generation = 0                 # bumps on world rebuilds
+
+        self.peak_memory_bytes = 0
+
+        # runtime tile mutations per map, in map-local tile coords, kept
+        # across unloads and re-applied on load:
+        #   ("tile", layer, tx, ty) → gid, ("passable", tx, ty) → flag,
+        #   ("warp", tx, ty) → warp dict / None
+        # Copy-on-write once snapshot_mutations() has handed it out.
+        self.mutations = {}
+        self._journal_shared = False         # outer dict is in a snapshot
+        self._journal_shared_maps = set()    # per-map dicts shared with it too
+        # callables(map_name, changes) after a mutation flush; changes maps
+        # layer name / "passable" / "warps" → set of array cells
+        self.mutation_listeners = []
+
+        # world tile → entity id of NPCs standing on / stepping into it
+        # (filled by entities.EntityManager, checked by can_step)
+        self.occupancy = {}
+
+        # callables(map_name, changed) run after reload_map();
+        # changed maps layer name → array cells (None = whole layer)
+        self.reload_listeners = []
 
         self.world_left = 0
         self.world_top = 0
@@ -60,59 +214,603 @@ class MapManager:
     # Load a TileMap instance
     # --------------------------------------------------------
     def load_map_file(self, map_name):
-        return tilemap.TileMap(self._map_path_for(map_name))
+        return tilemap.TileMap(self._map_path_for(map_name), load_tiles=self.load_tiles)
 
     # --------------------------------------------------------
-    # Build all interconnected maps starting from root
+    # Overworld membership (from the manifest, no map loading)
     # --------------------------------------------------------
-    def build_world(self, root_map_name, load_connected=True):
-        self.instances.clear()
+    def is_overworld(self, map_name):
+        return self.manifest.is_overworld(map_name)
 
-        queue = deque([root_map_name])
-        loaded = set()
+    # --------------------------------------------------------
+    # Entering maps (warps, respawns, headless resets)
+    # --------------------------------------------------------
+    def enter_map(self, map_name, tx, ty, world_root, streaming=None):
+        """
+        Make map_name current and return the world pixel position of its
+        tile (tx, ty), or None if the map can't be loaded. Overworld maps
+        are joined into the stitched world (rebuilt from world_root if the
+        map isn't part of it); interiors are loaded on their own.
+        """
+        if map_name not in self.manifest:
+            print("MapManager: unknown map", map_name)
+            return None
+
+        if self.is_overworld(map_name):
+            inst = self.ensure_loaded(map_name)
+            if inst is None:
+                self.build_world(world_root, load_connected=True, streaming=streaming)
+                inst = self.ensure_loaded(map_name)
+        else:
+            inst = self.instances.get(map_name)
+            if inst is None or len(self.instances) != 1:
+                try:
+                    self.load_single_map(map_name)
+                except Exception as e:
+                    print("MapManager: failed to load", map_name, e)
+                    return None
+                inst = self.instances.get(map_name)
+
+        if inst is None:
+            return None
+        return inst.pixel_x + tx * TILESIZE, inst.pixel_y + ty * TILESIZE
+
+    def resolve_warp(self, warp, world_root, streaming=None):
+        """Load a warp's destination; returns the landing world pixel position or None."""
+        try:
+            dest_x = int(warp.get("dest_x", 0))
+            dest_y = int(warp.get("dest_y", 0))
+        except Exception:
+            dest_x = 0
+            dest_y = 0
+        return self.enter_map(warp.get("dest_map"), dest_x, dest_y, world_root, streaming)
 
-        while queue:
-            name = queue.popleft()
-            if name in loaded:
-                continue
+    # --------------------------------------------------------
+    # Build all interconnected maps starting from root
+    # --------------------------------------------------------
+    def build_world(self, root_map_name, load_connected=True, streaming=None):
+        """
+        Non-streaming: load every map of the root's component now.
+        Streaming: only register the component; maps are loaded by
+        ensure_loaded() / update_streaming() as the camera approaches.
+        """
+        self._reset_streaming()
+
+        if load_connected:
+            names = self.manifest.component(root_map_name)
+        else:
+            names = [root_map_name]
+
+        if not names:
+            print("MapManager: map not in manifest:", root_map_name)
+
+        if streaming is None:
+            streaming = WORLD_STREAMING and load_connected
+
+        if streaming:
+            self.streaming = True
+            self.stream_candidates = names
+            self._recompute_bounds()
+            return
 
+        for name in names:
             try:
                 tm = self.load_map_file(name)
             except Exception as e:
                 print("MapManager: failed to load", name, e)
                 continue
+            self._add_instance(name, tm)
 
-            inst = MapInstance(
-                name=name,
-                tilemap_obj=tm,
-                world_x=tm.world_x,  # from TileMap custom properties
-                world_y=tm.world_y
-            )
+        self._recompute_bounds()
+        self._track_peak()
+
+    def _add_instance(self, name, tm):
+        # world offsets come from the manifest (the maps' custom properties)
+        world_x, world_y = self.manifest.world_offset(name)
+        inst = MapInstance(
+            name=name,
+            tilemap_obj=tm,
+            world_x=world_x,
+            world_y=world_y
+        )
+        self.instances[name] = inst
+        self._attach_map(name, tm)
+        self._world_records.clear()
+        return inst
+
+    def _attach_map(self, name, tm):
+        """Re-apply journaled runtime mutations and hook up invalidation."""
+        journal = self.mutations.get(name)
+        if journal:
+            tm.begin_batch()
+            for key, value in journal.items():
+                if key[0] == "tile":
+                    tm.set_tile(key[1], key[2], key[3], value)
+                elif key[0] == "passable":
+                    tm.set_passable(key[1], key[2], value)
+                elif key[0] == "warp":
+                    tm.set_warp(key[1], key[2], value)
+            tm.end_batch()
+        tm.mutation_listeners.append(
+            lambda tm_, changes, name=name: self._on_map_mutated(name, tm_, changes)
+        )
 
-            self.instances[name] = inst
-            loaded.add(name)
+    # --------------------------------------------------------
+    # Streaming
+    # --------------------------------------------------------
+    def _reset_streaming(self):
+        self._generation += 1
+        for fut in self._pending.values():
+            fut.cancel()
+        self._pending.clear()
+        self._over_budget.clear()
+        for inst in self.instances.values():
+            inst.map.release()
+        if self.instances:
+            next(iter(self.instances.values())).map.atlas.compact()
+        self.instances.clear()
+        self._world_records.clear()
+        self.resident_bytes.clear()
+        self.streaming = False
+        self.stream_candidates = []
+
+    def _parse_map(self, name, generation):
+        # worker thread: JSON + layer decoding only, no surfaces
+        if generation != self._generation:
+            return None
+        return tilemap.TileMap(self._map_path_for(name), load_tiles=False)
+
+    def _emit(self, kind, name, nbytes):
+        self._track_peak()
+        ev = StreamEvent(kind, name, time.perf_counter(), nbytes, sum(self.resident_bytes.values()))
+        self.stream_events.append(ev)
+        for fn in self.stream_listeners:
+            fn(ev)
+
+    def _stream_in(self, name, tm):
+        if self.load_tiles:
+            tm.load_tiles()  # main thread
+        self._add_instance(name, tm)
+        nbytes = estimate_map_bytes(tm)
+        self.resident_bytes[name] = nbytes
+        self._emit("in", name, nbytes)
+
+    def _stream_out(self, name):
+        inst = self.instances.pop(name, None)
+        if inst is not None:
+            inst.map.release()
+            inst.map.atlas.compact()
+            self._world_records.clear()
+        nbytes = self.resident_bytes.pop(name, 0)
+        self._emit("out", name, nbytes)
+
+    def ensure_loaded(self, map_name):
+        """
+        Return the instance for map_name, loading it synchronously if it
+        belongs to the streamed world. None if it isn't part of the world.
+        """
+        inst = self.instances.get(map_name)
+        if inst is not None or not self.streaming:
+            return inst
+        if map_name not in self.stream_candidates:
+            return None
+
+        fut = self._pending.pop(map_name, None)
+        tm = None
+        if fut is not None and not fut.cancel():
+            try:
+                tm = fut.result()
+            except Exception as e:
+                print("MapManager: failed to load", map_name, e)
+        if tm is None:
+            try:
+                tm = tilemap.TileMap(self._map_path_for(map_name), load_tiles=False)
+            except Exception as e:
+                print("MapManager: failed to load", map_name, e)
+                return None
+
+        self._stream_in(map_name, tm)
+        return self.instances[map_name]
+
+    def update_streaming(self, camera):
+        """
+        Called once per frame. Loads maps within load_radius of the view
+        in the background, evicts maps beyond unload_radius and keeps the
+        resident total under max_resident_bytes.
+
+        A map evicted (or not streamed in) for the memory cap is left out
+        until it comes on screen or moves past unload_radius, so a cap
+        smaller than the maps in range doesn't load and drop the same map
+        every frame.
+        """
+        if not self.streaming:
+            return
 
-            # Add neighbors from region connections
-            if load_connected:
-                for n in map_connections.REGION_CONNECTIONS.get(name, []):
-                    if n not in loaded:
-                        queue.append(n)
+        view = pygame.Rect(camera.x, camera.y, camera.w, camera.h)
+        dist = {
+            name: _rect_distance(view, pygame.Rect(self.manifest.world_pixel_rect(name)))
+            for name in self.stream_candidates
+        }
+
+        # finish at most one background load per frame (tile surfaces are
+        # cut on the main thread), visible maps are never left waiting
+        finished = False
+        for name, fut in list(self._pending.items()):
+            if dist[name] == 0:
+                self.ensure_loaded(name)
+            elif fut.done() and not finished:
+                del self._pending[name]
+                try:
+                    tm = fut.result()
+                except Exception as e:
+                    print("MapManager: failed to load", name, e)
+                    continue
+                if tm is None or dist[name] > self.unload_radius:
+                    continue
+                resident = sum(self.resident_bytes.values())
+                if resident + estimate_map_bytes(tm) > self.max_resident_bytes:
+                    self._over_budget.add(name)
+                    continue
+                self._stream_in(name, tm)
+                finished = True
+
+        for name in self.stream_candidates:
+            d = dist[name]
+            if d == 0 or d > self.unload_radius:
+                self._over_budget.discard(name)
+            if name in self.instances:
+                if d > self.unload_radius:
+                    self._stream_out(name)
+            elif d == 0:
+                self.ensure_loaded(name)
+            elif d <= self.load_radius and name not in self._pending and name not in self._over_budget:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="map-stream")
+                self._pending[name] = self._executor.submit(self._parse_map, name, self._generation)
+
+        # memory cap: drop the farthest maps that aren't on screen
+        if sum(self.resident_bytes.values()) > self.max_resident_bytes:
+            for name in sorted(self.instances, key=lambda n: dist.get(n, 0), reverse=True):
+                if dist.get(name, 0) == 0 or sum(self.resident_bytes.values()) <= self.max_resident_bytes:
+                    break
+                self._stream_out(name)
+                self._over_budget.add(name)
+
+    def shutdown(self):
+        self._reset_streaming()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
+    # --------------------------------------------------------
+    # World tile queries (world tile = world pixel // TILESIZE)
+    # --------------------------------------------------------
+    def locate_tile(self, wtx, wty):
+        """(instance, cx, cy) array cell holding a world tile, or None."""
+        for inst in self.instances.values():
+            tm = inst.map
+            cx = wtx - inst.world_x - tm.origin_tx
+            cy = wty - inst.world_y - tm.origin_ty
+            if 0 <= cx < tm.width and 0 <= cy < tm.height:
+                return inst, cx, cy
+        return None
+
+    def _cells_at(self, wtx, wty):
+        # every map containing the tile (maps may overlap at seams)
+        for inst in self.instances.values():
+            tm = inst.map
+            cx = wtx - inst.world_x - tm.origin_tx
+            cy = wty - inst.world_y - tm.origin_ty
+            if 0 <= cx < tm.width and 0 <= cy < tm.height:
+                yield inst, cx, cy
+
+    def is_blocked(self, wtx, wty):
+        for inst, cx, cy in self._cells_at(wtx, wty):
+            if inst.map.blocked[cy, cx]:
+                return True
+        return False
+
+    def ledge_mask_at(self, wtx, wty):
+        mask = 0
+        for inst, cx, cy in self._cells_at(wtx, wty):
+            mask |= int(inst.map.ledge_mask[cy, cx])
+        return mask
+
+    def can_step(self, tx, ty, dx, dy):
+        """
+        Can an entity move onto world tile (tx, ty) in direction (dx, dy)?
+        Ledges only let you through in their direction (see
+        Player._ledge_allows); walls and NPCs always block.
+        """
+        if (tx, ty) in self.occupancy:
+            return False
+        mask = 0
+        for inst, cx, cy in self._cells_at(tx, ty):
+            tm = inst.map
+            if tm.blocked[cy, cx]:
+                return False
+            mask |= int(tm.ledge_mask[cy, cx])
+        if mask:
+            return not (mask & ~(1 << ledge_dir_for_move(dx, dy)))
+        return True
+
+    def warp_at(self, wtx, wty):
+        """Warp (world record, as in get_all_warps) on a world tile, or None."""
+        for inst, cx, cy in self._cells_at(wtx, wty):
+            warp = inst.warp_at_cell(cx, cy)
+            if warp is not None:
+                return warp
+        return None
+
+    def sign_at_rect(self, rect):
+        """Text of the first sign a world pixel rect overlaps, or None."""
+        for inst in self.instances.values():
+            tm = inst.map
+            local = rect.move(-inst.pixel_x, -inst.pixel_y)
+            hits = [i for cell in tm._rect_cells(local) for i in tm.sign_cells.get(cell, ())]
+            for i in sorted(hits):
+                if local.colliderect(tm.signs[i].rect):
+                    return tm.signs[i].text
+        return None
+
+    # --------------------------------------------------------
+    # Runtime tile mutation (world tile coords)
+    # --------------------------------------------------------
+    def _journal(self, inst, key, value):
+        if self._journal_shared:
+            self.mutations = dict(self.mutations)
+            self._journal_shared = False
+        entries = self.mutations.get(inst.name)
+        if entries is None or inst.name in self._journal_shared_maps:
+            entries = self.mutations[inst.name] = dict(entries or ())
+            self._journal_shared_maps.discard(inst.name)
+        entries[key] = value
+
+    def snapshot_mutations(self):
+        """
+        The mutation journal as it is now, in O(1): later mutations copy
+        the outer dict and the touched map's dict instead of changing it.
+        Treat the result as read-only.
+        """
+        self._journal_shared = True
+        self._journal_shared_maps = set(self.mutations)
+        return self.mutations
+
+    def restore_mutations(self, journal):
+        """
+        Replace the journal (e.g. from a save). Resident maps whose
+        mutations differ are re-read from disk and get the new journal
+        applied; other maps pick it up when they load.
+        """
+        old = self.mutations
+        self.mutations = {name: dict(entries) for name, entries in journal.items()}
+        self._journal_shared = False
+        self._journal_shared_maps = set()
+        for name in list(self.instances):
+            if old.get(name, {}) != self.mutations.get(name, {}):
+                self.reload_map(name, refresh_manifest=False)
+
+    def set_tile(self, layer_name, wtx, wty, gid):
+        hit = self.locate_tile(wtx, wty)
+        if hit is None:
+            return False
+        inst, cx, cy = hit
+        tx, ty = cx + inst.map.origin_tx, cy + inst.map.origin_ty
+        self._journal(inst, ("tile", layer_name.lower(), tx, ty), int(gid))
+        return inst.map.set_tile(layer_name, tx, ty, gid)
+
+    def set_passable(self, wtx, wty, flag):
+        hit = self.locate_tile(wtx, wty)
+        if hit is None:
+            return False
+        inst, cx, cy = hit
+        tx, ty = cx + inst.map.origin_tx, cy + inst.map.origin_ty
+        self._journal(inst, ("passable", tx, ty), flag)
+        return inst.map.set_passable(tx, ty, flag)
+
+    def set_warp(self, wtx, wty, warp):
+        hit = self.locate_tile(wtx, wty)
+        if hit is None:
+            return False
+        inst, cx, cy = hit
+        tx, ty = cx + inst.map.origin_tx, cy + inst.map.origin_ty
+        self._journal(inst, ("warp", tx, ty), warp)
+        return inst.map.set_warp(tx, ty, warp)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group mutations: each resident map runs one invalidation pass at
+        the end instead of one per change.
+            with map_manager.batch():
+                for x in range(10):
+                    map_manager.set_tile("walls", x, 5, 0)
+        """
+        maps = [inst.map for inst in self.instances.values()]
+        for tm in maps:
+            tm.begin_batch()
+        try:
+            yield self
+        finally:
+            for tm in maps:
+                tm.end_batch()
+
+    def _on_map_mutated(self, name, tm, changes):
+        kinds = []
+        if "warps" in changes:
+            kinds.append("warps")
+        if "walls" in changes or "passable" in changes:
+            kinds.append("collisions")
+        inst = self.instances.get(name)
+        if kinds and inst is not None and inst.map is tm:
+            inst.invalidate(kinds)
+            for kind in kinds:
+                self._world_records.pop(kind, None)
+        for layer, cells in changes.items():
+            if layer in tm.layer_map:
+                self.renderer.invalidate(tm, layer, cells)
+        for fn in self.mutation_listeners:
+            fn(name, changes)
+
+    # --------------------------------------------------------
+    # Hot reload (dev mode)
+    # --------------------------------------------------------
+    def reload_map(self, map_name, refresh_manifest=True):
+        """
+        Re-parse one edited map and swap it into its MapInstance.
+        Unchanged layers keep their render data, changed layers are
+        invalidated cell by cell where the size is unchanged.
+        Returns {layer: cells or None} for the layers that changed.
+        """
+        if refresh_manifest:
+            self.manifest.refresh_map(self.maps_folder, map_name)
+            try:
+                world_manifest.save_manifest(self.manifest.data, world_manifest.manifest_path_for(self.maps_folder))
+            except OSError:
+                pass
+
+        if self.streaming and map_name not in self.stream_candidates and self.manifest.is_overworld(map_name):
+            self.stream_candidates.append(map_name)
+
+        inst = self.instances.get(map_name)
+        if inst is None:
+            if self.streaming:
+                self._recompute_bounds()
+            return {}
+
+        try:
+            new_tm = tilemap.TileMap(self._map_path_for(map_name), load_tiles=False, atlas=inst.map.atlas)
+        except Exception as e:
+            # half-saved file etc.: keep the old map
+            print("MapManager: reload failed for", map_name, e)
+            return {}
+
+        self._attach_map(map_name, new_tm)
+
+        old_tm = inst.map
+        changed = {}
+        for name in set(old_tm.layer_map) | set(new_tm.layer_map):
+            i_old = old_tm.layer_map.get(name)
+            i_new = new_tm.layer_map.get(name)
+            if i_old is None or i_new is None:
+                changed[name] = None
+                continue
+
+            a_gids, b_gids = old_tm.layer_gids[i_old], new_tm.layer_gids[i_new]
+            if a_gids.shape != b_gids.shape or old_tm.origin_tx != new_tm.origin_tx \
+                    or old_tm.origin_ty != new_tm.origin_ty:
+                changed[name] = None
+                continue
+
+            diff = (a_gids != b_gids) | (old_tm.layer_flags[i_old] != new_tm.layer_flags[i_new])
+            if diff.any():
+                ys, xs = np.nonzero(diff)
+                changed[name] = list(zip(xs.tolist(), ys.tolist()))
+
+        # acquire before releasing so shared atlas slots survive the swap
+        if self.load_tiles:
+            new_tm.load_tiles()
+        new_tm.render_cache = old_tm.render_cache
+        old_tm.render_cache = {}
+        old_tm.release()
+
+        inst.set_map(new_tm)
+        for name, cells in changed.items():
+            self.renderer.invalidate(new_tm, name, cells)
+
+        world_x, world_y = self.manifest.world_offset(map_name)
+        if (world_x, world_y) != (inst.world_x, inst.world_y):
+            inst.move_to(world_x, world_y)
+        self._world_records.clear()
         self._recompute_bounds()
 
+        for fn in self.reload_listeners:
+            fn(map_name, changed)
+        return changed
+
+    def reload_tileset(self, file_name):
+        """Re-upload atlas tiles of an edited tileset image and drop baked layers using it."""
+        users = [inst for inst in self.instances.values() if inst.map.uses_tileset(file_name)]
+        image_names = {
+            ts["image"] for inst in users for ts in inst.map.tilesets
+            if os.path.basename(ts["image"]) == file_name
+        }
+        for image_name in image_names:
+            tilemap.forget_tileset_image(image_name)
+
+        keys = {os.path.normpath(n) for n in image_names}
+        if users:
+            users[0].map.atlas.refresh(lambda key: key[0] in keys)
+        for inst in users:
+            self.renderer.invalidate(inst.map)
+
+    # --------------------------------------------------------
+    # Memory accounting
+    # --------------------------------------------------------
+    def memory_report(self):
+        """
+        Per-instance byte breakdown (tile_surfaces, layer_data, objects,
+        render_cache, retained_json), category totals, atlas pages and peaks.
+        """
+        maps = {}
+        totals = {}
+        for name, inst in self.instances.items():
+            usage = inst.map.memory_usage()
+            usage["total"] = sum(usage.values())
+            maps[name] = usage
+            for k, v in usage.items():
+                totals[k] = totals.get(k, 0) + v
+
+        atlas = None
+        atlas_bytes = 0
+        if self.instances:
+            atlas = next(iter(self.instances.values())).map.atlas
+            atlas_bytes = atlas.nbytes()
+
+        total = totals.get("total", 0)
+        self.peak_memory_bytes = max(self.peak_memory_bytes, total)
+
+        report = {
+            "maps": maps,
+            "totals": totals,
+            "atlas_pages": atlas.page_count() if atlas else 0,
+            "atlas_bytes": atlas_bytes,
+            "peak_bytes": self.peak_memory_bytes,
+        }
+
+        try:
+            import resource
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report["peak_rss_bytes"] = rss if sys.platform == "darwin" else rss * 1024
+        except ImportError:
+            pass  # Windows
+
+        return report
+
+    def _track_peak(self):
+        total = sum(sum(inst.map.memory_usage().values()) for inst in self.instances.values())
+        self.peak_memory_bytes = max(self.peak_memory_bytes, total)
+
     # --------------------------------------------------------
     # Compute total world bounds
     # --------------------------------------------------------
     def _recompute_bounds(self):
-        if not self.instances:
+        # streamed worlds use the manifest so bounds don't move as maps stream
+        if self.streaming:
+            rects = [pygame.Rect(self.manifest.world_pixel_rect(n)) for n in self.stream_candidates]
+        else:
+            rects = [inst.world_rect for inst in self.instances.values()]
+
+        if not rects:
             self.world_left = self.world_top = 0
             self.world_width = self.world_height = 0
             return
 
-        left = min(inst.pixel_x for inst in self.instances.values())
-        top = min(inst.pixel_y for inst in self.instances.values())
-        right = max(inst.pixel_x + inst.pixel_width for inst in self.instances.values())
-        bottom = max(inst.pixel_y + inst.pixel_height for inst in self.instances.values())
+        left = min(r.left for r in rects)
+        top = min(r.top for r in rects)
+        right = max(r.right for r in rects)
+        bottom = max(r.bottom for r in rects)
 
         self.world_left = left
         self.world_top = top
@@ -127,8 +825,7 @@ class MapManager:
     # --------------------------------------------------------
     def get_region_of_world(self, wx, wy):
         for name, inst in self.instances.items():
-            if inst.pixel_x <= wx < inst.pixel_x + inst.map.pixel_width and \
-               inst.pixel_y <= wy < inst.pixel_y + inst.map.pixel_height:
+            if inst.world_rect.collidepoint(wx, wy):
                 return name
         return None
 
@@ -136,101 +833,73 @@ class MapManager:
     # Drawing by layer, spatial order preserved
     # --------------------------------------------------------
     def draw_by_layers(self, surface, camera, layer_names):
-        ordered = sorted(
-            self.instances.values(),
-            key=lambda inst: (inst.world_y, inst.world_x)
-        )
+        ordered = self._world_records.get("draw_order")
+        if ordered is None:
+            ordered = self._world_records["draw_order"] = tuple(sorted(
+                self.instances.values(),
+                key=lambda inst: (inst.world_y, inst.world_x)
+            ))
 
         for layer in layer_names:
             for inst in ordered:
-                inst.map.draw_layer(
-                    surface, camera, layer,
-                    offset_x=inst.pixel_x, offset_y=inst.pixel_y
-                )
+                self.renderer.draw_layer(surface, camera, inst, layer)
 
-    # --------------------------------------------------------
-    # Collisions
-    # --------------------------------------------------------
-    def get_all_collisions(self):
-        out = []
+    def set_render_backend(self, name):
+        self.renderer = renderer.make_renderer(name)
         for inst in self.instances.values():
-            ox, oy = inst.pixel_x, inst.pixel_y
-            for crect in inst.map.collisions:
-                out.append(pygame.Rect(crect.x + ox, crect.y + oy, crect.width, crect.height))
-        return out
+            inst.map.render_cache.clear()
+
+    def cycle_render_backend(self):
+        names = list(renderer.RENDERERS)
+        i = names.index(self.renderer.name) if self.renderer.name in names else -1
+        self.set_render_backend(names[(i + 1) % len(names)])
+        return self.renderer.name
 
     # --------------------------------------------------------
-    # Lights
+    # World-space records of every resident map. Each returns one
+    # cached tuple, shared between callers and rebuilt only when maps
+    # load, unload, reload or have their walls / warps edited.
     # --------------------------------------------------------
-    def get_all_lights(self):
-        out = []
-        for inst in self.instances.values():
-            ox, oy = inst.pixel_x, inst.pixel_y
-            for (lx, ly, w, h, r) in inst.map.lights:
-                out.append((lx + ox, ly + oy, w, h, r))
+    def _all_records(self, kind):
+        out = self._world_records.get(kind)
+        if out is None:
+            out = self._world_records[kind] = tuple(
+                r for inst in self.instances.values() for r in getattr(inst, kind)
+            )
         return out
 
-    # --------------------------------------------------------
-    # Ledges
-    # --------------------------------------------------------
+    def get_all_collisions(self):
+        """Wall Rects (world pixels)."""
+        return self._all_records("collisions")
+
+    def get_all_lights(self):
+        """records.Light in world pixels."""
+        return self._all_records("lights")
+
     def get_all_ledges(self):
-        out = []
-        for inst in self.instances.values():
-            ox, oy = inst.pixel_x, inst.pixel_y
-            for ledge in inst.map.ledges:
-                r = ledge["rect"]
-                out.append({
-                    "rect": pygame.Rect(r.x + ox, r.y + oy, r.width, r.height),
-                    "dir": ledge["dir"]
-                })
-        return out
+        """records.Ledge with world pixel rects."""
+        return self._all_records("ledges")
 
-    # --------------------------------------------------------
-    # Warps
-    # --------------------------------------------------------
     def get_all_warps(self):
-        out = []
-        for inst in self.instances.values():
-            ox, oy = inst.pixel_x, inst.pixel_y
-
-            for warp in inst.map.warps:
-                r = pygame.Rect(
-                    ox + warp["x"] * TILESIZE,
-                    oy + warp["y"] * TILESIZE,
-                    TILESIZE, TILESIZE
-                )
-                out.append({
-                    "rect": r,
-                    "dest_map": warp["dest_map"],
-                    "dest_x": warp["dest_x"],
-                    "dest_y": warp["dest_y"]
-                })
-        return out
+        """records.Warp on world tiles."""
+        return self._all_records("warps")
 
-    # --------------------------------------------------------
-    # Signs
-    # --------------------------------------------------------
     def get_all_signs(self):
-        out = []
-        for inst in self.instances.values():
-            ox, oy = inst.pixel_x, inst.pixel_y
-            for sg in inst.map.signs:
-                r = sg["rect"]
-                out.append({
-                    "rect": pygame.Rect(r.x + ox, r.y + oy, r.width, r.height),
-                    "text": sg["text"]
-                })
-        return out
+        """records.Sign with world pixel rects."""
+        return self._all_records("signs")
 
 
     # --------------------------------------------------------
     # Load ONLY one map (for interiors)
     # --------------------------------------------------------
     def load_single_map(self, map_name):
-        self.instances.clear()
+        self._reset_streaming()
 
         tm = self.load_map_file(map_name)
         inst = MapInstance(map_name, tm, world_x=0, world_y=0)
 
         self.instances[map_name] = inst
+        self._attach_map(map_name, tm)
+        self._world_records.clear()
         self._recompute_bounds()
+        self._track_peak()
@@ -0,0 +1,282 @@
+# world_manifest.py
+"""
+Precomputed description of every map in a maps folder.
+
+The manifest records, per map: size/bounds, world offset (overworld maps
+only), region, tilesets, warp destinations and neighbours. Neighbours are
+derived geometrically: two overworld maps are adjacent when their world
+tile rects touch or overlap.
+
+Regenerate with:
+    python src/world_manifest.py [maps_folder]
+
+At runtime MapManager only reads this small JSON file; it is rebuilt
+automatically when a map file is newer than the manifest.
+"""
+import json
+import os
+import sys
+from collections import deque
+
+from settings import MAPS_FOLDER, TILESIZE
+from utils import resource_path
+import map_connections
+
+MANIFEST_FILENAME = "world_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def list_map_names(maps_folder):
+    """Names of all Tiled JSON maps in a folder (manifest file excluded)."""
+    folder = resource_path(maps_folder)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.splitext(f)[0]
+        for f in os.listdir(folder)
+        if f.endswith(".json") and f not in (MANIFEST_FILENAME, map_connections.CONNECTIONS_FILENAME)
+    )
+
+
+def manifest_path_for(maps_folder):
+    return resource_path(os.path.join(maps_folder, MANIFEST_FILENAME))
+
+
+def _props(raw):
+    if isinstance(raw, list):
+        return {p.get("name"): p.get("value") for p in raw}
+    return raw or {}
+
+
+# --------------------------------------------------------
+# Scan one map (JSON only, no pygame / tileset images)
+# --------------------------------------------------------
+def scan_map(map_path):
+    with open(map_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    tile_w = data.get("tilewidth", TILESIZE)
+    tile_h = data.get("tileheight", TILESIZE)
+    props = _props(data.get("properties", {}))
+
+    # bounds in map-local tiles (infinite maps may start at negative coords)
+    left, top = 0, 0
+    width, height = data.get("width", 0), data.get("height", 0)
+    if data.get("infinite"):
+        chunks = [
+            ch
+            for layer in data.get("layers", []) if layer.get("type") == "tilelayer"
+            for ch in layer.get("chunks", [])
+        ]
+        if chunks:
+            left = min(ch["x"] for ch in chunks)
+            top = min(ch["y"] for ch in chunks)
+            width = max(ch["x"] + ch["width"] for ch in chunks) - left
+            height = max(ch["y"] + ch["height"] for ch in chunks) - top
+        else:
+            width = height = 0
+
+    tilesets = []
+    for ts in data.get("tilesets", []):
+        image = ts.get("image")
+        if image and image not in tilesets:
+            tilesets.append(image)
+
+    warps = []
+    for layer in data.get("layers", []):
+        if layer.get("type") == "objectgroup" and layer.get("name", "").lower() == "doors":
+            for obj in layer.get("objects", []):
+                wp = _props(obj.get("properties", []))
+                warps.append({
+                    "x": int(obj["x"] // TILESIZE),
+                    "y": int(obj["y"] // TILESIZE),
+                    "dest_map": wp.get("dest_map"),
+                    "dest_x": wp.get("dest_x"),
+                    "dest_y": wp.get("dest_y"),
+                })
+
+    overworld = "world_x" in props and "world_y" in props
+
+    return {
+        "tile_w": tile_w,
+        "tile_h": tile_h,
+        "bounds": [left, top, width, height],
+        "overworld": overworld,
+        "world_x": int(props["world_x"]) if overworld else None,
+        "world_y": int(props["world_y"]) if overworld else None,
+        "region": props.get("region"),
+        "tilesets": tilesets,
+        "warps": warps,
+    }
+
+
+def _world_tile_rect(entry):
+    left, top, w, h = entry["bounds"]
+    return (entry["world_x"] + left, entry["world_y"] + top, w, h)
+
+
+def _adjacent(a, b):
+    """Tile rects touch along an edge or overlap (corner contact doesn't count)."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    overlap_x = min(ax + aw, bx + bw) - max(ax, bx)
+    overlap_y = min(ay + ah, by + bh) - max(ay, by)
+    return (overlap_x >= 0 and overlap_y > 0) or (overlap_x > 0 and overlap_y >= 0)
+
+
+# --------------------------------------------------------
+# Build / save / load
+# --------------------------------------------------------
+def build_manifest(maps_folder=MAPS_FOLDER, extra_connections=None):
+    if extra_connections is None:
+        extra_connections = map_connections.connections_for(maps_folder)
+
+    maps = {}
+    for name in list_map_names(maps_folder):
+        path = resource_path(os.path.join(maps_folder, name + ".json"))
+        try:
+            maps[name] = scan_map(path)
+        except Exception as e:
+            print("world_manifest: failed to scan", name, e)
+
+    _link_neighbors(maps, extra_connections)
+    return {"version": MANIFEST_VERSION, "maps": maps}
+
+
+def _link_neighbors(maps, extra_connections):
+    overworld = [n for n, e in maps.items() if e["overworld"]]
+    rects = {n: _world_tile_rect(maps[n]) for n in overworld}
+
+    for name, entry in maps.items():
+        entry["neighbors"] = []
+
+    for i, a in enumerate(overworld):
+        for b in overworld[i + 1:]:
+            if _adjacent(rects[a], rects[b]):
+                maps[a]["neighbors"].append(b)
+                maps[b]["neighbors"].append(a)
+
+    # optional hand-written links for maps that don't touch geometrically
+    for a, linked in extra_connections.items():
+        for b in linked:
+            if a != b and a in maps and b in maps and b not in maps[a]["neighbors"]:
+                maps[a]["neighbors"].append(b)
+
+    for entry in maps.values():
+        entry["neighbors"].sort()
+
+
+def save_manifest(manifest, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _is_stale(manifest, maps_folder, manifest_mtime):
+    names = list_map_names(maps_folder)
+    if set(names) != set(manifest.get("maps", {})):
+        return True
+    for name in names:
+        path = resource_path(os.path.join(maps_folder, name + ".json"))
+        if os.path.getmtime(path) > manifest_mtime:
+            return True
+    links = map_connections.connections_path_for(maps_folder)
+    return os.path.exists(links) and os.path.getmtime(links) > manifest_mtime
+
+
+def load_manifest(maps_folder=MAPS_FOLDER):
+    """
+    Read the manifest for a maps folder. Only file mtimes are checked;
+    map JSON is parsed only when the manifest is missing or out of date.
+    """
+    path = manifest_path_for(maps_folder)
+    manifest = None
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != MANIFEST_VERSION or \
+               _is_stale(manifest, maps_folder, os.path.getmtime(path)):
+                manifest = None
+        except (OSError, ValueError):
+            manifest = None
+
+    if manifest is None:
+        manifest = build_manifest(maps_folder)
+        try:
+            save_manifest(manifest, path)
+        except OSError as e:
+            # read-only install (e.g. PyInstaller bundle): keep it in memory
+            print("world_manifest: could not write", path, e)
+
+    return WorldManifest(manifest)
+
+
+class WorldManifest:
+    def __init__(self, data):
+        self.data = data
+        self.maps = data.get("maps", {})
+
+    def __contains__(self, name):
+        return name in self.maps
+
+    def get(self, name):
+        return self.maps.get(name)
+
+    def is_overworld(self, name):
+        entry = self.maps.get(name)
+        return bool(entry and entry["overworld"])
+
+    def neighbors(self, name):
+        entry = self.maps.get(name)
+        return entry["neighbors"] if entry else []
+
+    def world_offset(self, name):
+        """World tile offset (world_x, world_y); (0, 0) for interiors."""
+        entry = self.maps.get(name)
+        if not entry or not entry["overworld"]:
+            return (0, 0)
+        return (entry["world_x"], entry["world_y"])
+
+    def world_pixel_rect(self, name):
+        """(x, y, w, h) world pixel bounds of a map, without loading it."""
+        entry = self.maps[name]
+        wx, wy = self.world_offset(name)
+        left, top, w, h = entry["bounds"]
+        tw, th = entry["tile_w"], entry["tile_h"]
+        return ((wx + left) * TILESIZE, (wy + top) * TILESIZE, w * tw, h * th)
+
+    def refresh_map(self, maps_folder, name):
+        """Re-scan one map (e.g. after an edit) and re-link neighbours."""
+        path = resource_path(os.path.join(maps_folder, name + ".json"))
+        if os.path.exists(path):
+            self.maps[name] = scan_map(path)
+        else:
+            self.maps.pop(name, None)
+        _link_neighbors(self.maps, map_connections.connections_for(maps_folder))
+
+    def component(self, root):
+        """All maps reachable from root through neighbour links (BFS order)."""
+        if root not in self.maps:
+            return []
+        order = []
+        seen = {root}
+        queue = deque([root])
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for n in self.neighbors(name):
+                if n not in seen and n in self.maps:
+                    seen.add(n)
+                    queue.append(n)
+        return order
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else MAPS_FOLDER
+    m = build_manifest(folder)
+    out = manifest_path_for(folder)
+    save_manifest(m, out)
+    print(f"wrote {out} ({len(m['maps'])} maps)")